@@ -0,0 +1,120 @@
+"""
+Benchmark: búsqueda de prestadores con LIKE '%x%' contra FULLTEXT (?q=).
+
+Necesita un MySQL (el de core.database.db_config). Crea una tabla de prueba
+bench_prestador con las mismas columnas de texto que prestador y el mismo
+índice FULLTEXT (migrations/003), la llena con N filas sintéticas y mide, para
+cada término, la consulta que arma list_prestadores con ?apellido= (LIKE) y
+con ?q= (core.busqueda). Al terminar borra la tabla.
+
+Uso (desde api/):
+    python -m benchmarks.bench_busqueda [--sizes 100000 1000000] [--repeticiones 20]
+"""
+import argparse
+import pathlib
+import random
+import statistics
+import sys
+import time
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+# También la raíz del repo, por el paquete comun/
+for path in (API_DIR.parent, API_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import mysql.connector
+from core.busqueda import COLUMNAS_BUSQUEDA_PRESTADOR, aplicar_busqueda
+from core.database import db_config
+
+TABLA = "bench_prestador"
+LOTE = 5000
+LIMIT = 20
+
+NOMBRES = ["Juan", "María", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Pablo", "Camila", "Federico"]
+APELLIDOS = ["González", "Rodríguez", "Fernández", "López", "Martínez", "Pérez", "Gómez", "Sánchez", "Romero", "Díaz"]
+CIUDADES = ["Palermo", "Belgrano", "Caballito", "Flores", "Recoleta", "Almagro", "Quilmes", "Lanús"]
+
+# (lo que escribe el usuario en ?apellido= / ?q=)
+TERMINOS = ["Gonz", "Romero", "Lucía Díaz", "4155"]
+
+
+def crear_tabla(cursor):
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLA} (
+          id INT AUTO_INCREMENT PRIMARY KEY,
+          nombre VARCHAR(100), apellido VARCHAR(100), email VARCHAR(150),
+          telefono VARCHAR(30), dni VARCHAR(20), ciudad VARCHAR(100),
+          activo BOOLEAN DEFAULT TRUE
+        )
+    """)
+
+
+def llenar(cursor, conn, n):
+    rnd = random.Random(n)
+    for inicio in range(0, n, LOTE):
+        filas = []
+        for i in range(inicio, min(inicio + LOTE, n)):
+            nombre, apellido = rnd.choice(NOMBRES), rnd.choice(APELLIDOS) + f" {rnd.choice(APELLIDOS)}"
+            filas.append((
+                nombre, apellido, f"{nombre.lower()}.{i}@mail.com",
+                f"11{rnd.randrange(10**8):08d}", str(20_000_000 + i), rnd.choice(CIUDADES),
+            ))
+        cursor.executemany(
+            f"INSERT INTO {TABLA} (nombre, apellido, email, telefono, dni, ciudad) VALUES (%s, %s, %s, %s, %s, %s)",
+            filas,
+        )
+        conn.commit()
+    inicio = time.perf_counter()
+    cursor.execute(f"CREATE FULLTEXT INDEX ft_bench ON {TABLA} ({', '.join(COLUMNAS_BUSQUEDA_PRESTADOR)})")
+    return time.perf_counter() - inicio
+
+
+def medir(cursor, query, params, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cursor.execute(query, tuple(params))
+        filas = cursor.fetchall()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, len(filas)
+
+
+def consulta_like(termino):
+    return f"SELECT * FROM {TABLA} WHERE 1 = 1 AND apellido LIKE %s ORDER BY id LIMIT %s", [f"%{termino}%", LIMIT]
+
+
+def consulta_fulltext(termino):
+    params = []
+    query = aplicar_busqueda(f"SELECT * FROM {TABLA} WHERE 1 = 1", params, COLUMNAS_BUSQUEDA_PRESTADOR, termino, None, LIMIT)
+    return query, params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        for n in args.sizes:
+            crear_tabla(cursor)
+            indexado = llenar(cursor, conn, n)
+            print(f"\n{n} prestadores (índice FULLTEXT creado en {indexado:.1f} s)")
+            print(f"{'término':>12} | {'LIKE (ms)':>10} | {'filas':>5} | {'FULLTEXT (ms)':>13} | {'filas':>5}")
+            print("-" * 60)
+            for termino in TERMINOS:
+                t_like, f_like = medir(cursor, *consulta_like(termino), args.repeticiones)
+                t_ft, f_ft = medir(cursor, *consulta_fulltext(termino), args.repeticiones)
+                print(f"{termino:>12} | {t_like:>10.2f} | {f_like:>5} | {t_ft:>13.2f} | {f_ft:>5}")
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
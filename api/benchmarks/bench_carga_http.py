@@ -0,0 +1,83 @@
+"""
+Benchmark: requests/s y latencia de la API con 50, 200 y 1000 clientes concurrentes.
+
+Es una prueba de carga contra una API levantada (uvicorn, docker compose o el
+server): cada cliente es una corrutina con httpx.AsyncClient que repite el mismo
+GET durante --seconds segundos. Reporta req/s, p50/p95/p99 y errores por nivel.
+
+Para comparar antes/después, levantar la API con distinto API_THREADPOOL_SIZE
+(o DB_POOL_SIZE) y correr el mismo comando:
+    API_THREADPOOL_SIZE=40  uvicorn main:app --port 8000
+    API_THREADPOOL_SIZE=200 uvicorn main:app --port 8000
+
+Uso (desde api/):
+    python -m benchmarks.bench_carga_http --url http://localhost:8000 --path "/prestadores/?limit=20" \\
+        [--token <JWT>] [--internal-token <INTERNAL_API_TOKEN>] [--levels 50 200 1000] [--seconds 15]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def cliente(client, path, fin, latencias, errores):
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errores[str(response.status_code)] = errores.get(str(response.status_code), 0) + 1
+            else:
+                latencias.append(time.perf_counter() - inicio)
+        except httpx.HTTPError as e:
+            errores[type(e).__name__] = errores.get(type(e).__name__, 0) + 1
+
+
+async def correr_nivel(args, concurrencia, headers):
+    limits = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        # Calentamiento: abre conexiones antes de medir
+        await asyncio.gather(*(client.get(args.path) for _ in range(min(concurrencia, 50))), return_exceptions=True)
+        latencias, errores = [], {}
+        inicio = time.perf_counter()
+        fin = inicio + args.seconds
+        await asyncio.gather(*(cliente(client, args.path, fin, latencias, errores) for _ in range(concurrencia)))
+        duracion = time.perf_counter() - inicio
+    return latencias, errores, duracion
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000 if valores else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/prestadores/?limit=20")
+    parser.add_argument("--token", help="JWT para Authorization: Bearer")
+    parser.add_argument("--internal-token", help="valor del header x-internal-token")
+    parser.add_argument("--levels", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    headers = {}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    if args.internal_token:
+        headers["x-internal-token"] = args.internal_token
+
+    print(f"GET {args.url}{args.path} durante {args.seconds:.0f}s por nivel")
+    print(f"{'clientes':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ok':>8}  errores")
+    for concurrencia in args.levels:
+        latencias, errores, duracion = asyncio.run(correr_nivel(args, concurrencia, headers))
+        latencias.sort()
+        p50 = statistics.median(latencias) * 1000 if latencias else float("nan")
+        print(f"{concurrencia:>8} {len(latencias) / duracion:>9.1f} {p50:>8.1f} "
+              f"{percentil(latencias, 0.95):>8.1f} {percentil(latencias, 0.99):>8.1f} {len(latencias):>8}  {errores or '-'}")
+
+
+if __name__ == "__main__":
+    main()
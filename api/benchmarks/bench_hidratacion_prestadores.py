@@ -0,0 +1,108 @@
+"""
+Benchmark: round-trips a MySQL para listar prestadores con zonas y habilidades.
+
+Compara el armado anterior (2 consultas por prestador) contra
+services.hidratacion.hidratar_prestadores (2 consultas en total).
+No necesita base de datos: usa un cursor falso que cuenta cada execute()
+y simula una latencia de red fija por round-trip.
+
+Uso (desde api/):
+    python -m benchmarks.bench_hidratacion_prestadores [--rtt-ms 0.5]
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+# También la raíz del repo, por el paquete comun/
+for path in (API_DIR.parent, API_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from services.hidratacion import hidratar_prestadores
+
+PAGE_SIZES = (10, 50, 100, 500, 1000)
+ZONAS_POR_PRESTADOR = 3
+HABILIDADES_POR_PRESTADOR = 4
+
+
+class CountingCursor:
+    """Cursor en memoria: responde las consultas de zonas/habilidades y cuenta round-trips."""
+
+    def __init__(self, rtt_seconds):
+        self.rtt = rtt_seconds
+        self.round_trips = 0
+        self._rows = []
+
+    def execute(self, query, params=()):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+        ids = list(params)
+        con_id = "id_prestador IN" in query
+        if "FROM zona" in query:
+            self._rows = [
+                ({"id_prestador": pid} if con_id else {}) | {"id": z, "nombre": f"Zona {z}"}
+                for pid in ids for z in range(ZONAS_POR_PRESTADOR)
+            ]
+        else:
+            self._rows = [
+                ({"id_prestador": pid} if con_id else {})
+                | {"id": h, "nombre": f"Hab {h}", "descripcion": None, "id_rubro": 1, "nombre_rubro": "Rubro"}
+                for pid in ids for h in range(HABILIDADES_POR_PRESTADOR)
+            ]
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+def hidratar_legacy(prestadores, cursor):
+    # Reproduce el loop que tenían list_prestadores / get_prestadores_by_*
+    for prestador in prestadores:
+        cursor.execute("""
+            SELECT z.id, z.nombre
+            FROM zona z
+            INNER JOIN prestador_zona pz ON z.id = pz.id_zona
+            WHERE pz.id_prestador = %s
+        """, (prestador["id"],))
+        prestador["zonas"] = cursor.fetchall()
+        cursor.execute("""
+            SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
+            FROM habilidad h
+            INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
+            INNER JOIN rubro r ON h.id_rubro = r.id
+            WHERE ph.id_prestador = %s
+        """, (prestador["id"],))
+        prestador["habilidades"] = cursor.fetchall()
+
+
+def medir(fn, n, rtt):
+    prestadores = [{"id": i} for i in range(1, n + 1)]
+    cursor = CountingCursor(rtt)
+    cursor.round_trips = 1  # la consulta de la página de prestadores
+    start = time.perf_counter()
+    fn(prestadores, cursor)
+    elapsed = time.perf_counter() - start
+    assert all(len(p["zonas"]) == ZONAS_POR_PRESTADOR for p in prestadores)
+    return cursor.round_trips, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="latencia simulada por round-trip (ms)")
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    print(f"RTT simulado: {args.rtt_ms} ms")
+    print(f"{'filas':>6} | {'antes (RT)':>10} | {'después (RT)':>12} | {'antes (ms)':>10} | {'después (ms)':>12}")
+    print("-" * 64)
+    for n in PAGE_SIZES:
+        rt_old, t_old = medir(hidratar_legacy, n, rtt)
+        rt_new, t_new = medir(hidratar_prestadores, n, rtt)
+        print(f"{n:>6} | {rt_old:>10} | {rt_new:>12} | {t_old * 1000:>10.1f} | {t_new * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
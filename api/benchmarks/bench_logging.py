@@ -0,0 +1,117 @@
+"""
+Benchmark: costo de logging por evento publicado.
+
+Compara, para N publicaciones simuladas (sin red), lo que paga el thread que
+publica en cada esquema:
+  - print:      lo que hacía publish_event antes (URL, headers, body con
+                indent=4 y la respuesta, todo con print)
+  - texto sync: logging con StreamHandler en el mismo thread y f-strings
+  - json cola:  comun.logs (JSON por QueueHandler -> listener), una línea INFO
+                por evento y el body en DEBUG apagado
+  - json 1/100: lo mismo con LOG_SAMPLING=bench=100
+
+La salida va a /dev/null, así que mide formateo y escritura, no la terminal.
+Para los esquemas con cola también reporta cuánto tarda el listener en vaciarla.
+
+Uso (desde api/):
+    python -m benchmarks.bench_logging [--events 20000]
+"""
+import argparse
+import json
+import logging
+import os
+import pathlib
+import sys
+import time
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+# También la raíz del repo, por el paquete comun/
+for path in (API_DIR.parent, API_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from comun import logs
+from comun.serializacion import dumps_bytes
+
+HEADERS = {"Content-Type": "application/json", "X-API-KEY": "secreto"}
+RESPUESTA = '{"status":"ok"}'
+
+
+def body(i):
+    return {
+        "messageId": str(i),
+        "timestamp": "2025-01-01T00:00:00+00:00",
+        "destination": {"topic": "pedido", "eventName": "alta"},
+        "payload": {"id_pedido": i, "estado": "pendiente", "descripcion": "Pérdida en el baño " * 5,
+                    "tarifa": 1500.5, "id_prestador": 7, "id_usuario": 12},
+    }
+
+
+def con_print(n):
+    for i in range(n):
+        b = body(i)
+        print(f"➡️ URL: https://core/publish")
+        print(f"➡️ Headers: {HEADERS}")
+        print(f"➡️ Body JSON:\n{json.dumps(b, indent=4, ensure_ascii=False)}")
+        print(f"Respuesta del corehub====")
+        print(f"⬅️ Código HTTP: 200")
+        print(f"⬅️ Texto completo:\n{RESPUESTA}")
+
+
+def con_logger(log, n):
+    for i in range(n):
+        b = body(i)
+        contenido = dumps_bytes(b)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Publicando %s/%s: %s", "pedido", "alta", contenido.decode("utf-8"))
+        log.info("Evento %s publicado (%s/%s)", b["messageId"], "pedido", "alta")
+
+
+def con_texto_sync(log, n):
+    for i in range(n):
+        b = body(i)
+        log.info(f"Publicando {b['destination']} body={json.dumps(b, ensure_ascii=False)}")
+        log.info(f"Evento {b['messageId']} publicado, respuesta 200: {RESPUESTA}")
+
+
+def medir(nombre, n, fn, vaciar=None):
+    inicio = time.perf_counter()
+    fn()
+    caller = time.perf_counter() - inicio
+    total = caller
+    if vaciar is not None:
+        vaciar()
+        total = time.perf_counter() - inicio
+    print(f"{nombre:<12} {caller / n * 1e6:>12.1f} {total / n * 1e6:>12.1f}", file=sys.__stderr__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.events
+
+    print(f"{n} eventos, µs por evento", file=sys.__stderr__)
+    print(f"{'esquema':<12} {'publicador':>12} {'con vaciado':>12}", file=sys.__stderr__)
+
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    log = logging.getLogger("bench.events")
+
+    medir("print", n, lambda: con_print(n))
+
+    root = logging.getLogger()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(logs.TEXT_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    medir("texto sync", n, lambda: con_texto_sync(log, n))
+    root.removeHandler(handler)
+
+    for nombre, muestreo in (("json cola", ""), ("json 1/100", "bench=100")):
+        os.environ["LOG_SAMPLING"] = muestreo
+        logs.configure_logging("api")
+        medir(nombre, n, lambda: con_logger(log, n), vaciar=logs.shutdown_logging)
+
+
+if __name__ == "__main__":
+    main()
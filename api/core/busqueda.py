@@ -0,0 +1,52 @@
+import re
+from fastapi import HTTPException
+
+# ===========================
+# Búsqueda de texto (FULLTEXT)
+# ===========================
+# Los listados aceptan ?q=texto libre, que se busca con MATCH ... AGAINST sobre
+# el índice FULLTEXT de la tabla (migrations/003). A diferencia de los filtros
+# LIKE '%x%' (que siguen andando, pero recorren toda la tabla) usa el índice,
+# ordena por relevancia y hace match por prefijo: "gonz rami" encuentra
+# "González Ramírez".
+#
+# Cada palabra pasa a "+palabra*" en BOOLEAN MODE (todas obligatorias, prefijo).
+# Con q los resultados vienen ordenados por relevancia, así que no hay cursor
+# keyset: `limit` devuelve los N más relevantes.
+
+# Columnas de cada índice FULLTEXT: MATCH() tiene que nombrar exactamente estas
+COLUMNAS_BUSQUEDA_PRESTADOR = ("nombre", "apellido", "email", "telefono", "dni", "ciudad")
+COLUMNAS_BUSQUEDA_USUARIO = ("nombre", "apellido", "dni", "telefono", "ciudad_pri")
+
+# Todo lo que no es letra, número, '_' o '@'/'.' (mails) separa palabras; así
+# también se descartan los operadores del modo booleano (+ - < > ( ) ~ * ")
+_SEPARADORES = re.compile(r"[^\w@.]+")
+
+
+def termino_booleano(q: str) -> str | None:
+    """Convierte el texto del usuario en la expresión de BOOLEAN MODE, o None si no queda nada."""
+    palabras = []
+    for palabra in _SEPARADORES.split(q):
+        # El parser de FULLTEXT corta en '@' y '.': cada pedazo es una palabra
+        palabras += [p for p in re.split(r"[@.]+", palabra) if p]
+    return " ".join(f"+{p}*" for p in palabras) or None
+
+
+def aplicar_busqueda(query: str, params: list, columnas, q: str, cursor: str | None, limit: int | None) -> str:
+    """
+    Agrega el MATCH y el orden por relevancia a una query que ya termina en su
+    WHERE. Reemplaza a aplicar_keyset cuando vino ?q=.
+    """
+    if cursor is not None:
+        raise HTTPException(status_code=400, detail="'cursor' no se puede combinar con 'q' (los resultados van por relevancia)")
+    termino = termino_booleano(q)
+    if termino is None:
+        raise HTTPException(status_code=400, detail="'q' no tiene palabras para buscar")
+
+    match = f"MATCH({', '.join(columnas)}) AGAINST (%s IN BOOLEAN MODE)"
+    query += f" AND {match} ORDER BY {match} DESC, id"
+    params += [termino, termino]
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from core.metrics import CACHE_REQUESTS
+from comun.serializacion import dumps_bytes, loads
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Cache de lectura del catálogo
+# ===========================
+# Read-through: get_or_load(namespace, clave, cargar) devuelve lo guardado o
+# llama a `cargar` (la consulta a MySQL) y lo guarda CACHE_TTL_SEC segundos.
+#
+# Cada namespace ("rubros", "habilidades", "zonas") tiene un contador de versión
+# que forma parte de la clave. Las rutas que modifican llaman a
+# invalidate(namespace) después del commit: sube la versión y todo lo anterior
+# deja de encontrarse (y expira solo). La versión se lee antes de ir a la DB,
+# así que una lectura que arrancó antes del commit guarda con la versión vieja
+# y no pisa el dato nuevo.
+#
+# Backends (CACHE_BACKEND):
+#   memory  dict en el proceso (default). Con varias réplicas cada una invalida
+#           solo la suya; las demás ven el cambio cuando vence el TTL.
+#   redis   compartido entre réplicas (CACHE_REDIS_URL, requiere el paquete redis).
+#   none    sin cache.
+# Los valores se guardan serializados, así que cada lectura devuelve una copia.
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_TTL_SEC = float(os.getenv("CACHE_TTL_SEC", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryBackend:
+    """LRU con vencimiento por entrada. También sirve de backend en los tests."""
+
+    def __init__(self, max_entries: int = 10000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= self._clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._data[key] = (value, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Backend compartido entre réplicas. Los contadores de versión no vencen."""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        return self._redis.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._redis.set(key, value, px=int(ttl * 1000))
+
+    def counter(self, key: str) -> int:
+        return int(self._redis.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self._redis.incr(key)
+
+
+class Cache:
+    def __init__(self, backend, ttl: float = 300, prefix: str = "catalogo"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def version(self, namespace: str) -> int:
+        if self.backend is None:
+            return 0
+        return self.backend.counter(f"{self.prefix}:{namespace}:version")
+
+    def get_or_load(self, namespace: str, clave: str, cargar):
+        if self.backend is None:
+            return cargar()
+        try:
+            key = f"{self.prefix}:{namespace}:v{self.version(namespace)}:{clave}"
+            guardado = self.backend.get(key)
+        except Exception as e:
+            # Si el backend compartido no responde se sigue contra la DB
+            log.warning("Cache no disponible, se lee de la DB: %s", e)
+            return cargar()
+        if guardado is not None:
+            CACHE_REQUESTS.labels(namespace=namespace, result="hit").inc()
+            return loads(guardado)
+        CACHE_REQUESTS.labels(namespace=namespace, result="miss").inc()
+        valor = cargar()
+        try:
+            self.backend.set(key, dumps_bytes(valor), self.ttl)
+        except Exception as e:
+            log.warning("No se pudo guardar en el cache: %s", e)
+        return valor
+
+    def invalidate(self, *namespaces: str):
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            try:
+                self.backend.incr(f"{self.prefix}:{namespace}:version")
+            except Exception as e:
+                # El cambio ya está commiteado; lo viejo se deja de ver al vencer el TTL
+                log.error("No se pudo invalidar el cache de %s: %s", namespace, e)
+
+
+def _crear_backend():
+    if CACHE_BACKEND == "none":
+        return None
+    if CACHE_BACKEND == "redis":
+        return RedisBackend(CACHE_REDIS_URL)
+    return MemoryBackend(CACHE_MAX_ENTRIES)
+
+
+catalogo = Cache(_crear_backend(), ttl=CACHE_TTL_SEC)
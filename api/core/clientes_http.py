@@ -0,0 +1,74 @@
+import importlib.util
+import os
+import threading
+import time
+import httpx
+from core.metrics import HTTP_CLIENT_IN_FLIGHT, HTTP_CLIENT_NEW_CONNECTIONS, HTTP_CLIENT_SECONDS
+from comun.serializacion import dumps_bytes
+
+# ===========================
+# Clientes HTTP compartidos
+# ===========================
+# Un httpx.Client por destino ("corehub", "usuarios", ...) para todo el proceso:
+# las conexiones quedan abiertas (keep-alive) y se reusan entre llamadas, en vez
+# de pagar DNS + TCP + TLS en cada request. httpx.Client es thread-safe, así que
+# lo comparten los threads de las rutas y el dispatcher del outbox.
+# HTTP/2 se negocia (por TLS) si está instalado el paquete h2.
+
+HTTP_CONNECT_TIMEOUT_SEC = float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", 3))
+HTTP_READ_TIMEOUT_SEC = float(os.getenv("HTTP_READ_TIMEOUT_SEC", 10))
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY_SEC = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SEC", 30))
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(destino: str) -> httpx.Client:
+    with _lock:
+        client = _clients.get(destino)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                http2=HTTP2,
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT_SEC, connect=HTTP_CONNECT_TIMEOUT_SEC),
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_POOL_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SEC,
+                ),
+            )
+            _clients[destino] = client
+        return client
+
+
+def request(destino: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Hace el request con el cliente compartido de `destino` y registra métricas
+    (requests en curso, duración, conexiones nuevas). Acepta los mismos kwargs
+    que httpx.Client.request (json, headers, timeout, ...); un `json=` se
+    serializa con comun.serializacion.
+    """
+    if kwargs.get("json") is not None:
+        kwargs["content"] = dumps_bytes(kwargs.pop("json"))
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
+
+    def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            HTTP_CLIENT_NEW_CONNECTIONS.labels(destino=destino).inc()
+
+    HTTP_CLIENT_IN_FLIGHT.labels(destino=destino).inc()
+    inicio = time.perf_counter()
+    try:
+        return get_client(destino).request(method, url, extensions={"trace": trace}, **kwargs)
+    finally:
+        HTTP_CLIENT_IN_FLIGHT.labels(destino=destino).dec()
+        HTTP_CLIENT_SECONDS.labels(destino=destino).observe(time.perf_counter() - inicio)
+
+
+def close_clients():
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,148 @@
+import gzip
+import os
+import time
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from core.metrics import COMPRESSION_CPU_SECONDS, COMPRESSION_RATIO
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ===========================
+# Compresión de respuestas
+# ===========================
+# Middleware ASGI que comprime las respuestas según Accept-Encoding (zstd, br o
+# gzip; zstd y br solo si están instalados los paquetes zstandard / brotli).
+# Se saltea:
+#   - bodies de menos de COMPRESSION_MIN_SIZE bytes (no vale la CPU),
+#   - respuestas que ya traen Content-Encoding (p. ej. /metrics con gzip),
+#   - respuestas en streaming (export NDJSON): se mandan tal cual,
+#   - tipos que no son texto/JSON.
+# Los bodies de COMPRESSION_THREAD_MIN_SIZE bytes o más se comprimen en el pool
+# de threads de anyio para no frenar el event loop; los chicos, en el momento.
+# Métricas por ruta y encoding: http_compresion_ratio y http_compresion_cpu_seconds.
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", "65536"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+
+
+def _zstd(body: bytes) -> bytes:
+    # ZstdCompressor no se comparte entre threads
+    return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+
+
+# En orden de preferencia cuando el cliente acepta varios con el mismo q
+COMPRESORES = {"gzip": _gzip}
+if brotli is not None:
+    COMPRESORES = {"br": _brotli, **COMPRESORES}
+if zstandard is not None:
+    COMPRESORES = {"zstd": _zstd, **COMPRESORES}
+
+
+def elegir_encoding(accept_encoding: str):
+    """Encoding a usar según Accept-Encoding (con q-values), o None."""
+    pesos = {}
+    for item in accept_encoding.split(","):
+        nombre, _, parametros = item.strip().partition(";")
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            pesos[nombre.strip().lower()] = q
+
+    mejor, mejor_q = None, 0.0
+    for encoding in COMPRESORES:
+        q = pesos.get(encoding, pesos.get("*", 0.0))
+        if q > mejor_q:
+            mejor, mejor_q = encoding, q
+    return mejor
+
+
+def _comprimir(encoding: str, body: bytes):
+    inicio = time.thread_time()
+    comprimido = COMPRESORES[encoding](body)
+    return comprimido, time.thread_time() - inicio
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, thread_min_size: int = COMPRESSION_THREAD_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_min_size = thread_min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = elegir_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        directo = False
+
+        async def enviar(message):
+            nonlocal inicio, directo
+            if message["type"] == "http.response.start":
+                inicio = message
+                return
+            if directo or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=inicio["headers"])
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not headers.get("content-type", "").startswith(TIPOS_COMPRIMIBLES)
+            ):
+                # Streaming, ya comprimido, chico o no comprimible: sale tal cual
+                directo = True
+                await send(inicio)
+                await send(message)
+                return
+
+            if len(body) >= self.thread_min_size:
+                comprimido, cpu = await to_thread.run_sync(_comprimir, encoding, body)
+            else:
+                comprimido, cpu = _comprimir(encoding, body)
+
+            ruta = getattr(scope.get("route"), "path", "otras")
+            COMPRESSION_RATIO.labels(handler=ruta, encoding=encoding).observe(len(comprimido) / len(body))
+            COMPRESSION_CPU_SECONDS.labels(handler=ruta, encoding=encoding).observe(cpu)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(comprimido))
+            headers.add_vary_header("Accept-Encoding")
+            await send(inicio)
+            await send({"type": "http.response.body", "body": comprimido})
+
+        await self.app(scope, receive, enviar)
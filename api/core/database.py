@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 import mysql.connector
 import contextlib
+from core.pool import ConnectionPool
 
 load_dotenv()
 
@@ -20,17 +21,46 @@ db_config = {
     "database": os.getenv("MYSQL_DATABASE", "catalogo"),
 }
 
+# ===========================
+# Pool de conexiones
+# ===========================
+# Las conexiones se abren a demanda (no al importar) y se reutilizan entre requests.
+pool = ConnectionPool(
+    connect=lambda: mysql.connector.connect(**db_config),
+    size=int(os.getenv("DB_POOL_SIZE", 10)),
+    max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", 20)),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    recycle=int(os.getenv("DB_POOL_RECYCLE_SEC", 1800)),
+    pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+)
+
 @contextlib.contextmanager
-def get_connection():
-    conn = mysql.connector.connect(**db_config)
+def get_connection(buffered: bool = True):
+    pooled = pool.acquire()
+    conn = pooled.raw
     # Use a buffered cursor so multiple sequential queries on the same
-    # connection don't leave unread results and raise "Unread result found"
-    cursor = conn.cursor(buffered=True, dictionary=True)
+    # connection don't leave unread results and raise "Unread result found".
+    # buffered=False deja las filas en el servidor (para exportaciones grandes):
+    # en ese caso no se puede ejecutar otra query en la misma conexión hasta leerlas todas.
+    try:
+        cursor = conn.cursor(buffered=buffered, dictionary=True)
+    except Exception:
+        # Sin cursor (p. ej. conexión muerta) el slot del pool se libera igual
+        pool.release(pooled, discard=True)
+        raise
+    broken = False
     try:
         yield cursor,conn
+    except mysql.connector.errors.OperationalError:
+        # Conexión caída a mitad del request: no devolverla al pool
+        broken = True
+        raise
     finally:
-        cursor.close()
-        conn.close()
+        try:
+            cursor.close()
+        except Exception:
+            broken = True
+        pool.release(pooled, discard=broken)
 
 
 # URL de conexión a MySQL (para usar sqlalchemy (no me funcionó))
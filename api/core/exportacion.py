@@ -0,0 +1,51 @@
+import contextlib
+import os
+from fastapi.responses import StreamingResponse
+from core.database import get_connection
+
+# ===========================
+# Exportación NDJSON en streaming
+# ===========================
+# Una fila por línea, serializada con el mismo schema Pydantic que usan los
+# listados. Las filas se leen con un cursor sin buffer (quedan del lado del
+# servidor) en bloques de EXPORT_CHUNK_SIZE, así la memoria no crece con la tabla.
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+
+def stream_ndjson(query: str, params: tuple, modelo, hidratar=None, chunk_size: int | None = None):
+    """
+    Generador de líneas NDJSON para `query`.
+
+    `hidratar(rows, cursor)` es opcional: se llama por cada bloque con un cursor de
+    una segunda conexión, porque la conexión principal está ocupada leyendo el stream.
+    `chunk_size` por defecto es EXPORT_CHUNK_SIZE (se lee al llamar).
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    with contextlib.ExitStack() as stack:
+        cursor, conn = stack.enter_context(get_connection(buffered=False))
+        aux_cursor = None
+        if hidratar is not None:
+            aux_cursor, _ = stack.enter_context(get_connection())
+
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if hidratar is not None:
+                hidratar(rows, aux_cursor)
+            for row in rows:
+                yield modelo.model_validate(row).model_dump_json() + "\n"
+
+
+def ndjson_response(query: str, params: tuple, modelo, hidratar=None, filename: str | None = None):
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        stream_ndjson(query, params, modelo, hidratar),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
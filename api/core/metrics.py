@@ -0,0 +1,77 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# ===========================
+# Métricas propias de la API
+# ===========================
+# Se registran en el registry por defecto de prometheus_client, que es el mismo
+# que expone el Instrumentator en /metrics.
+
+# --- Pool de conexiones MySQL ---
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Conexiones del pool actualmente prestadas a un request",
+)
+DB_POOL_IDLE = Gauge(
+    "db_pool_connections_idle",
+    "Conexiones abiertas y libres dentro del pool",
+)
+DB_POOL_WAITING = Gauge(
+    "db_pool_waiting_requests",
+    "Requests esperando que se libere una conexión del pool",
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Tiempo para obtener una conexión del pool (incluye espera, ping y reconexión)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# --- Emisión de eventos al outbox ---
+EVENT_EMIT_SECONDS = Histogram(
+    "eventos_emision_seconds",
+    "Tiempo de serializar e insertar un evento en eventos_publicados, por topic",
+    ["topic"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# --- Clientes HTTP salientes (core/clientes_http.py), por destino ---
+HTTP_CLIENT_IN_FLIGHT = Gauge(
+    "http_cliente_requests_en_curso",
+    "Requests salientes en curso, por destino",
+    ["destino"],
+)
+HTTP_CLIENT_SECONDS = Histogram(
+    "http_cliente_request_seconds",
+    "Duración de los requests salientes (incluye conexión si hubo que abrir una), por destino",
+    ["destino"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_CLIENT_NEW_CONNECTIONS = Counter(
+    "http_cliente_conexiones_nuevas_total",
+    "Conexiones TCP abiertas por los clientes compartidos (con keep-alive debería crecer poco), por destino",
+    ["destino"],
+)
+
+# --- Cache del catálogo (core/cache.py) ---
+# Tasa de aciertos:
+#   sum(rate(cache_requests_total{result="hit"}[5m])) / sum(rate(cache_requests_total[5m]))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lecturas del cache de catálogo, por namespace y resultado (hit, miss)",
+    ["namespace", "result"],
+)
+
+# --- Compresión de respuestas (core/compresion.py), por ruta y encoding ---
+# Para ajustar COMPRESSION_MIN_SIZE: ratio promedio por ruta
+#   sum(rate(http_compresion_ratio_sum[5m])) by (handler) / sum(rate(http_compresion_ratio_count[5m])) by (handler)
+COMPRESSION_RATIO = Histogram(
+    "http_compresion_ratio",
+    "Tamaño comprimido / tamaño original de las respuestas comprimidas",
+    ["handler", "encoding"],
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0),
+)
+COMPRESSION_CPU_SECONDS = Histogram(
+    "http_compresion_cpu_seconds",
+    "Tiempo de CPU usado en comprimir cada respuesta",
+    ["handler", "encoding"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
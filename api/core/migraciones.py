@@ -0,0 +1,130 @@
+import argparse
+import hashlib
+import logging
+import os
+import pathlib
+import re
+import mysql.connector
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Migraciones de esquema
+# ===========================
+# Archivos api/migrations/NNN_descripcion.sql, aplicados en orden de NNN. Cada
+# uno se aplica una sola vez y queda registrado en schema_migrations (con el
+# checksum del archivo, para avisar si alguien edita una ya aplicada).
+#
+# En MySQL los DDL hacen commit implícito, así que una migración no es atómica:
+# si se corta a la mitad, al reintentar se ignoran los errores de "ya existe"
+# (índice, columna o tabla duplicados, o un índice ya borrado) y se sigue con el resto.
+#
+# Un GET_LOCK evita que dos réplicas las apliquen a la vez. Se corren al arrancar
+# la API (MIGRATIONS_AUTO=true, default) o a mano:
+#     python -m core.migraciones [--status]      (desde api/)
+
+MIGRATIONS_DIR = pathlib.Path(__file__).resolve().parents[1] / "migrations"
+MIGRATIONS_AUTO = os.getenv("MIGRATIONS_AUTO", "true").lower() in ("1", "true", "yes")
+MIGRATIONS_LOCK = "catalogo_migraciones"
+MIGRATIONS_LOCK_TIMEOUT_SEC = int(os.getenv("MIGRATIONS_LOCK_TIMEOUT_SEC", "60"))
+
+# Duplicate key name, duplicate column name, table already exists, can't DROP (ya no existe)
+ERRORES_YA_APLICADO = {1061, 1060, 1050, 1091}
+
+_ARCHIVO = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+def listar_migraciones(directorio: pathlib.Path = MIGRATIONS_DIR):
+    """[(version, nombre, path)] ordenadas por versión."""
+    migraciones = []
+    for path in directorio.glob("*.sql"):
+        match = _ARCHIVO.match(path.name)
+        if match:
+            migraciones.append((match.group(1), match.group(2), path))
+    return sorted(migraciones, key=lambda m: int(m[0]))
+
+
+def sentencias(sql: str):
+    """Parte un archivo en sentencias (separadas por ';' al final de línea), sin comentarios '--'."""
+    lineas = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lineas), flags=re.MULTILINE) if s.strip()]
+
+
+def _checksum(path: pathlib.Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _asegurar_tabla(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version VARCHAR(20) PRIMARY KEY,
+          nombre VARCHAR(255) NOT NULL,
+          checksum CHAR(64) NOT NULL,
+          aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def aplicadas(cursor) -> dict:
+    _asegurar_tabla(cursor)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in cursor.fetchall()}
+
+
+def aplicar_migraciones(cursor, conn, directorio: pathlib.Path = MIGRATIONS_DIR) -> list:
+    """Aplica las migraciones pendientes. Devuelve las versiones aplicadas."""
+    cursor.execute("SELECT GET_LOCK(%s, %s) AS ok", (MIGRATIONS_LOCK, MIGRATIONS_LOCK_TIMEOUT_SEC))
+    if not cursor.fetchone()["ok"]:
+        raise RuntimeError("No se pudo tomar el lock de migraciones (¿otra réplica migrando?)")
+    try:
+        hechas = aplicadas(cursor)
+        nuevas = []
+        for version, nombre, path in listar_migraciones(directorio):
+            checksum = _checksum(path)
+            if version in hechas:
+                if hechas[version] != checksum:
+                    log.warning("La migración %s_%s cambió después de aplicada", version, nombre)
+                continue
+
+            log.info("Aplicando migración %s_%s", version, nombre)
+            for sentencia in sentencias(path.read_text(encoding="utf-8")):
+                try:
+                    cursor.execute(sentencia)
+                except mysql.connector.Error as e:
+                    if e.errno not in ERRORES_YA_APLICADO:
+                        conn.rollback()
+                        raise
+                    log.info("Migración %s: ya aplicado (%s)", version, e.msg)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, nombre, checksum) VALUES (%s, %s, %s)",
+                (version, nombre, checksum),
+            )
+            conn.commit()
+            nuevas.append(version)
+        return nuevas
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATIONS_LOCK,))
+        cursor.fetchall()
+
+
+def main():
+    from core.database import get_connection
+
+    parser = argparse.ArgumentParser(description="Aplica las migraciones de api/migrations")
+    parser.add_argument("--status", action="store_true", help="solo lista aplicadas y pendientes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    with get_connection() as (cursor, conn):
+        if args.status:
+            hechas = aplicadas(cursor)
+            conn.commit()
+            for version, nombre, _ in listar_migraciones():
+                print(f"{version}_{nombre}: {'aplicada' if version in hechas else 'pendiente'}")
+            return
+        nuevas = aplicar_migraciones(cursor, conn)
+        print(f"Migraciones aplicadas: {', '.join(nuevas) or 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
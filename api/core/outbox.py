@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+from core.database import db_config
+from core.events import publish_event
+from comun.serializacion import loads
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Outbox transaccional de eventos
+# ===========================
+# Las rutas insertan el evento en `eventos_publicados` dentro de la misma
+# transacción que el cambio de dominio y solo despiertan al dispatcher.
+# El dispatcher corre en un thread de fondo, toma lotes de eventos pendientes
+# y los publica en el CoreHub:
+#   - un topic se publica en orden de id (si un evento falla, los siguientes del
+#     mismo topic esperan a que se reintente; mientras esté en backoff el topic
+#     entero queda fuera de la consulta y no ocupa lugar en el lote),
+#   - topics distintos se publican en paralelo,
+#   - los fallos se reintentan con backoff exponencial y después de
+#     OUTBOX_MAX_ATTEMPTS quedan marcados con failed_at (se ven en GET /eventos).
+# Con varias réplicas de la API solo una despacha a la vez (GET_LOCK de MySQL).
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", 4))
+OUTBOX_POLL_INTERVAL_SEC = float(os.getenv("OUTBOX_POLL_INTERVAL_SEC", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_BACKOFF_BASE_SEC = int(os.getenv("OUTBOX_BACKOFF_BASE_SEC", 5))
+OUTBOX_BACKOFF_MAX_SEC = int(os.getenv("OUTBOX_BACKOFF_MAX_SEC", 300))
+
+LOCK_NAME = "catalogo_outbox_dispatcher"
+
+# Columnas que agrega el outbox a eventos_publicados (migrations/004)
+OUTBOX_COLUMNS = ("published_at", "attempts", "next_attempt_at", "last_error", "failed_at")
+
+
+def columnas_faltantes(cursor) -> list:
+    """Columnas del outbox que todavía no tiene eventos_publicados (vacía si la migración se aplicó)."""
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'eventos_publicados'
+    """)
+    existentes = {row["COLUMN_NAME"] for row in cursor.fetchall()}
+    return [c for c in OUTBOX_COLUMNS if c not in existentes]
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(OUTBOX_BACKOFF_BASE_SEC * (2 ** max(attempts - 1, 0)), OUTBOX_BACKOFF_MAX_SEC)
+
+
+def _timestamp(created_at) -> str:
+    # created_at se guarda en UTC (igual que antes se informaba al CoreHub)
+    return created_at.isoformat() + "+00:00" if created_at.tzinfo is None else created_at.isoformat()
+
+
+class OutboxDispatcher:
+    def __init__(self, publish=publish_event, connect=None):
+        self._publish = publish
+        self._connect = connect or (lambda: mysql.connector.connect(**db_config))
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._conn = None
+
+    # ---------------------------
+    # Ciclo de vida
+    # ---------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=OUTBOX_CONCURRENCY, thread_name_prefix="outbox-publish")
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._close()
+
+    def notify(self):
+        """Despierta al dispatcher (se llama después del commit de un evento)."""
+        self._wakeup.set()
+
+    # ---------------------------
+    # Loop principal
+    # ---------------------------
+    def _run(self):
+        log.info("Outbox dispatcher iniciado")
+        while not self._stop.is_set():
+            try:
+                if not self._ensure_leader():
+                    self._wait(OUTBOX_POLL_INTERVAL_SEC * 5)
+                    continue
+                # Solo se sigue sin esperar si el lote salió completo (puede haber más)
+                publicados = self.dispatch_once()
+                if publicados < OUTBOX_BATCH_SIZE:
+                    self._wait(OUTBOX_POLL_INTERVAL_SEC)
+            except Exception as e:
+                log.exception("Error en el outbox dispatcher: %s", e)
+                self._close()
+                self._wait(OUTBOX_POLL_INTERVAL_SEC * 5)
+        log.info("Outbox dispatcher detenido")
+
+    def _wait(self, seconds):
+        self._wakeup.wait(seconds)
+        self._wakeup.clear()
+
+    def _ensure_leader(self) -> bool:
+        if self._conn is not None and self._conn.is_connected():
+            return True
+        self._close()
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+        (got_lock,) = cursor.fetchone()
+        cursor.close()
+        if got_lock != 1:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()  # libera también el GET_LOCK
+            except Exception:
+                pass
+            self._conn = None
+
+    def dispatch_once(self) -> int:
+        """Publica un lote de eventos pendientes. Devuelve cuántos se publicaron."""
+        cursor = self._conn.cursor(buffered=True, dictionary=True)
+        try:
+            # Los topics con un evento en backoff se saltean enteros: ese evento
+            # tiene que salir antes que los siguientes del mismo topic.
+            cursor.execute("""
+                SELECT e.id, e.topic, e.event_name, e.payload, e.created_at, e.attempts
+                FROM eventos_publicados e
+                LEFT JOIN (
+                    SELECT DISTINCT topic FROM eventos_publicados
+                    WHERE published_at IS NULL AND failed_at IS NULL AND next_attempt_at > NOW()
+                ) en_espera ON en_espera.topic = e.topic
+                WHERE e.published_at IS NULL AND e.failed_at IS NULL
+                  AND en_espera.topic IS NULL
+                  AND (e.next_attempt_at IS NULL OR e.next_attempt_at <= NOW())
+                ORDER BY e.id
+                LIMIT %s
+            """, (OUTBOX_BATCH_SIZE,))
+            rows = cursor.fetchall()
+            self._conn.rollback()  # no dejar el snapshot abierto mientras se publica
+            if not rows:
+                return 0
+
+            por_topic = OrderedDict()
+            for row in rows:
+                por_topic.setdefault(row["topic"], []).append(row)
+
+            futures = [self._executor.submit(self._publish_topic, eventos) for eventos in por_topic.values()]
+            publicados, fallidos = [], []
+            for future in futures:
+                ok, error = future.result()
+                publicados.extend(ok)
+                if error:
+                    fallidos.append(error)
+
+            if publicados:
+                placeholders = ", ".join(["%s"] * len(publicados))
+                cursor.execute(
+                    f"UPDATE eventos_publicados SET published_at = NOW(), last_error = NULL WHERE id IN ({placeholders})",
+                    tuple(publicados),
+                )
+            for row, mensaje in fallidos:
+                attempts = row["attempts"] + 1
+                if attempts >= OUTBOX_MAX_ATTEMPTS:
+                    cursor.execute(
+                        "UPDATE eventos_publicados SET attempts = %s, last_error = %s, failed_at = NOW() WHERE id = %s",
+                        (attempts, mensaje, row["id"]),
+                    )
+                    log.error("Evento %s descartado tras %s intentos: %s", row["id"], attempts, mensaje)
+                else:
+                    cursor.execute("""
+                        UPDATE eventos_publicados
+                        SET attempts = %s, last_error = %s, next_attempt_at = NOW() + INTERVAL %s SECOND
+                        WHERE id = %s
+                    """, (attempts, mensaje, _backoff_seconds(attempts), row["id"]))
+            self._conn.commit()
+            return len(publicados)
+        finally:
+            cursor.close()
+
+    def _publish_topic(self, eventos):
+        """Publica en orden los eventos de un topic; se corta en el primer fallo."""
+        publicados = []
+        for row in eventos:
+            try:
+                payload = loads(row["payload"])
+                response = self._publish(
+                    message_id=str(row["id"]),
+                    timestamp=_timestamp(row["created_at"]),
+                    topic=row["topic"],
+                    event_name=row["event_name"],
+                    payload=payload,
+                )
+                if response.status_code < 200 or response.status_code >= 300:
+                    return publicados, (row, f"HTTP {response.status_code}: {response.text[:500]}")
+            except Exception as e:
+                return publicados, (row, str(e)[:500])
+            publicados.append(row["id"])
+        return publicados, None
+
+
+dispatcher = OutboxDispatcher()
+
+
+def notify_dispatcher():
+    dispatcher.notify()
@@ -0,0 +1,93 @@
+import base64
+import json
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# ===========================
+# Paginación keyset + proyección de campos
+# ===========================
+# Los listados aceptan ?limit=&cursor= (keyset sobre `id`) y ?fields=a,b,c.
+# Si no se manda ni limit ni cursor se mantiene el comportamiento anterior
+# (lista completa), así los clientes viejos siguen funcionando.
+# El cursor de la página siguiente viaja en el header X-Next-Cursor.
+
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def parse_fields(fields: str | None, permitidos) -> list | None:
+    """
+    Convierte `fields=a,b` en lista de columnas validadas contra `permitidos`.
+    Devuelve None si no se pidió proyección. `id` se incluye siempre (lo usa el cursor).
+    """
+    if not fields:
+        return None
+    pedidos = [f.strip() for f in fields.split(",") if f.strip()]
+    invalidos = [f for f in pedidos if f not in permitidos]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos no permitidos en 'fields': {', '.join(invalidos)}")
+    if "id" not in pedidos:
+        pedidos.insert(0, "id")
+    return pedidos
+
+
+def filtro_ids(query: str, params: list, columna: str, ids) -> str:
+    """
+    Agrega `AND columna IN (...)` para un filtro de ids que se puede repetir
+    (?id_usuario=1&id_usuario=2): el worker resuelve varios ids en una sola llamada.
+    """
+    if not ids:
+        return query
+    if len(ids) > MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"Se permiten hasta {MAX_LIMIT} valores de '{columna}'")
+    params.extend(ids)
+    return query + f" AND {columna} IN ({', '.join(['%s'] * len(ids))})"
+
+
+def aplicar_keyset(query: str, params: list, cursor: str | None, limit: int | None, columna: str = "id") -> str:
+    """
+    Agrega el filtro/orden keyset a una query que ya termina en su WHERE.
+    Se pide una fila de más para saber si hay página siguiente.
+    """
+    if cursor is None and limit is None:
+        return query
+    if cursor is not None:
+        query += f" AND {columna} > %s"
+        params.append(decode_cursor(cursor))
+    query += f" ORDER BY {columna}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return query
+
+
+def armar_respuesta(rows: list, limit: int | None, response: Response, fields: list | None = None):
+    """
+    Recorta la fila extra, publica X-Next-Cursor y devuelve las filas.
+    Con proyección se devuelve un JSONResponse directo (no valida contra el response_model).
+    """
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["id"])
+
+    if fields is not None:
+        return JSONResponse(content=jsonable_encoder(rows), headers=headers)
+
+    response.headers.update(headers)
+    return rows
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import deque
+
+from mysql.connector.errors import PoolError
+
+from core.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_IDLE,
+    DB_POOL_IN_USE,
+    DB_POOL_WAITING,
+)
+
+
+class _PooledConnection:
+    """Conexión física + metadata que usa el pool para decidir si reciclarla."""
+
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones MySQL thread-safe.
+
+    - `size` conexiones se mantienen abiertas entre requests.
+    - Hasta `max_overflow` conexiones extra se abren bajo carga y se cierran al devolverse.
+    - Si no hay conexiones libres se espera hasta `timeout` segundos (PoolError si se vence).
+    - Al retirar una conexión se recicla si superó `recycle` segundos de vida y,
+      si `pre_ping` está activo, se verifica con un ping antes de entregarla.
+    - Al devolverla se hace rollback de cualquier transacción abierta para que el
+      siguiente request no herede estado (ni un snapshot viejo de REPEATABLE READ).
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0, recycle=3600, pre_ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._checked_out = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    # ---------------------------
+    # Estado (para métricas / tests)
+    # ---------------------------
+    @property
+    def checked_out(self):
+        return self._checked_out
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def _update_gauges(self):
+        DB_POOL_IN_USE.set(self._checked_out)
+        DB_POOL_IDLE.set(len(self._idle))
+        DB_POOL_WAITING.set(self._waiting)
+
+    # ---------------------------
+    # Checkout / checkin
+    # ---------------------------
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._checked_out + len(self._idle) < self.size + self.max_overflow:
+                    pooled = None
+                    break
+
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise PoolError(
+                        f"Timeout esperando una conexión libre del pool ({self.timeout}s, "
+                        f"size={self.size}, overflow={self.max_overflow})"
+                    )
+                self._waiting += 1
+                self._update_gauges()
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            # Reservamos el lugar antes de salir del lock: el connect/ping se hace afuera
+            self._checked_out += 1
+            self._update_gauges()
+
+        try:
+            pooled = self._ensure_usable(pooled)
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._update_gauges()
+                self._cond.notify()
+            raise
+
+        DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+        return pooled
+
+    def _ensure_usable(self, pooled):
+        if pooled is not None:
+            now = time.monotonic()
+            if self.recycle and now - pooled.created_at > self.recycle:
+                self._close_quietly(pooled)
+                pooled = None
+            elif self.pre_ping:
+                try:
+                    pooled.raw.ping(reconnect=False)
+                except Exception:
+                    self._close_quietly(pooled)
+                    pooled = None
+
+        if pooled is None:
+            pooled = _PooledConnection(self._connect())
+        return pooled
+
+    def release(self, pooled, discard=False):
+        if not discard:
+            try:
+                # Reset: no dejar transacciones abiertas entre requests
+                pooled.raw.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._checked_out -= 1
+            if discard or len(self._idle) >= self.size:
+                # Conexión rota o de overflow: se cierra
+                self._close_quietly(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            self._update_gauges()
+            self._cond.notify()
+
+    def dispose(self):
+        """Cierra todas las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        with self._cond:
+            while self._idle:
+                self._close_quietly(self._idle.pop())
+            self._update_gauges()
+
+    @staticmethod
+    def _close_quietly(pooled):
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
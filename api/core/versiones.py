@@ -0,0 +1,81 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+# ===========================
+# Versiones de recursos (ETag / Last-Modified)
+# ===========================
+# version_recurso (migrations/001) guarda un contador por recurso: una
+# colección ("rubros", "zonas", "habilidades") o una fila ("prestador:12"). Las
+# rutas que modifican llaman a incrementar_version dentro de la misma
+# transacción, así que el contador lo comparten todas las réplicas y no se
+# pierde al reiniciar.
+#
+# Para un GET se lee la versión de los recursos de los que depende la respuesta
+# (una consulta por PK), se arma el ETag y, si el cliente manda If-None-Match /
+# If-Modified-Since y coincide, se contesta 304 sin armar ni serializar el body.
+
+
+def incrementar_version(cursor, *recursos: str):
+    """Sube la versión de los recursos. Se llama antes del commit de la escritura."""
+    if not recursos:
+        return
+    cursor.execute(f"""
+        INSERT INTO version_recurso (recurso, version, actualizado)
+        VALUES {", ".join(["(%s, 1, UTC_TIMESTAMP(3))"] * len(recursos))}
+        ON DUPLICATE KEY UPDATE version = version + 1, actualizado = UTC_TIMESTAMP(3)
+    """, tuple(recursos))
+
+
+def leer_version(cursor, *recursos: str) -> dict:
+    """
+    Devuelve {"etag": ..., "modificado": ...} para la combinación de recursos.
+    Los que nunca se modificaron cuentan como versión 0. Es serializable, así
+    que puede guardarse en el cache junto con los datos.
+    """
+    cursor.execute(
+        f"SELECT recurso, version, actualizado FROM version_recurso WHERE recurso IN ({', '.join(['%s'] * len(recursos))})",
+        tuple(recursos),
+    )
+    filas = {row["recurso"]: row for row in cursor.fetchall()}
+    token = "|".join(f"{r}={filas[r]['version'] if r in filas else 0}" for r in recursos)
+    modificados = [row["actualizado"] for row in filas.values()]
+    return {
+        "etag": f'W/"{hashlib.blake2b(token.encode(), digest_size=8).hexdigest()}"',
+        "modificado": max(modificados).replace(tzinfo=timezone.utc).timestamp() if modificados else None,
+    }
+
+
+def _etags(valor: str):
+    return {etag.strip().removeprefix("W/") for etag in valor.split(",")}
+
+
+def responder_condicional(request: Request, response: Response, version: dict):
+    """
+    Pone ETag y Last-Modified en `response`. Si el pedido es condicional y el
+    cliente ya tiene esta versión devuelve la respuesta 304 (la ruta la retorna
+    tal cual); si no, None.
+    """
+    headers = {"ETag": version["etag"]}
+    if version["modificado"] is not None:
+        headers["Last-Modified"] = format_datetime(datetime.fromtimestamp(version["modificado"], timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = _etags(if_none_match)
+        if "*" in etags or version["etag"].removeprefix("W/") in etags:
+            return Response(status_code=304, headers=headers)
+        return None
+
+    # If-Modified-Since solo cuenta si no vino If-None-Match (RFC 9110)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and version["modificado"] is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        if int(version["modificado"]) <= desde:
+            return Response(status_code=304, headers=headers)
+    return None
@@ -3,7 +3,62 @@ from pydantic import BaseModel
 from prometheus_fastapi_instrumentator import Instrumentator
 from core.database import get_connection
 from routes import auth, prestadores, zonas, habilidades, rubros, pedidos, notificaciones,calificaciones, usuarios, admin, eventos
-from fastapi.middleware.cors import CORSMiddleware 
+from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from anyio import to_thread
+import logging
+import os
+from mysql.connector import Error
+from core.paginacion import NEXT_CURSOR_HEADER
+from core.outbox import OUTBOX_ENABLED, columnas_faltantes, dispatcher
+from core.clientes_http import close_clients
+from comun.logs import configure_logging, shutdown_logging
+from core.migraciones import MIGRATIONS_AUTO, aplicar_migraciones
+from core.compresion import CompressionMiddleware
+
+
+# Las rutas son sync: Starlette las corre en el pool de threads de anyio (40 por
+# defecto). Cada request ocupa un thread mientras espera a MySQL, así que la
+# concurrencia real la da este número (y el pool de conexiones: DB_POOL_SIZE +
+# DB_POOL_MAX_OVERFLOW). Vacío = default de anyio.
+API_THREADPOOL_SIZE = os.getenv("API_THREADPOOL_SIZE", "")
+
+
+# ===========================
+# Arranque / apagado (logging, threads de las rutas, migraciones, outbox de eventos y clientes HTTP)
+# ===========================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging("api")
+    if API_THREADPOOL_SIZE:
+        to_thread.current_default_thread_limiter().total_tokens = int(API_THREADPOOL_SIZE)
+    if MIGRATIONS_AUTO:
+        try:
+            with get_connection() as (cursor, conn):
+                aplicar_migraciones(cursor, conn)
+        except (Error, RuntimeError) as e:
+            # No frena el arranque; se pueden aplicar a mano con python -m core.migraciones
+            logging.getLogger(__name__).error("No se pudieron aplicar las migraciones: %s", e)
+    if OUTBOX_ENABLED:
+        # Las columnas las crea migrations/004; sin ellas el dispatcher no puede andar
+        try:
+            with get_connection() as (cursor, conn):
+                faltantes = columnas_faltantes(cursor)
+        except Error as e:
+            # Sin DB al arrancar el dispatcher se reconecta solo
+            faltantes = []
+            logging.getLogger(__name__).error("No se pudo verificar el outbox: %s", e)
+        if faltantes:
+            logging.getLogger(__name__).error(
+                "Outbox desactivado: a eventos_publicados le faltan %s (aplicar migraciones)", ", ".join(faltantes)
+            )
+        else:
+            dispatcher.start()
+    yield
+    if OUTBOX_ENABLED:
+        dispatcher.stop()
+    close_clients()
+    shutdown_logging()
 
 
 # ===========================
@@ -12,7 +67,8 @@ from fastapi.middleware.cors import CORSMiddleware
 app = FastAPI(
     title="API Desarrollo 2",
     description="Estas rutas solo son de prueba para comprobar el funcionamiento correcto de la base de datos y el CI/CD del repo backend de Github.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(auth.router)
@@ -41,8 +97,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
+# Compresión gzip/br/zstd negociada de las respuestas grandes (ver core/compresion.py)
+app.add_middleware(CompressionMiddleware)
+
 # ===========================
 # Prometheus Metrics
 # ===========================
@@ -0,0 +1,6 @@
+-- Contadores de versión para ETag / Last-Modified (ver core/versiones.py)
+CREATE TABLE IF NOT EXISTS version_recurso (
+  recurso VARCHAR(100) PRIMARY KEY,
+  version BIGINT UNSIGNED NOT NULL,
+  actualizado DATETIME(3) NOT NULL
+);
@@ -0,0 +1,16 @@
+-- Índices para las búsquedas que hace el worker en cada evento y para las
+-- validaciones de pedidos activos. Sin ellos cada una es un full scan.
+
+-- GET /prestadores?id_prestador=, /usuarios?id_usuario=, /admins?id_admin=
+-- (resolución de ids externos -> internos)
+CREATE INDEX idx_prestador_id_prestador ON prestador (id_prestador);
+CREATE INDEX idx_usuario_id_usuario ON usuario (id_usuario);
+CREATE INDEX idx_admin_id_admin ON admin (id_admin);
+CREATE INDEX idx_calificacion_id_calificacion ON calificacion (id_calificacion);
+
+-- GET /pedidos?id_pedido=&id_prestador=, alta idempotente en lote
+-- ((id_pedido, id_prestador) IN ...) y cancelación por solicitud (id_pedido)
+CREATE INDEX idx_pedido_pedido_prestador ON pedido (id_pedido, id_prestador);
+
+-- services/validaciones.py: COUNT de pedidos del prestador por estado
+CREATE INDEX idx_pedido_prestador_estado ON pedido (id_prestador, estado);
@@ -0,0 +1,8 @@
+-- Índices FULLTEXT para ?q= en GET /prestadores y GET /usuarios (core/busqueda.py).
+-- Las columnas tienen que coincidir con COLUMNAS_BUSQUEDA_*: MATCH() solo usa
+-- un índice que tenga exactamente esas columnas.
+--
+-- Parser por palabras (el default) con búsqueda por prefijo "palabra*". Las
+-- palabras de menos de innodb_ft_min_token_size (3) letras no se indexan.
+CREATE FULLTEXT INDEX ft_prestador_busqueda ON prestador (nombre, apellido, email, telefono, dni, ciudad);
+CREATE FULLTEXT INDEX ft_usuario_busqueda ON usuario (nombre, apellido, dni, telefono, ciudad_pri);
@@ -0,0 +1,29 @@
+-- Columnas del outbox (core/outbox.py) en eventos_publicados. Antes las agregaba
+-- ensure_outbox_schema en cada arranque; ahora al arrancar solo se verifica.
+--
+-- Los eventos que ya estaban en la tabla se publicaron con el mecanismo
+-- anterior: published_at se crea con un default centinela para que esas filas
+-- queden marcadas (y no las vuelva a mandar el dispatcher), y después se le
+-- saca el default. Los UPDATE solo tocan filas con el centinela, así que
+-- reintentar la migración (o correrla donde las columnas ya existían) no cambia
+-- eventos nuevos.
+ALTER TABLE eventos_publicados ADD COLUMN published_at DATETIME NULL DEFAULT '1000-01-01 00:00:00';
+ALTER TABLE eventos_publicados ALTER COLUMN published_at SET DEFAULT NULL;
+ALTER TABLE eventos_publicados ADD COLUMN attempts INT NOT NULL DEFAULT 0;
+ALTER TABLE eventos_publicados ADD COLUMN next_attempt_at DATETIME NULL;
+ALTER TABLE eventos_publicados ADD COLUMN last_error TEXT NULL;
+ALTER TABLE eventos_publicados ADD COLUMN failed_at DATETIME NULL;
+CREATE INDEX idx_eventos_publicados_pendientes ON eventos_publicados (published_at, id);
+
+-- Los que habían fallado con el mecanismo anterior (unpublished_events, si
+-- existe) quedan pendientes para el dispatcher
+SET @pendientes_viejos = IF(
+    (SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'unpublished_events') > 0,
+    'UPDATE eventos_publicados e INNER JOIN unpublished_events u ON u.message_id = CAST(e.id AS CHAR) SET e.published_at = NULL WHERE e.published_at = ''1000-01-01 00:00:00''',
+    'DO 0'
+);
+PREPARE pendientes_viejos FROM @pendientes_viejos;
+EXECUTE pendientes_viejos;
+DEALLOCATE PREPARE pendientes_viejos;
+
+UPDATE eventos_publicados SET published_at = created_at WHERE published_at = '1000-01-01 00:00:00';
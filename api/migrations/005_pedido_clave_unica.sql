@@ -0,0 +1,15 @@
+-- La idempotencia del alta de pedidos por (id_pedido, id_prestador) (ver
+-- comun/pedidos.crear_pedidos) pasa a estar garantizada por la DB: con el
+-- índice no único de 002, dos reintentos concurrentes podían insertar los dos.
+--
+-- Si ya hay duplicados el CREATE falla y la migración queda sin aplicar: hay que
+-- resolverlos a mano (dejar el de menor id, que es el que devuelve la API) y
+-- volver a correrla. Para listarlos:
+--   SELECT id_pedido, id_prestador, COUNT(*) FROM pedido
+--   WHERE id_pedido IS NOT NULL AND id_prestador IS NOT NULL
+--   GROUP BY id_pedido, id_prestador HAVING COUNT(*) > 1
+-- Las filas con id_pedido o id_prestador NULL no chocan entre sí.
+CREATE UNIQUE INDEX uq_pedido_pedido_prestador ON pedido (id_pedido, id_prestador);
+
+-- El único cubre las mismas búsquedas que el índice anterior
+DROP INDEX idx_pedido_pedido_prestador ON pedido;
@@ -0,0 +1,46 @@
+-- inbound_events es la cola de entrada del worker (la llena el webhook). Antes el
+-- worker le agregaba índices y columnas con ALTER en cada arranque; ahora al
+-- arrancar solo verifica que estén (worker.columnas_faltantes).
+--
+-- El webhook también crea la tabla al arrancar, sin estas columnas. Acá va con IF
+-- NOT EXISTS y la definición completa; los ALTER de abajo alcanzan a una tabla
+-- que ya existía (si la creó este CREATE fallan con "ya existe" y se saltean).
+CREATE TABLE IF NOT EXISTS inbound_events (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  message_id VARCHAR(128) NOT NULL UNIQUE,
+  subscription_id VARCHAR(128) NULL,
+  topic VARCHAR(200),
+  event_name VARCHAR(100),
+  payload JSON NOT NULL,
+  received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  processed_at TIMESTAMP NULL,
+  status ENUM('pending','processing','done','error') DEFAULT 'pending',
+  error_text TEXT NULL,
+  acked_at TIMESTAMP NULL,
+  ack_attempts INT NOT NULL DEFAULT 0,
+  claimed_at TIMESTAMP NULL,
+  INDEX idx_inbound_events_status (status, received_at, id),
+  INDEX idx_inbound_events_ack (acked_at, status)
+);
+
+-- Índice del poll (has_pending, claim_batch)
+CREATE INDEX idx_inbound_events_status ON inbound_events (status, received_at, id);
+
+-- ACKs pendientes (worker/acks.py). Los eventos ya procesados se confirmaron de a
+-- uno con el mecanismo anterior: acked_at se crea con un default centinela para
+-- marcar las filas existentes y después se le saca el default (como en 004). El
+-- UPDATE solo toca filas con el centinela, así que reintentar no cambia ACKs nuevos.
+ALTER TABLE inbound_events ADD COLUMN acked_at TIMESTAMP NULL DEFAULT '2000-01-01 00:00:00';
+ALTER TABLE inbound_events ALTER COLUMN acked_at SET DEFAULT NULL;
+ALTER TABLE inbound_events ADD COLUMN ack_attempts INT NOT NULL DEFAULT 0;
+CREATE INDEX idx_inbound_events_ack ON inbound_events (acked_at, status);
+
+UPDATE inbound_events
+SET acked_at = IF(status = 'done', COALESCE(processed_at, received_at), NULL)
+WHERE acked_at = '2000-01-01 00:00:00';
+
+-- Momento del claim (claim_batch), para que reclaim_stale devuelva a la cola los
+-- eventos que quedaron colgados en 'processing'. Los que ya estaban en
+-- 'processing' (sin claim registrado) se cuentan desde ahora.
+ALTER TABLE inbound_events ADD COLUMN claimed_at TIMESTAMP NULL;
+UPDATE inbound_events SET claimed_at = NOW() WHERE status = 'processing' AND claimed_at IS NULL;
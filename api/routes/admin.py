@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.admin import AdminCreate, AdminUpdate, AdminOut
 from core.security import require_admin_role, require_internal_or_admin
+from core.paginacion import MAX_LIMIT, filtro_ids, parse_fields, aplicar_keyset, armar_respuesta
 
 router = APIRouter(prefix="/admins", tags=["Admins"])
 
+CAMPOS_ADMIN = set(AdminOut.model_fields)
+
 # Listar todos con filtros opcionales (solo admin)
 @router.get("/", response_model=List[AdminOut])
 def list_admins(
+    response: Response,
     nombre: Optional[str] = None,
     apellido: Optional[str] = None,
     email: Optional[str] = None,
-    id_admin: Optional[int] = None,
+    id_admin: Optional[List[int]] = Query(None, description="Uno o varios (repetir el parámetro)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None,
     current_user: dict = Depends(require_internal_or_admin)
 ):
+    campos = parse_fields(fields, CAMPOS_ADMIN)
+    columnas = ", ".join(campos) if campos else "id, nombre, apellido, email, activo, id_admin, foto"
     try:
         with get_connection() as (cursor, conn):
-            query = "SELECT id, nombre, apellido, email, activo, id_admin, foto FROM admin WHERE 1=1"
+            query = f"SELECT {columnas} FROM admin WHERE 1=1"
             params = []
 
             if nombre:
@@ -30,12 +39,11 @@ def list_admins(
             if email:
                 query += " AND email LIKE %s"
                 params.append(f"%{email}%")
-            if id_admin:
-                query += " AND id_admin = %s"
-                params.append(id_admin)
+            query = filtro_ids(query, params, "id_admin", id_admin)
 
+            query = aplicar_keyset(query, params, cursor_pagina, limit)
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return armar_respuesta(cursor.fetchall(), limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,13 +1,12 @@
-import decimal
 from fastapi import APIRouter, HTTPException, status
 from schemas.prestador import PrestadorCreate, PrestadorOut
 from core.database import get_connection
 from core.security import verify_password, create_access_token, get_password_hash
 from fastapi import Body, Depends
 from schemas.auth import LoginRequest
-import json
-from datetime import datetime, timezone
-from core.events import publish_event
+from core.outbox import notify_dispatcher
+from services.eventos import emitir_evento
+from core import clientes_http
 from passlib.context import CryptContext
 import httpx
 
@@ -18,17 +17,6 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 # Usar puerto 8081 para pegarle a dev, o 8080 para prod
 EXTERNAL_LOGIN_URL = "http://dev.desarrollo2-usuarios.shop:8081/api/users/login"
 
-def _convert_to_json_safe(obj):
-    if isinstance(obj, dict):
-        return {k: _convert_to_json_safe(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_convert_to_json_safe(v) for v in obj]
-    if isinstance(obj, decimal.Decimal):
-        return float(obj)
-    if isinstance(obj, datetime):
-        return obj.replace(tzinfo=timezone.utc).isoformat()
-    return obj
-
 def _row_to_dict(cursor, row):
     if row is None:
         return None
@@ -46,43 +34,11 @@ def register(prestador: PrestadorCreate):
     row_dict.setdefault("activo", True) # Asumir True para el evento de alta
     row_dict.setdefault("foto", None)  # Asumir None
 
-    prestador_json = _convert_to_json_safe(row_dict)
-    payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
     with get_connection() as (cursor, conn):
         # Publicar evento de alta
-        topic = "prestador"
-        event_name = "alta"
-
-        cursor.execute(
-            "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-            (topic, event_name, payload_str)
-        )
+        emitir_evento(cursor, "prestador", "alta", row_dict)
         conn.commit()
-
-        # Usar el ID del evento como el ID del prestador para la respuesta
-        event_id = cursor.lastrowid
-
-        # Enviar evento al Core
-        cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-        event_row = cursor.fetchone()
-        
-        timestamp = None
-        if event_row:
-            created_at_value = event_row[0] if isinstance(event_row, tuple) else event_row.get('created_at')
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-
-        if not timestamp:
-            timestamp = datetime.now(timezone.utc).isoformat()
-
-        publish_event(
-            message_id=str(event_id),
-            timestamp=timestamp,
-            topic=topic,
-            event_name=event_name,
-            payload=prestador_json
-        )
+        notify_dispatcher()
 
         return row_dict
 
@@ -93,9 +49,8 @@ def login(credentials: LoginRequest = Body(...)):
     login_data = credentials.model_dump()
 
     try:
-        # Hacemos la llamada al servicio externo
-        with httpx.Client() as client:
-            response = client.post(EXTERNAL_LOGIN_URL, json=login_data)
+        # Hacemos la llamada al servicio externo (cliente compartido, reusa la conexión)
+        response = clientes_http.request("usuarios", "POST", EXTERNAL_LOGIN_URL, json=login_data)
         
         # Manejar la respuesta del servicio externo
         if response.status_code == 401:
@@ -1,24 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
+from comun.calificaciones import actualizar_calificacion, crear_calificacion
+from comun.errores import DatosInvalidos, NoEncontrado
 from schemas.calificacion import CalificacionCreate, CalificacionUpdate, CalificacionOut
 from core.security import  require_internal_or_admin, require_admin_or_prestador_role, require_internal_admin_or_prestador
+from core.paginacion import MAX_LIMIT, parse_fields, aplicar_keyset, armar_respuesta
 
 router = APIRouter(prefix="/calificaciones", tags=["Calificaciones"])
 
+CAMPOS_CALIFICACION = set(CalificacionOut.model_fields)
+
 
 # Listar calificaciones (con filtros opcionales)
 @router.get("/", response_model=List[CalificacionOut])
 def list_calificaciones(
+    response: Response,
     id_prestador: Optional[int] = None,
     id_usuario: Optional[int] = None,
     id_calificacion: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None,
     current_user: dict = Depends(require_internal_admin_or_prestador)
 ):
+    campos = parse_fields(fields, CAMPOS_CALIFICACION)
+    columnas = ", ".join(campos) if campos else "id, estrellas, descripcion, id_prestador, id_usuario"
     try:
         with get_connection() as (cursor, conn):
-            query = "SELECT id, estrellas, descripcion, id_prestador, id_usuario FROM calificacion WHERE 1=1"
+            query = f"SELECT {columnas} FROM calificacion WHERE 1=1"
             params = []
             if id_prestador is not None:
                 query += " AND id_prestador = %s"
@@ -29,8 +40,9 @@ def list_calificaciones(
             if id_calificacion is not None:
                 query += " AND id_calificacion = %s"
                 params.append(id_calificacion)
+            query = aplicar_keyset(query, params, cursor_pagina, limit)
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return armar_respuesta(cursor.fetchall(), limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -52,38 +64,16 @@ def get_calificacion(calificacion_id: int, current_user: dict = Depends(require_
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Crear una calificación
+# Crear una calificación (comun.calificaciones, igual que el worker)
 @router.post("/", response_model=CalificacionOut)
 def create_calificacion(calificacion: CalificacionCreate, current_user: dict = Depends(require_internal_or_admin)):
     try:
         with get_connection() as (cursor, conn):
-            # Validar existencia de prestador
-            cursor.execute("SELECT id FROM prestador WHERE id = %s", (calificacion.id_prestador,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Prestador no encontrado")
-
-            # Validar existencia de usuario
-            cursor.execute("SELECT id FROM usuario WHERE id = %s", (calificacion.id_usuario,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-            query = """INSERT INTO calificacion (estrellas, descripcion, id_prestador, id_usuario, id_calificacion)
-                       VALUES (%s, %s, %s, %s, %s)"""
-            values = (
-                calificacion.estrellas,
-                calificacion.descripcion,
-                calificacion.id_prestador,
-                calificacion.id_usuario,
-                calificacion.id_calificacion
-            )
-            cursor.execute(query, values)
+            nueva = crear_calificacion(cursor, calificacion.model_dump())
             conn.commit()
-            new_id = cursor.lastrowid
-            cursor.execute(
-                "SELECT id, estrellas, descripcion, id_prestador, id_usuario, id_calificacion FROM calificacion WHERE id = %s",
-                (new_id,),
-            )
-            return cursor.fetchone()
+            return nueva
+    except NoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -93,32 +83,13 @@ def create_calificacion(calificacion: CalificacionCreate, current_user: dict = D
 def update_calificacion(calificacion_id: int, calificacion: CalificacionUpdate, current_user: dict = Depends(require_internal_admin_or_prestador)):
     try:
         with get_connection() as (cursor, conn):
-            fields = []
-            values = []
-            cursor.execute("SELECT id FROM calificacion WHERE id = %s", (calificacion_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Calificación no encontrada")
-
-            for key, value in calificacion.dict(exclude_unset=True).items():
-                fields.append(f"{key}=%s")
-                values.append(value)
-
-            if not fields:
-                raise HTTPException(status_code=400, detail="No se enviaron campos válidos para actualizar")
-
-            values.append(calificacion_id)
-            query = f"UPDATE calificacion SET {', '.join(fields)} WHERE id=%s"
-            cursor.execute(query, tuple(values))
+            actualizada = actualizar_calificacion(cursor, calificacion_id, calificacion.model_dump(exclude_unset=True))
             conn.commit()
-
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Calificación no encontrada")
-
-            cursor.execute(
-                "SELECT id, estrellas, descripcion, id_prestador, id_usuario, id_calificacion FROM calificacion WHERE id=%s",
-                (calificacion_id,),
-            )
-            return cursor.fetchone()
+            return actualizada
+    except NoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DatosInvalidos as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,17 +3,26 @@ from typing import List
 from mysql.connector import Error
 from core.database import get_connection
 from core.security import require_internal_or_admin
-from core.events import reprocess_events
+from core.outbox import notify_dispatcher
+from comun.serializacion import loads
 from datetime import datetime
-import json
 
 router = APIRouter(prefix="/eventos", tags=["Eventos"])
 
-@router.get("/", response_model=List[dict], summary="Listar eventos publicados")
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+@router.get("/", response_model=List[dict], summary="Listar eventos no publicados")
 def list_unpublished_events(current_user: dict = Depends(require_internal_or_admin)):
+    # Eventos del outbox que fallaron al menos una vez (en reintento o descartados)
     try:
         with get_connection() as (cursor, conn):
-            cursor.execute("SELECT id, topic, event_name, payload, failed_at FROM unpublished_events ORDER BY failed_at DESC")
+            cursor.execute("""
+                SELECT id, topic, event_name, payload, attempts, last_error, next_attempt_at, failed_at
+                FROM eventos_publicados
+                WHERE published_at IS NULL AND (attempts > 0 OR failed_at IS NOT NULL)
+                ORDER BY id DESC
+            """)
             rows = cursor.fetchall()
             events = []
             for row in rows:
@@ -21,18 +30,30 @@ def list_unpublished_events(current_user: dict = Depends(require_internal_or_adm
                     "id": row["id"],
                     "topic": row["topic"],
                     "event_name": row["event_name"],
-                    "payload": json.loads(row["payload"]),
-                    "failed_at": row["failed_at"].isoformat() if isinstance(row["failed_at"], datetime) else row["failed_at"]
+                    "payload": loads(row["payload"]),
+                    "attempts": row["attempts"],
+                    "last_error": row["last_error"],
+                    "next_attempt_at": _isoformat(row["next_attempt_at"]),
+                    "failed_at": _isoformat(row["failed_at"])
                 }
                 events.append(event)
             return events
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/", summary="Reprocesar eventos no procesados")
+@router.post("/", summary="Reprocesar eventos no publicados")
 def reprocess_unpublished_events(current_user: dict = Depends(require_internal_or_admin)):
+    # Los eventos descartados vuelven a la cola del outbox con los intentos en cero
     try:
-        reprocess_events()
-        return {"message": "Reprocesamiento de eventos no procesados iniciado."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        with get_connection() as (cursor, conn):
+            cursor.execute("""
+                UPDATE eventos_publicados
+                SET failed_at = NULL, attempts = 0, next_attempt_at = NULL
+                WHERE published_at IS NULL AND (failed_at IS NOT NULL OR attempts > 0)
+            """)
+            reencolados = cursor.rowcount
+            conn.commit()
+        notify_dispatcher()
+        return {"message": f"Reprocesamiento de eventos no procesados iniciado ({reencolados} eventos)."}
+    except Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.habilidad import HabilidadCreate, HabilidadUpdate, HabilidadOut
 from core.security import require_admin_role 
-import json
-from datetime import datetime, timezone
-from core.events import publish_event
+from core.outbox import notify_dispatcher
+from core.cache import catalogo
+from core.versiones import incrementar_version, leer_version, responder_condicional
+from services.eventos import emitir_evento
 
 router = APIRouter(prefix="/habilidades", tags=["Habilidades"])
 @router.post("/", summary="Crear habilidad")
@@ -18,7 +19,6 @@ def create_habilidad(habilidad: HabilidadCreate):
                 "INSERT INTO habilidad (nombre, descripcion, id_rubro) VALUES (%s, %s, %s)",
                 (habilidad.nombre, habilidad.descripcion, habilidad.id_rubro)
             )
-            conn.commit()
             habilidad_id = cursor.lastrowid
 
             habilidad_creada = {
@@ -30,28 +30,11 @@ def create_habilidad(habilidad: HabilidadCreate):
             }
 
             # Registrar el evento localmente
-            topic = "habilidad"
-            event_name = "alta"
-            payload_str = json.dumps(habilidad_creada, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "habilidad", "alta", habilidad_creada)
+            incrementar_version(cursor, "habilidades")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            # Obtener timestamp ISO UTC
-            timestamp = datetime.now(timezone.utc).isoformat()
-
-            # Publicar al Core Hub
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=habilidad_creada,
-            )
+            catalogo.invalidate("habilidades")
+            notify_dispatcher()
 
             return habilidad_creada
 
@@ -60,9 +43,10 @@ def create_habilidad(habilidad: HabilidadCreate):
 
 # Listar habilidades
 @router.get("/", response_model=List[HabilidadOut], summary="Listar habilidades")
-def list_habilidades(nombre: str = None, id_rubro: int = None, activo: bool = None):
-    try:
+def list_habilidades(request: Request, response: Response, nombre: str = None, id_rubro: int = None, activo: bool = None):
+    def cargar():
         with get_connection() as (cursor, conn):
+            version = leer_version(cursor, "habilidades")
             query = "SELECT id, nombre, descripcion, id_rubro, activo FROM habilidad WHERE 1=1"
             params = []
             if nombre:
@@ -76,21 +60,30 @@ def list_habilidades(nombre: str = None, id_rubro: int = None, activo: bool = No
                 params.append(activo)
 
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return {"version": version, "datos": cursor.fetchall()}
+
+    try:
+        entrada = catalogo.get_or_load("habilidades", f"lista:{nombre}:{id_rubro}:{activo}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 @router.get("/{habilidad_id}", response_model=HabilidadOut, summary="Obtener habilidad por ID")
-def get_habilidad(habilidad_id: int):
-    try:
+def get_habilidad(request: Request, response: Response, habilidad_id: int):
+    def cargar():
         with get_connection() as (cursor, conn):
+            version = leer_version(cursor, "habilidades")
             cursor.execute("SELECT id, nombre, descripcion, id_rubro, activo FROM habilidad WHERE id = %s", (habilidad_id,))
             result = cursor.fetchone()
             if not result:
                 raise HTTPException(status_code=404, detail="Habilidad no encontrada")
-            return result
+            return {"version": version, "datos": result}
+
+    try:
+        entrada = catalogo.get_or_load("habilidades", f"id:{habilidad_id}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 
 # Actualizar habilidad (PATCH)
@@ -118,7 +111,6 @@ def update_habilidad(habilidad_id: int, habilidad: HabilidadUpdate, current_user
             values.append(habilidad_id)
 
             cursor.execute(query, tuple(values))
-            conn.commit()
 
             if cursor.rowcount == 0:
                 # Si no hubo filas afectadas, puede ser que el registro no exista
@@ -130,32 +122,11 @@ def update_habilidad(habilidad_id: int, habilidad: HabilidadUpdate, current_user
             updated = cursor.fetchone()
 
             # Publicar evento de modificación
-            topic = "habilidad"
-            event_name = "modificacion"
-            payload = json.dumps(updated, ensure_ascii=False)
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            emitir_evento(cursor, "habilidad", "modificacion", updated)
+            incrementar_version(cursor, "habilidades")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=updated,
-            )
+            catalogo.invalidate("habilidades")
+            notify_dispatcher()
 
             return updated
     except Error as e:
@@ -170,13 +141,11 @@ def delete_habilidad(habilidad_id: int, current_user: dict = Depends(require_adm
             # Intentar baja lógica: actualizar campo 'activo' a False
             try:
                 cursor.execute("UPDATE habilidad SET activo = %s WHERE id = %s", (False, habilidad_id))
-                conn.commit()
             except Error as e:
                 # Si la columna 'activo' no existe, fallback a borrado físico
                 msg = str(e).lower()
                 if "unknown column" in msg or "columna" in msg:
                     cursor.execute("DELETE FROM habilidad WHERE id = %s", (habilidad_id,))
-                    conn.commit()
                 else:
                     raise
 
@@ -192,32 +161,11 @@ def delete_habilidad(habilidad_id: int, current_user: dict = Depends(require_adm
             registro = cursor.fetchone()
 
             # Publicar evento de baja
-            topic = "habilidad"
-            event_name = "baja"
-            payload = json.dumps(registro if registro else {"id": habilidad_id}, ensure_ascii=False)
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            emitir_evento(cursor, "habilidad", "baja", registro if registro else {"id": habilidad_id})
+            incrementar_version(cursor, "habilidades")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=registro if registro else {"id": habilidad_id},
-            )
+            catalogo.invalidate("habilidades")
+            notify_dispatcher()
 
             return {"detail": "Habilidad marcada como inactiva"}
     except Error as e:
@@ -230,7 +178,6 @@ def reactivate_habilidad(habilidad_id: int, current_user: dict = Depends(require
         with get_connection() as (cursor, conn):
             # Intentar activar la habilidad
             cursor.execute("UPDATE habilidad SET activo = %s WHERE id = %s", (True, habilidad_id))
-            conn.commit()
 
             if cursor.rowcount == 0:
                 # Verificar existencia
@@ -242,32 +189,9 @@ def reactivate_habilidad(habilidad_id: int, current_user: dict = Depends(require
             registro = cursor.fetchone()
 
             # Publicar evento de reactivación
-            topic = "catalogue.habilidad.reactivacion"
-            event_name = "reactivacion_habilidad"
-            payload = json.dumps(registro if registro else {"id": habilidad_id}, ensure_ascii=False)
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            emitir_evento(cursor, "catalogue.habilidad.reactivacion", "reactivacion_habilidad", registro if registro else {"id": habilidad_id})
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                messageId=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=registro if registro else {"id": habilidad_id},
-            )
+            notify_dispatcher()
 
             return {"detail": "Habilidad reactivada"}
     except Error as e:
@@ -1,21 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.notificacion import NotificacionCreate, NotificacionUpdate, NotificacionOut
 from core.security import get_current_user, get_current_user_swagger
+from core.paginacion import MAX_LIMIT, parse_fields, aplicar_keyset, armar_respuesta
 
 router = APIRouter(prefix="/notificaciones", tags=["Notificaciones"])
 
+CAMPOS_NOTIFICACION = set(NotificacionOut.model_fields)
+
 # Listar todas las notificaciones
 @router.get("/", response_model=List[NotificacionOut])
-def list_notificaciones(current_user: dict = Depends(get_current_user_swagger)):
+def list_notificaciones(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user_swagger)
+):
+    campos = parse_fields(fields, CAMPOS_NOTIFICACION)
+    columnas = ", ".join(campos) if campos else "*"
     try:
         with get_connection() as (cursor, conn):
-            
-            cursor.execute("SELECT * FROM notificacion")
+            params = []
+            query = aplicar_keyset(f"SELECT {columnas} FROM notificacion WHERE 1=1", params, cursor_pagina, limit)
+            cursor.execute(query, tuple(params))
             notificaciones = cursor.fetchall()
-            return notificaciones
+            return armar_respuesta(notificaciones, limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,17 +1,25 @@
-from datetime import datetime, timezone
-from decimal import Decimal
-import json
-from core.events import publish_event
-from fastapi import APIRouter, HTTPException, Depends, status
+from core.outbox import notify_dispatcher
+from services.eventos import emitir_eventos
+from comun.pedidos import (
+    NoEncontrado, PEDIDO_EVENTOS, actualizar_pedido, cancelar_pedido, cancelar_pedidos_de_solicitud, crear_pedidos,
+)
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.pedido import PedidoCreate, PedidoUpdate, PedidoOut
 from core.security import require_admin_or_prestador_role, require_internal_or_admin, require_internal_admin_or_prestador
 from schemas.pedido import EstadoPedido
+from core.paginacion import MAX_LIMIT, parse_fields, aplicar_keyset, armar_respuesta
+from core.exportacion import ndjson_response
 
 router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
+# Máximo de pedidos por llamada a POST /pedidos/bulk
+MAX_PEDIDOS_BULK = 500
+
+CAMPOS_PEDIDO = set(PedidoOut.model_fields)
+
 # Crear pedido
 @router.post("/", response_model=PedidoOut, summary="Crear pedido")
 def create_pedido(pedido: PedidoCreate, current_user: dict = Depends(require_internal_or_admin)):
@@ -51,9 +59,44 @@ def create_pedido(pedido: PedidoCreate, current_user: dict = Depends(require_int
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Crear varios pedidos en una sola transacción
+@router.post("/bulk", response_model=List[PedidoOut], status_code=201, summary="Crear pedidos en lote",
+             description="Crea todos los pedidos con un único INSERT. Es idempotente por (id_pedido, id_prestador): "
+                         "los que ya existen se devuelven sin duplicarlos. Responde una fila por pedido, en el mismo orden.")
+def create_pedidos_bulk(pedidos: List[PedidoCreate], current_user: dict = Depends(require_internal_or_admin)):
+    if not pedidos:
+        raise HTTPException(status_code=400, detail="No se enviaron pedidos")
+    if len(pedidos) > MAX_PEDIDOS_BULK:
+        raise HTTPException(status_code=400, detail=f"Se permiten hasta {MAX_PEDIDOS_BULK} pedidos por llamada")
+    try:
+        with get_connection() as (cursor, conn):
+            filas = crear_pedidos(cursor, [p.model_dump() for p in pedidos])
+            conn.commit()
+            return filas
+    except NoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Cancelar todos los pedidos de una solicitud
+@router.post("/solicitud/{id_pedido}/cancelar", summary="Cancelar pedidos de una solicitud",
+             description="Pasa a 'cancelado' todos los pedidos con ese id_pedido (externo) en un solo UPDATE "
+                         "y publica un evento pedido_cancelado por cada uno. Los ya cancelados se ignoran.")
+def cancelar_pedidos_solicitud(id_pedido: int, current_user: dict = Depends(require_internal_admin_or_prestador)):
+    try:
+        with get_connection() as (cursor, conn):
+            cancelados = cancelar_pedidos_de_solicitud(cursor, id_pedido, emitir=emitir_eventos)
+            conn.commit()
+            if cancelados:
+                notify_dispatcher()
+            return {"detail": f"{len(cancelados)} pedidos cancelados", "ids": cancelados}
+    except Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Listar pedidos (con filtros opcionales)
 @router.get("/", response_model=List[PedidoOut], summary="Listar pedidos")
 def list_pedidos(
+    response: Response,
     id_usuario: Optional[int] = None,
     id_prestador: Optional[int] = None,
     estado: Optional[str] = None,
@@ -61,12 +104,17 @@ def list_pedidos(
     direccion: Optional[str] = None,
     es_critico: Optional[bool] = None,
     id_pedido: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None,
     current_user: dict = Depends(require_internal_admin_or_prestador)
 ):
+    campos = parse_fields(fields, CAMPOS_PEDIDO)
+    columnas = ", ".join(campos) if campos else "*"
     try:
         with get_connection() as (cursor, conn):
             
-            query = "SELECT * FROM pedido WHERE 1=1"
+            query = f"SELECT {columnas} FROM pedido WHERE 1=1"
             params = []
             if id_usuario:
                 query += " AND id_usuario = %s"
@@ -89,11 +137,20 @@ def list_pedidos(
             if id_pedido:
                 query += " AND id_pedido = %s"
                 params.append(id_pedido)
+            query = aplicar_keyset(query, params, cursor_pagina, limit)
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return armar_respuesta(cursor.fetchall(), limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Exportar todos los pedidos como NDJSON en streaming
+@router.get("/export",
+            summary="Exportar pedidos (NDJSON)",
+            description="Devuelve todos los pedidos, uno por línea (application/x-ndjson), sin armar la lista completa en memoria.")
+def export_pedidos(current_user: dict = Depends(require_internal_or_admin)):
+    columnas = ", ".join(sorted(CAMPOS_PEDIDO))
+    return ndjson_response(f"SELECT {columnas} FROM pedido ORDER BY id", (), PedidoOut, filename="pedidos.ndjson")
+
 # Obtener pedido por ID
 @router.get("/{pedido_id}", response_model=PedidoOut, summary="Obtener pedido por ID")
 def get_pedido(pedido_id: int, current_user: dict = Depends(require_admin_or_prestador_role)):
@@ -112,95 +169,15 @@ def get_pedido(pedido_id: int, current_user: dict = Depends(require_admin_or_pre
 def update_pedido(pedido_id: int, pedido: PedidoUpdate, current_user: dict = Depends(require_internal_admin_or_prestador)):
     try:
         with get_connection() as (cursor, conn):
-            fields, values = [], []
-            pedido_data = pedido.model_dump(exclude_unset=True)
-            for key, value in pedido.dict(exclude_unset=True).items():
-                fields.append(f"{key}=%s")
-                values.append(value)
-            fields.append("fecha_ultima_actualizacion=NOW()")
-            values.append(pedido_id)
-
-            if not fields:
-                raise HTTPException(status_code=400, detail="No se enviaron datos para actualizar")
-
-            query = f"UPDATE pedido SET {', '.join(fields)} WHERE id = %s"
-            cursor.execute(query, tuple(values))
-            conn.commit()
-
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Pedido no encontrado")
-
-            query_select = """
-                SELECT 
-                    p.estado, p.descripcion, p.tarifa, p.fecha_creacion, p.fecha_ultima_actualizacion, p.fecha, p.id_habilidad, p.es_critico, p.direccion, p.id_pedido,
-                    u.id_usuario AS id_usuario,
-                    pr.id_prestador AS id_prestador
-                FROM 
-                    pedido p
-                INNER JOIN 
-                    usuario u ON p.id_usuario = u.id
-                INNER JOIN 
-                    prestador pr ON p.id_prestador = pr.id
-                WHERE 
-                    p.id = %s
-                """
-            cursor.execute(query_select, (pedido_id,))
-            pedido_actualizado = cursor.fetchone()
-            
-            # --- Detectar tipo de evento según el nuevo estado ---
-            estado = pedido_data.get("estado")
-            if estado == "aprobado_por_prestador":
-                topic = "pedido"
-                event_name = "cotizacion_enviada"
-            elif estado == "finalizado":
-                topic = "pedido"
-                event_name = "pedido_finalizado"
-            elif estado == "cancelado":
-                topic = "pedido"
-                event_name = "pedido_cancelado"
-            else:
-                return pedido_actualizado
-                # no publicamos evento si no aplica
-            
-            payload_dict = pedido_actualizado.copy()
-
-            # --- Publicar evento ---
-            pedido_json = convert_to_json_safe(payload_dict)
-            payload = json.dumps(pedido_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            cambios = pedido.model_dump(exclude_unset=True)
+            # Si el estado nuevo tiene evento (cotizacion_enviada, pedido_finalizado, pedido_cancelado) se publica
+            pedido_actualizado = actualizar_pedido(cursor, pedido_id, cambios, emitir=emitir_eventos)
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-
-            # Manejar si el cursor devuelve tupla o dict
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            # Convertir a datetime ISO-8601 UTC
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            # Para evitar el loop infinito
-            #if payload.get("source") == "catalogue": # ver como modificarlo
-            publish_event( 
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=pedido_json
-            )
-
+            if cambios.get("estado") in PEDIDO_EVENTOS:
+                notify_dispatcher()
             return pedido_actualizado
+    except NoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -209,90 +186,12 @@ def update_pedido(pedido_id: int, pedido: PedidoUpdate, current_user: dict = Dep
 def delete_pedido(pedido_id: int, current_user: dict = Depends(require_internal_admin_or_prestador)):
     try:
         with get_connection() as (cursor, conn):
-            # Obtener pedido original
-            cursor.execute("SELECT * FROM pedido WHERE id = %s", (pedido_id,))
-            pedido = cursor.fetchone()
-            if not pedido:
-                raise HTTPException(status_code=404, detail="Pedido no encontrado")
-            
-            # Actualizar estado a cancelado
-            cursor.execute(
-                "UPDATE pedido SET estado = %s, fecha_ultima_actualizacion = NOW() WHERE id = %s",
-                ("cancelado", pedido_id)
-            )
+            # Pasa a cancelado y registra pedido_cancelado en el outbox
+            cancelar_pedido(cursor, pedido_id, emitir=emitir_eventos)
             conn.commit()
-            
-            # Obtener el pedido actualizado
-            query_select = """
-                SELECT 
-                    p.estado, p.descripcion, p.tarifa, p.fecha_creacion, p.fecha_ultima_actualizacion, p.fecha, p.id_habilidad, p.es_critico, p.direccion, p.id_pedido,
-                    u.id_usuario AS id_usuario,
-                    pr.id_prestador AS id_prestador
-                FROM 
-                    pedido p
-                INNER JOIN 
-                    usuario u ON p.id_usuario = u.id
-                INNER JOIN 
-                    prestador pr ON p.id_prestador = pr.id
-                WHERE 
-                    p.id = %s
-                """
-            cursor.execute(query_select, (pedido_id,))
-            pedido_actualizado = cursor.fetchone()
-            
-            # Datos del evento
-            topic = "pedido"
-            event_name = "pedido_cancelado"
-
-            pedido_json_safe = convert_to_json_safe(pedido_actualizado)
-            payload = json.dumps(pedido_json_safe, ensure_ascii=False)
-
-            # Insertar evento en tabla local
-            insert_event_query = """
-                INSERT INTO eventos_publicados (topic, event_name, payload)
-                VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_event_query, (topic, event_name, payload))
-            conn.commit()
-
-            # Obtener ID y fecha del evento
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-
-            # Manejar si el cursor devuelve tupla o dict
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            # Convertir a datetime ISO-8601 UTC
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-            
-            # Publicar evento en CoreHub
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=pedido_json_safe  # usar el que ya es JSON-safe
-            )
-            
+            notify_dispatcher()
             return {"detail": "Pedido cancelado correctamente"}
+    except NoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-def convert_to_json_safe(obj):
-    if isinstance(obj, dict):
-        return {k: convert_to_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_safe(i) for i in obj]
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    else:
-        return obj
\ No newline at end of file
@@ -1,37 +1,36 @@
 # routes/prestadores.py
-from fastapi import APIRouter, HTTPException, Query, Depends, Body
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Request, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.prestador import PrestadorCreate, PrestadorUpdate, PrestadorOut
 from core.security import require_admin_role, require_prestador_role, require_admin_or_prestador_role, require_internal_or_admin, require_internal_admin_or_prestador
-from decimal import Decimal
-import json
-from datetime import datetime, timezone
-from core.events import publish_event
+from core.outbox import notify_dispatcher
+from services.eventos import emitir_evento
 from services.validaciones import chequear_pedidos_activos_por_habilidad, chequear_pedidos_activos_por_zona
+from services.hidratacion import hidratar_prestadores, obtener_prestador_completo
+from core.paginacion import MAX_LIMIT, filtro_ids, parse_fields, aplicar_keyset, armar_respuesta
+from core.busqueda import COLUMNAS_BUSQUEDA_PRESTADOR, aplicar_busqueda
+from core.exportacion import ndjson_response
+from core.versiones import incrementar_version, leer_version, responder_condicional
 import logging as logger
 
 logger = logger.getLogger(__name__)
 
 router = APIRouter(prefix="/prestadores", tags=["Prestadores"])
 
-def convert_to_json_safe(obj):
-    if isinstance(obj, dict):
-        return {k: convert_to_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_safe(v) for v in obj]
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    return obj
+# Campos que se pueden pedir con ?fields= (zonas/habilidades no son columnas: se hidratan aparte)
+CAMPOS_PRESTADOR = set(PrestadorOut.model_fields)
+CAMPOS_HIDRATADOS = {"zonas", "habilidades"}
 
 # Listar todos con filtros opcionales
 @router.get("/", response_model=List[PrestadorOut],
             summary="Listar prestadores",
-            description="Obtiene una lista de prestadores filtrando opcionalmente por nombre, apellido, email, teléfono, dirección o zona mediante parámetro.")
+            description="Obtiene una lista de prestadores filtrando opcionalmente por nombre, apellido, email, teléfono, dirección o zona mediante parámetro. "
+                        "Con `limit`/`cursor` pagina por id (el cursor siguiente viene en el header X-Next-Cursor) y con `fields` devuelve solo esas columnas. "
+                        "`q` busca texto libre (por prefijo) en nombre, apellido, email, teléfono, DNI y ciudad y ordena por relevancia; no se combina con `cursor`.")
 def list_prestadores(
+    response: Response,
     nombre: Optional[str] = None,
     apellido: Optional[str] = None,
     email: Optional[str] = None,
@@ -45,11 +44,23 @@ def list_prestadores(
     id_zona: Optional[int] = None,
     dni: Optional[str] = None,
     activo: Optional[bool] = None,
-    id_prestador: Optional[int] = None
+    id_prestador: Optional[List[int]] = Query(None, description="Uno o varios (repetir el parámetro)"),
+    q: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None
 ):
+    campos = parse_fields(fields, CAMPOS_PRESTADOR)
+    if campos is None:
+        columnas = "*"
+        hidratar = True
+    else:
+        columnas = ", ".join(c for c in campos if c not in CAMPOS_HIDRATADOS)
+        hidratar = bool(CAMPOS_HIDRATADOS & set(campos))
+
     try:        
         with get_connection() as (cursor, conn):
-            query = "SELECT * FROM prestador WHERE 1 = 1"
+            query = f"SELECT {columnas} FROM prestador WHERE 1 = 1"
             params = []
 
             if nombre:
@@ -91,67 +102,51 @@ def list_prestadores(
             if departamento:
                 query += " AND departamento LIKE %s"
                 params.append(f"%{departamento}%")
-            if id_prestador:
-                query += " AND id_prestador = %s"
-                params.append(id_prestador)
+            query = filtro_ids(query, params, "id_prestador", id_prestador)
                 
 
+            if q:
+                query = aplicar_busqueda(query, params, COLUMNAS_BUSQUEDA_PRESTADOR, q, cursor_pagina, limit)
+            else:
+                query = aplicar_keyset(query, params, cursor_pagina, limit)
             cursor.execute(query, tuple(params))
             prestadores = cursor.fetchall()
 
-            # Para cada prestador, obtener sus zonas y habilidades (con nombre de rubro)
-            for prestador in prestadores:
-                # Zonas
-                cursor.execute("""
-                    SELECT z.id, z.nombre
-                    FROM zona z
-                    INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                    WHERE pz.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["zonas"] = cursor.fetchall()
-                # Habilidades con nombre de rubro
-                cursor.execute("""
-                    SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                    FROM habilidad h
-                    INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                    INNER JOIN rubro r ON h.id_rubro = r.id
-                    WHERE ph.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["habilidades"] = cursor.fetchall()
-            return prestadores
+            # Zonas y habilidades de todos los prestadores en 2 consultas
+            # (la fila extra que solo indica si hay otra página no se hidrata)
+            if hidratar:
+                hidratar_prestadores(prestadores[:limit], cursor)
+            if campos is not None:
+                prestadores = [{k: p.get(k) for k in campos} for p in prestadores]
+            return armar_respuesta(prestadores, limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Exportar todos los prestadores (con zonas y habilidades) como NDJSON en streaming
+@router.get("/export",
+            summary="Exportar prestadores (NDJSON)",
+            description="Devuelve todos los prestadores, uno por línea (application/x-ndjson), sin armar la lista completa en memoria.")
+def export_prestadores(current_user: dict = Depends(require_internal_or_admin)):
+    columnas = ", ".join(sorted(CAMPOS_PRESTADOR - CAMPOS_HIDRATADOS))
+    return ndjson_response(
+        f"SELECT {columnas} FROM prestador ORDER BY id", (),
+        PrestadorOut, hidratar=hidratar_prestadores, filename="prestadores.ndjson"
+    )
+
 # Obtener un prestador por ID
 @router.get("/{prestador_id}", response_model=PrestadorOut)
-def get_prestador(prestador_id: int, current_user: dict = Depends(require_admin_or_prestador_role)):
+def get_prestador(request: Request, response: Response, prestador_id: int, current_user: dict = Depends(require_admin_or_prestador_role)):
     try:
         with get_connection() as (cursor, conn):
-            cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
-            result = cursor.fetchone()
+            # La respuesta incluye nombres de zonas, habilidades y rubros: su ETag depende de las cuatro versiones
+            version = leer_version(cursor, f"prestador:{prestador_id}", "zonas", "habilidades", "rubros")
+            no_modificado = responder_condicional(request, response, version)
+            if no_modificado:
+                return no_modificado
+
+            result = obtener_prestador_completo(prestador_id, cursor)
             if not result:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
-            
-            # Obtener zonas del prestador
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            zonas = cursor.fetchall()
-            result["zonas"] = zonas
-            
-            # Obtener habilidades del prestador con nombre de rubro
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            habilidades = cursor.fetchall()
-            result["habilidades"] = habilidades
 
             return result
     except Error as e:
@@ -209,7 +204,6 @@ def update_prestador(prestador_id: int, prestador: PrestadorUpdate, current_user
             values.append(prestador_id)
             query = f"UPDATE prestador SET {', '.join(fields)} WHERE id=%s"
             cursor.execute(query, tuple(values))
-            conn.commit()
 
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
@@ -217,27 +211,10 @@ def update_prestador(prestador_id: int, prestador: PrestadorUpdate, current_user
             cursor.execute("SELECT * FROM prestador WHERE id=%s", (prestador_id,))
             result = cursor.fetchone()
             
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            result["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            result["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([result], cursor)
 
             # --- Publicar evento de modificación ---
-            topic = "prestador"
-            event_name = "modificacion"            
-            prestador_json = convert_to_json_safe(result)
+            prestador_json = dict(result)
             
             # Si no se envió contrasena en el PATCH, no incluir password en el evento
             original_data = prestador.model_dump(exclude_unset=True)
@@ -245,34 +222,10 @@ def update_prestador(prestador_id: int, prestador: PrestadorUpdate, current_user
                 if "password" in prestador_json:
                     del prestador_json["password"]
             
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "modificacion", prestador_json)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return result
     except Error as e:
@@ -285,7 +238,6 @@ def delete_prestador(prestador_id: int, current_user: dict = Depends(require_int
         with get_connection() as (cursor, conn):
             # Baja lógica: actualizar campo activo a False
             cursor.execute("UPDATE prestador SET activo = %s WHERE id=%s", (False, prestador_id))
-            conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
 
@@ -293,55 +245,13 @@ def delete_prestador(prestador_id: int, current_user: dict = Depends(require_int
             cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
             prestador_actualizado = cursor.fetchone()
             
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             # --- Publicar evento de baja ---
-            topic = "prestador"
-            event_name = "baja"
-            prestador_json = convert_to_json_safe(prestador_actualizado)
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "baja", prestador_actualizado)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return {"detail": f"Prestador {prestador_id} dado de baja correctamente"}
     except Error as e:
@@ -373,7 +283,6 @@ def add_zona_to_prestador(
                 "INSERT INTO prestador_zona (id_prestador, id_zona) VALUES (%s, %s)",
                 (prestador_id, id_zona)
             )
-            conn.commit()
 
             # Obtener prestador actualizado con zonas y habilidades
             cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
@@ -381,52 +290,13 @@ def add_zona_to_prestador(
             if not prestador_actualizado:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
 
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             # Publicar evento de modificación (mismo topic/event_name que el update)
-            topic = "prestador"
-            event_name = "modificacion"
-            prestador_json = convert_to_json_safe(prestador_actualizado)
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "modificacion", prestador_actualizado)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return {"detail": f"Zona {id_zona} agregada al prestador {prestador_id}"}
     except Error as e:
@@ -446,7 +316,6 @@ def remove_zona_from_prestador(
                 "DELETE FROM prestador_zona WHERE id_prestador = %s AND id_zona = %s",
                 (prestador_id, id_zona)
             )
-            conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Relación no encontrada")
 
@@ -456,52 +325,13 @@ def remove_zona_from_prestador(
             if not prestador_actualizado:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
 
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             # Publicar evento de modificación
-            topic = "prestador"
-            event_name = "modificacion"
-            prestador_json = convert_to_json_safe(prestador_actualizado)
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "modificacion", prestador_actualizado)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return {"detail": f"Zona {id_zona} quitada del prestador {prestador_id}"}
     except Error as e:
@@ -522,25 +352,8 @@ def get_prestadores_by_zona(
                 WHERE pz.id_zona = %s
             """, (id_zona,))
             prestadores = cursor.fetchall()
-            # Para cada prestador, obtener sus zonas y habilidades (con nombre de rubro)
-            for prestador in prestadores:
-                # Zonas
-                cursor.execute("""
-                    SELECT z.id, z.nombre
-                    FROM zona z
-                    INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                    WHERE pz.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["zonas"] = cursor.fetchall()
-                # Habilidades con nombre de rubro
-                cursor.execute("""
-                    SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                    FROM habilidad h
-                    INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                    INNER JOIN rubro r ON h.id_rubro = r.id
-                    WHERE ph.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["habilidades"] = cursor.fetchall()
+            # Zonas y habilidades de todos los prestadores en 2 consultas
+            hidratar_prestadores(prestadores, cursor)
             return prestadores
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -571,7 +384,6 @@ def add_habilidad_to_prestador(
                 "INSERT INTO prestador_habilidad (id_prestador, id_habilidad) VALUES (%s, %s)",
                 (prestador_id, id_habilidad)
             )
-            conn.commit()
 
             # Obtener prestador actualizado con zonas y habilidades
             cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
@@ -579,52 +391,13 @@ def add_habilidad_to_prestador(
             if not prestador_actualizado:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
 
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             # Publicar evento de modificación
-            topic = "prestador"
-            event_name = "modificacion"
-            prestador_json = convert_to_json_safe(prestador_actualizado)
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "modificacion", prestador_actualizado)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return {"detail": f"Habilidad {id_habilidad} agregada al prestador {prestador_id}"}
     except Error as e:
@@ -647,7 +420,6 @@ def remove_habilidad_from_prestador(
                 "DELETE FROM prestador_habilidad WHERE id_prestador = %s AND id_habilidad = %s",
                 (prestador_id, id_habilidad)
             )
-            conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Relación no encontrada")
 
@@ -657,52 +429,13 @@ def remove_habilidad_from_prestador(
             if not prestador_actualizado:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
 
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             # Publicar evento de modificación
-            topic = "prestador"
-            event_name = "modificacion"
-            prestador_json = convert_to_json_safe(prestador_actualizado)
-            payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload_str)
-            )
+            emitir_evento(cursor, "prestador", "modificacion", prestador_actualizado)
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
-            event_id = cursor.lastrowid
-
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=prestador_json
-            )
+            notify_dispatcher()
 
             return {"detail": f"Habilidad {id_habilidad} quitada del prestador {prestador_id}"}
     except Error as e:
@@ -723,25 +456,8 @@ def get_prestadores_by_habilidad(
                 WHERE ph.id_habilidad = %s
             """, (id_habilidad,))
             prestadores = cursor.fetchall()
-            # Para cada prestador, obtener sus zonas y habilidades (con nombre de rubro)
-            for prestador in prestadores:
-                # Zonas
-                cursor.execute("""
-                    SELECT z.id, z.nombre
-                    FROM zona z
-                    INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                    WHERE pz.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["zonas"] = cursor.fetchall()
-                # Habilidades con nombre de rubro
-                cursor.execute("""
-                    SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                    FROM habilidad h
-                    INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                    INNER JOIN rubro r ON h.id_rubro = r.id
-                    WHERE ph.id_prestador = %s
-                """, (prestador["id"],))
-                prestador["habilidades"] = cursor.fetchall()
+            # Zonas y habilidades de todos los prestadores en 2 consultas
+            hidratar_prestadores(prestadores, cursor)
             return prestadores
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -863,29 +579,13 @@ def update_prestador_no_event(
             query = f"UPDATE prestador SET {', '.join(fields)} WHERE id=%s"
             
             cursor.execute(query, tuple(values))
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
             
             cursor.execute("SELECT * FROM prestador WHERE id=%s", (prestador_id,))
             result = cursor.fetchone()
             
-            # Obtener zonas
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            result["zonas"] = cursor.fetchall()
-
-            # Obtener habilidades
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            result["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([result], cursor)
 
             return result
     except Error as e:
@@ -897,6 +597,7 @@ def delete_prestador_no_event(prestador_id: int, current_user: dict = Depends(re
         with get_connection() as (cursor, conn):
             # Baja lógica: actualizar campo activo a False
             cursor.execute("UPDATE prestador SET activo = %s WHERE id=%s", (False, prestador_id))
+            incrementar_version(cursor, f"prestador:{prestador_id}")
             conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Prestador no encontrado")
@@ -905,22 +606,7 @@ def delete_prestador_no_event(prestador_id: int, current_user: dict = Depends(re
             cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
             prestador_actualizado = cursor.fetchone()
             
-            cursor.execute("""
-                SELECT z.id, z.nombre
-                FROM zona z
-                INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                WHERE pz.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["zonas"] = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                FROM habilidad h
-                INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                INNER JOIN rubro r ON h.id_rubro = r.id
-                WHERE ph.id_prestador = %s
-            """, (prestador_id,))
-            prestador_actualizado["habilidades"] = cursor.fetchall()
+            hidratar_prestadores([prestador_actualizado], cursor)
 
             return {"detail": f"Prestador {prestador_id} dado de baja correctamente"}
     except Error as e:
@@ -1,79 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.rubro import RubroCreate, RubroUpdate, RubroOut
 from core.security import require_admin_role
-from core.events import publish_event
-from datetime import datetime, timezone
-import json
+from core.outbox import notify_dispatcher
+from core.cache import catalogo
+from core.versiones import incrementar_version, leer_version, responder_condicional
+from services.eventos import emitir_evento, emitir_eventos
+from services.hidratacion import hidratar_prestadores
 
 router = APIRouter(prefix="/rubros", tags=["Rubros"])
 
-# 🔧 Helper para convertir datos a JSON-safe
-def convert_to_json_safe(obj):
-    if isinstance(obj, dict):
-        return {k: convert_to_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_safe(v) for v in obj]
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
-
-
 @router.post("/", response_model=RubroOut, summary="Crear rubro")
 def create_rubro(rubro: RubroCreate, current_user: dict = Depends(require_admin_role)):
     try:
         with get_connection() as (cursor, conn):
             cursor.execute("INSERT INTO rubro (nombre) VALUES (%s)", (rubro.nombre,))
-            conn.commit()
             new_id = cursor.lastrowid
             rubro_creado = {"id": new_id, "nombre": rubro.nombre}
 
             # --- Publicar evento ---
-            topic = "rubro"
-            event_name = "alta"
-            rubro_json = convert_to_json_safe(rubro_creado)
-            payload = json.dumps(rubro_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            emitir_evento(cursor, "rubro", "alta", rubro_creado)
+            incrementar_version(cursor, "rubros")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-
-            # Manejar si el cursor devuelve tupla o dict
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            # Convertir a datetime ISO-8601 UTC
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=rubro_json
-            )
+            catalogo.invalidate("rubros")
+            notify_dispatcher()
 
             return rubro_creado
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[RubroOut], summary="Listar rubros")
-def list_rubros(nombre: str = None, activo: bool = None):
-    try:
+def list_rubros(request: Request, response: Response, nombre: str = None, activo: bool = None):
+    def cargar():
         with get_connection() as (cursor, conn):
+            version = leer_version(cursor, "rubros")
             query = "SELECT id, nombre, activo FROM rubro WHERE 1=1 AND activo <> 0"
             params = []
             if nombre:
@@ -83,21 +45,30 @@ def list_rubros(nombre: str = None, activo: bool = None):
                 query += " AND activo = %s"
                 params.append(activo)
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return {"version": version, "datos": cursor.fetchall()}
+
+    try:
+        entrada = catalogo.get_or_load("rubros", f"lista:{nombre}:{activo}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 @router.get("/{rubro_id}", response_model=RubroOut, summary="Obtener rubro por ID")
-def get_rubro(rubro_id: int):
-    try:
+def get_rubro(request: Request, response: Response, rubro_id: int):
+    def cargar():
         with get_connection() as (cursor, conn):
+            version = leer_version(cursor, "rubros")
             cursor.execute("SELECT id, nombre, activo FROM rubro WHERE id = %s AND activo <> 0", (rubro_id,))
             rubro = cursor.fetchone()
             if not rubro:
                 raise HTTPException(status_code=404, detail="Rubro no encontrado")
-            return rubro
+            return {"version": version, "datos": rubro}
+
+    try:
+        entrada = catalogo.get_or_load("rubros", f"id:{rubro_id}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 @router.patch("/{rubro_id}", response_model=RubroOut, summary="Actualizar rubro")
 def update_rubro(rubro_id: int, rubro: RubroUpdate, current_user: dict = Depends(require_admin_role)):
@@ -113,7 +84,6 @@ def update_rubro(rubro_id: int, rubro: RubroUpdate, current_user: dict = Depends
 
             query = f"UPDATE rubro SET {', '.join(fields)} WHERE id = %s"
             cursor.execute(query, tuple(values))
-            conn.commit()
 
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Rubro no encontrado")
@@ -122,40 +92,11 @@ def update_rubro(rubro_id: int, rubro: RubroUpdate, current_user: dict = Depends
             rubro_actualizado = cursor.fetchone()
 
             # --- Publicar evento ---
-            topic = "rubro"
-            event_name = "modificacion"
-            rubro_json = convert_to_json_safe(rubro_actualizado)
-            payload = json.dumps(rubro_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            emitir_evento(cursor, "rubro", "modificacion", rubro_actualizado)
+            incrementar_version(cursor, "rubros")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-
-            # Manejar si el cursor devuelve tupla o dict
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            # Convertir a datetime ISO-8601 UTC
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=rubro_json
-            )
+            catalogo.invalidate("rubros")
+            notify_dispatcher()
 
             return rubro_actualizado
     except Error as e:
@@ -175,155 +116,49 @@ def delete_rubro(rubro_id: int, current_user: dict = Depends(require_admin_role)
             habilidades = cursor.fetchall()
             habilidad_ids = [row["id"] if isinstance(row, dict) else row[0] for row in habilidades]
 
-            # Para cada habilidad, buscar prestadores afectados, borrar relaciones y publicar eventos
+            # Para cada habilidad, buscar prestadores afectados, borrar relaciones y juntar los eventos
+            eventos = []
             for habilidad_id in habilidad_ids:
                 # Obtener prestadores que tienen esta habilidad
                 cursor.execute(
                     "SELECT id_prestador FROM prestador_habilidad WHERE id_habilidad = %s",
                     (habilidad_id,)
                 )
-                prestadores_afectados = cursor.fetchall()
-                prestador_ids = [row["id_prestador"] if isinstance(row, dict) else row[0] for row in prestadores_afectados]
+                prestador_ids = [row["id_prestador"] for row in cursor.fetchall()]
 
                 # Borrar relaciones
                 cursor.execute(
                     "DELETE FROM prestador_habilidad WHERE id_habilidad = %s",
                     (habilidad_id,)
                 )
-                conn.commit()
 
-                # Publicar eventos de modificacion para cada prestador afectado
-                for prestador_id in prestador_ids:
-                    cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
-                    prestador_result = cursor.fetchone()
-                    if prestador_result:
-                        # Obtener zonas del prestador
-                        cursor.execute("""
-                            SELECT z.id, z.nombre
-                            FROM zona z
-                            INNER JOIN prestador_zona pz ON z.id = pz.id_zona
-                            WHERE pz.id_prestador = %s
-                        """, (prestador_id,))
-                        prestador_result["zonas"] = cursor.fetchall()
-
-                        # Obtener habilidades restantes (sin la que se borra)
-                        cursor.execute("""
-                            SELECT h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
-                            FROM habilidad h
-                            INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
-                            INNER JOIN rubro r ON h.id_rubro = r.id
-                            WHERE ph.id_prestador = %s AND h.id != %s
-                        """, (prestador_id, habilidad_id))
-                        prestador_result["habilidades"] = cursor.fetchall()
-
-                        # Publicar evento de modificacion del prestador
-                        topic = "prestador"
-                        event_name = "modificacion"
-                        prestador_json = convert_to_json_safe(prestador_result)
-                        payload_str = json.dumps(prestador_json, ensure_ascii=False)
-
-                        cursor.execute(
-                            "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                            (topic, event_name, payload_str)
-                        )
-                        conn.commit()
-                        event_id = cursor.lastrowid
-
-                        cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-                        event_row = cursor.fetchone()
-                        created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-                        if isinstance(created_at_value, datetime):
-                            timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-                        else:
-                            timestamp = datetime.now(timezone.utc).isoformat()
-
-                        publish_event(
-                            message_id=str(event_id),
-                            timestamp=timestamp,
-                            topic=topic,
-                            event_name=event_name,
-                            payload=prestador_json
-                        )
+                # Eventos de modificacion para cada prestador afectado (ya sin la habilidad borrada)
+                if prestador_ids:
+                    placeholders = ", ".join(["%s"] * len(prestador_ids))
+                    cursor.execute(f"SELECT * FROM prestador WHERE id IN ({placeholders})", tuple(prestador_ids))
+                    for prestador_result in hidratar_prestadores(cursor.fetchall(), cursor):
+                        eventos.append(("prestador", "modificacion", prestador_result))
 
                 # Desactivar la habilidad
                 cursor.execute("UPDATE habilidad SET activo = 0 WHERE id = %s", (habilidad_id,))
-                conn.commit()
 
                 # Obtener la habilidad para publicar su evento de baja
                 cursor.execute("SELECT id, nombre, descripcion, id_rubro, activo FROM habilidad WHERE id = %s", (habilidad_id,))
                 habilidad_result = cursor.fetchone()
-
-                # Publicar evento de baja de habilidad
-                topic = "habilidad"
-                event_name = "baja"
-                habilidad_json = convert_to_json_safe(habilidad_result if habilidad_result else {"id": habilidad_id})
-                payload_str = json.dumps(habilidad_json, ensure_ascii=False)
-
-                cursor.execute(
-                    "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                    (topic, event_name, payload_str)
-                )
-                conn.commit()
-                event_id = cursor.lastrowid
-
-                cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-                event_row = cursor.fetchone()
-                created_at_value = event_row["created_at"] if isinstance(event_row, dict) else (event_row[0] if event_row else None)
-
-                if isinstance(created_at_value, datetime):
-                    timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-                else:
-                    timestamp = datetime.now(timezone.utc).isoformat()
-
-                publish_event(
-                    message_id=str(event_id),
-                    timestamp=timestamp,
-                    topic=topic,
-                    event_name=event_name,
-                    payload=habilidad_json
-                )
+                eventos.append(("habilidad", "baja", habilidad_result if habilidad_result else {"id": habilidad_id}))
 
             # Desactivar el rubro
             cursor.execute("UPDATE rubro SET activo = 0 WHERE id = %s", (rubro_id,))
-            conn.commit()
 
-            # Publicar evento de baja del rubro
-            topic = "rubro"
-            event_name = "baja"
+            # Publicar todos los eventos (prestadores, habilidades y la baja del rubro) en un solo INSERT
             rubro_actualizado = {"id": rubro["id"], "nombre": rubro["nombre"], "activo": 0}
-            rubro_json = convert_to_json_safe(rubro_actualizado)
-            payload = json.dumps(rubro_json, ensure_ascii=False)
-
-            cursor.execute(
-                "INSERT INTO eventos_publicados (topic, event_name, payload) VALUES (%s, %s, %s)",
-                (topic, event_name, payload)
-            )
+            eventos.append(("rubro", "baja", rubro_actualizado))
+            emitir_eventos(cursor, eventos)
+            incrementar_version(cursor, "rubros", "habilidades")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-
-            # Manejar si el cursor devuelve tupla o dict
-            if isinstance(event_row, dict):
-                created_at_value = event_row.get("created_at")
-            else:
-                created_at_value = event_row[0] if event_row else None
-
-            # Convertir a datetime ISO-8601 UTC
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=rubro_json
-            )
+            # La baja del rubro también desactiva sus habilidades
+            catalogo.invalidate("rubros", "habilidades")
+            notify_dispatcher()
 
             return {"detail": "Rubro eliminado correctamente"}
     except Error as e:
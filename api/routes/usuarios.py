@@ -1,30 +1,43 @@
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.usuario import UsuarioCreate, UsuarioUpdate, UsuarioOut
 from core.security import require_admin_role, require_admin_or_prestador_role, require_internal_or_admin
+from core.paginacion import MAX_LIMIT, filtro_ids, parse_fields, aplicar_keyset, armar_respuesta
+from core.busqueda import COLUMNAS_BUSQUEDA_USUARIO, aplicar_busqueda
+from core.exportacion import ndjson_response
 
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
-# Listar todos con filtros opcionales (requiere JWT)
+CAMPOS_USUARIO = set(UsuarioOut.model_fields)
+COLUMNAS_LISTADO = """id, nombre, apellido, dni, telefono, activo, foto,
+                      estado_pri, ciudad_pri, calle_pri, numero_pri, piso_pri, departamento_pri,
+                      estado_sec, ciudad_sec, calle_sec, numero_sec, piso_sec, departamento_sec, id_usuario"""
+
+# Listar todos con filtros opcionales (requiere JWT); ?q= busca texto libre por relevancia (core/busqueda.py)
 @router.get("/", response_model=List[UsuarioOut])
 def list_usuarios(
+    response: Response,
     nombre: Optional[str] = None,
     apellido: Optional[str] = None,
     dni: Optional[str] = None,
     estado_pri: Optional[str] = None,
     ciudad_pri: Optional[str] = None,
     telefono: Optional[str] = None,
-    id_usuario: Optional[int] = None,
+    id_usuario: Optional[List[int]] = Query(None, description="Uno o varios (repetir el parámetro)"),
+    q: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    fields: Optional[str] = None,
     current_user: dict = Depends(require_internal_or_admin)
 ):
+    campos = parse_fields(fields, CAMPOS_USUARIO)
+    columnas = ", ".join(campos) if campos else COLUMNAS_LISTADO
     try:
         with get_connection() as (cursor, conn):
-            query = """SELECT id, nombre, apellido, dni, telefono, activo, foto,
-                      estado_pri, ciudad_pri, calle_pri, numero_pri, piso_pri, departamento_pri,
-                      estado_sec, ciudad_sec, calle_sec, numero_sec, piso_sec, departamento_sec, id_usuario
+            query = f"""SELECT {columnas}
                       FROM usuario WHERE 1=1"""
             params = []
 
@@ -46,15 +59,24 @@ def list_usuarios(
             if telefono:
                 query += " AND telefono LIKE %s"
                 params.append(f"%{telefono}%")
-            if id_usuario:
-                query += " AND id_usuario = %s"
-                params.append(id_usuario)
+            query = filtro_ids(query, params, "id_usuario", id_usuario)
 
+            if q:
+                query = aplicar_busqueda(query, params, COLUMNAS_BUSQUEDA_USUARIO, q, cursor_pagina, limit)
+            else:
+                query = aplicar_keyset(query, params, cursor_pagina, limit)
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return armar_respuesta(cursor.fetchall(), limit, response, campos)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Exportar todos los usuarios como NDJSON en streaming
+@router.get("/export",
+            summary="Exportar usuarios (NDJSON)",
+            description="Devuelve todos los usuarios, uno por línea (application/x-ndjson), sin armar la lista completa en memoria.")
+def export_usuarios(current_user: dict = Depends(require_internal_or_admin)):
+    return ndjson_response(f"SELECT {COLUMNAS_LISTADO} FROM usuario ORDER BY id", (), UsuarioOut, filename="usuarios.ndjson")
+
 @router.post("/", response_model=UsuarioOut)
 def create_usuario(usuario: UsuarioCreate, current_user: dict = Depends(require_internal_or_admin)):
     try:
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from mysql.connector import Error
 from core.database import get_connection
 from schemas.zona import ZonaCreate, ZonaUpdate, ZonaOut
 from core.security import require_admin_role
-from core.events import publish_event
-from datetime import datetime, timezone
-import json
+from core.outbox import notify_dispatcher
+from core.cache import catalogo
+from core.versiones import incrementar_version, leer_version, responder_condicional
+from services.eventos import emitir_evento
 
 router = APIRouter(prefix="/zonas", tags=["Zonas"])
 
@@ -15,72 +16,55 @@ def create_zona(zona: ZonaCreate, current_user: dict = Depends(require_admin_rol
     try:
         with get_connection() as (cursor, conn):
             cursor.execute("INSERT INTO zona (nombre) VALUES (%s)", (zona.nombre,))
-            conn.commit()
             new_id = cursor.lastrowid
             zona_creada = {"id": new_id, "nombre": zona.nombre}
 
             # Registrar evento en la tabla
-            topic = "zona"
-            event_name = "alta"
-            payload = json.dumps(zona_creada, ensure_ascii=False)
-
-            insert_event_query = """
-                INSERT INTO eventos_publicados (topic, event_name, payload)
-                VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_event_query, (topic, event_name, payload))
+            emitir_evento(cursor, "zona", "alta", zona_creada)
+            incrementar_version(cursor, "zonas")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else event_row[0]
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            # Publicar evento en CoreHub
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=zona_creada
-            )
+            catalogo.invalidate("zonas")
+            notify_dispatcher()
 
             return zona_creada
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[ZonaOut], summary="Listar zonas")
-def list_zonas(nombre: str = None):
-    try:
+def list_zonas(request: Request, response: Response, nombre: str = None):
+    def cargar():
         with get_connection() as (cursor, conn):
-            
+            version = leer_version(cursor, "zonas")
             query = "SELECT id, nombre FROM zona WHERE 1=1"
             params = []
             if nombre:
                 query += " AND nombre LIKE %s"
                 params.append(f"%{nombre}%")
             cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+            return {"version": version, "datos": cursor.fetchall()}
+
+    try:
+        entrada = catalogo.get_or_load("zonas", f"lista:{nombre}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 @router.get("/{zona_id}", response_model=ZonaOut, summary="Obtener zona por ID")
-def get_zona(zona_id: int):
-    try:
+def get_zona(request: Request, response: Response, zona_id: int):
+    def cargar():
         with get_connection() as (cursor, conn):
-            
+            version = leer_version(cursor, "zonas")
             cursor.execute("SELECT id, nombre FROM zona WHERE id = %s", (zona_id,))
             zona = cursor.fetchone()
             if not zona:
                 raise HTTPException(status_code=404, detail="Zona no encontrada")
-            return zona
+            return {"version": version, "datos": zona}
+
+    try:
+        entrada = catalogo.get_or_load("zonas", f"id:{zona_id}", cargar)
     except Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return responder_condicional(request, response, entrada["version"]) or entrada["datos"]
 
 @router.patch("/{zona_id}", response_model=ZonaOut, summary="Modificar zona")
 def update_zona(zona_id: int, zona: ZonaUpdate, current_user: dict = Depends(require_admin_role)):
@@ -96,7 +80,6 @@ def update_zona(zona_id: int, zona: ZonaUpdate, current_user: dict = Depends(req
             values.append(zona_id)
             query = f"UPDATE zona SET {', '.join(fields)} WHERE id=%s"
             cursor.execute(query, tuple(values))
-            conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Zona no encontrada")
 
@@ -104,35 +87,11 @@ def update_zona(zona_id: int, zona: ZonaUpdate, current_user: dict = Depends(req
             zona_modificada = cursor.fetchone()
 
             # Registrar evento en la tabla
-            topic = "zona"
-            event_name = "modificacion"
-            payload = json.dumps(zona_modificada, ensure_ascii=False)
-
-            insert_event_query = """
-                INSERT INTO eventos_publicados (topic, event_name, payload)
-                VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_event_query, (topic, event_name, payload))
+            emitir_evento(cursor, "zona", "modificacion", zona_modificada)
+            incrementar_version(cursor, "zonas")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else event_row[0]
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            # Publicar evento en CoreHub
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload=zona_modificada
-            )
+            catalogo.invalidate("zonas")
+            notify_dispatcher()
 
             return zona_modificada
     except Error as e:
@@ -149,40 +108,15 @@ def delete_zona(zona_id: int, current_user: dict = Depends(require_admin_role)):
             nombre = row["nombre"] if isinstance(row, dict) else row[1]
             
             cursor.execute("DELETE FROM zona WHERE id=%s", (zona_id,))
-            conn.commit()
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Zona no encontrada")
 
             # Registrar evento en la tabla
-            topic = "zona"
-            event_name = "baja"
-            payload = json.dumps({"id": zona_id, "nombre": nombre}, ensure_ascii=False)
-
-            insert_event_query = """
-                INSERT INTO eventos_publicados (topic, event_name, payload)
-                VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_event_query, (topic, event_name, payload))
+            emitir_evento(cursor, "zona", "baja", {"id": zona_id, "nombre": nombre})
+            incrementar_version(cursor, "zonas")
             conn.commit()
-
-            event_id = cursor.lastrowid
-            cursor.execute("SELECT created_at FROM eventos_publicados WHERE id = %s", (event_id,))
-            event_row = cursor.fetchone()
-            created_at_value = event_row["created_at"] if isinstance(event_row, dict) else event_row[0]
-
-            if isinstance(created_at_value, datetime):
-                timestamp = created_at_value.replace(tzinfo=timezone.utc).isoformat()
-            else:
-                timestamp = datetime.now(timezone.utc).isoformat()
-
-            # Publicar evento en CoreHub
-            publish_event(
-                message_id=str(event_id),
-                timestamp=timestamp,
-                topic=topic,
-                event_name=event_name,
-                payload={"id": zona_id, "nombre": nombre}
-            )
+            catalogo.invalidate("zonas")
+            notify_dispatcher()
 
             return {"detail": f"Zona {zona_id} eliminada correctamente"}
     except Error as e:
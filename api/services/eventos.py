@@ -0,0 +1,32 @@
+import time
+from comun.eventos import INSERT_EVENTO, VALORES_EVENTO, ahora_utc, insertar_eventos
+from comun.serializacion import dumps
+from core.metrics import EVENT_EMIT_SECONDS
+
+
+def emitir_evento(cursor, topic: str, event_name: str, payload) -> int:
+    """
+    Registra un evento en el outbox con un único INSERT dentro de la transacción del caller.
+
+    No hace commit: el evento queda confirmado junto con el cambio de dominio.
+    Después del commit el caller tiene que llamar a `notify_dispatcher()`.
+    Devuelve el id del evento (es el messageId que se manda al CoreHub).
+    """
+    inicio = time.perf_counter()
+    cursor.execute(INSERT_EVENTO + VALORES_EVENTO, (topic, event_name, dumps(payload), ahora_utc()))
+    EVENT_EMIT_SECONDS.labels(topic=topic).observe(time.perf_counter() - inicio)
+    return cursor.lastrowid
+
+
+def emitir_eventos(cursor, eventos: list) -> None:
+    """
+    Igual que `emitir_evento` pero para varios eventos `(topic, event_name, payload)` en
+    un solo INSERT multi-fila (comun.eventos.insertar_eventos). Los ids se asignan en el orden de la lista.
+    """
+    if not eventos:
+        return
+    inicio = time.perf_counter()
+    insertar_eventos(cursor, eventos)
+    duracion = (time.perf_counter() - inicio) / len(eventos)
+    for topic, _, _ in eventos:
+        EVENT_EMIT_SECONDS.labels(topic=topic).observe(duracion)
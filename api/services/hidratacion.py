@@ -0,0 +1,53 @@
+def hidratar_prestadores(prestadores: list, cursor):
+    """
+    Completa `zonas` y `habilidades` (con nombre de rubro) de una lista de prestadores.
+
+    Hace siempre 2 consultas con IN (...) sin importar cuántos prestadores haya,
+    y arma las listas en memoria. Modifica los dicts recibidos y devuelve la misma lista.
+    """
+    if not prestadores:
+        return prestadores
+
+    ids = list({p["id"] for p in prestadores})
+    placeholders = ", ".join(["%s"] * len(ids))
+
+    zonas_por_prestador = {pid: [] for pid in ids}
+    cursor.execute(f"""
+        SELECT pz.id_prestador, z.id, z.nombre
+        FROM zona z
+        INNER JOIN prestador_zona pz ON z.id = pz.id_zona
+        WHERE pz.id_prestador IN ({placeholders})
+    """, tuple(ids))
+    for row in cursor.fetchall():
+        pid = row.pop("id_prestador")
+        zonas_por_prestador[pid].append(row)
+
+    habilidades_por_prestador = {pid: [] for pid in ids}
+    cursor.execute(f"""
+        SELECT ph.id_prestador, h.id, h.nombre, h.descripcion, h.id_rubro, r.nombre AS nombre_rubro
+        FROM habilidad h
+        INNER JOIN prestador_habilidad ph ON h.id = ph.id_habilidad
+        INNER JOIN rubro r ON h.id_rubro = r.id
+        WHERE ph.id_prestador IN ({placeholders})
+    """, tuple(ids))
+    for row in cursor.fetchall():
+        pid = row.pop("id_prestador")
+        habilidades_por_prestador[pid].append(row)
+
+    for prestador in prestadores:
+        # Copias por prestador: la misma lista no debe compartirse si hay ids repetidos
+        prestador["zonas"] = list(zonas_por_prestador[prestador["id"]])
+        prestador["habilidades"] = list(habilidades_por_prestador[prestador["id"]])
+    return prestadores
+
+
+def obtener_prestador_completo(prestador_id: int, cursor):
+    """
+    Devuelve el prestador con sus zonas y habilidades, o None si no existe.
+    """
+    cursor.execute("SELECT * FROM prestador WHERE id = %s", (prestador_id,))
+    prestador = cursor.fetchone()
+    if not prestador:
+        return None
+    hidratar_prestadores([prestador], cursor)
+    return prestador
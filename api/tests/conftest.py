@@ -3,10 +3,11 @@ import sys
 import pytest
 from fastapi.testclient import TestClient
 
-# Agregamos la carpeta api/ al sys.path
+# Agregamos la carpeta api/ y la raíz del repo (paquete comun/) al sys.path
 API_DIR = pathlib.Path(__file__).resolve().parents[1]
-if str(API_DIR) not in sys.path:
-    sys.path.insert(0, str(API_DIR))
+for path in (API_DIR.parent, API_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
 
 from main import app  # importa main.py dentro de api/
 
@@ -0,0 +1,31 @@
+import pathlib, sys
+import pytest
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from fastapi import HTTPException
+from core.busqueda import COLUMNAS_BUSQUEDA_PRESTADOR, aplicar_busqueda, termino_booleano
+from core.paginacion import encode_cursor
+
+
+def test_termino_booleano_prefijo_y_sin_operadores():
+    assert termino_booleano("gonz rami") == "+gonz* +rami*"
+    assert termino_booleano('-juan +"perez" (x)~') == "+juan* +perez* +x*"
+    assert termino_booleano("ana@mail.com") == "+ana* +mail* +com*"
+    assert termino_booleano(" *+- ") is None
+
+
+def test_busqueda_ordena_por_relevancia_sin_fila_extra():
+    params = [True]
+    query = aplicar_busqueda("SELECT * FROM prestador WHERE 1 = 1 AND activo = %s", params, COLUMNAS_BUSQUEDA_PRESTADOR, "gonz", None, 20)
+    match = "MATCH(nombre, apellido, email, telefono, dni, ciudad) AGAINST (%s IN BOOLEAN MODE)"
+    assert query.endswith(f"AND {match} ORDER BY {match} DESC, id LIMIT %s")
+    assert params == [True, "+gonz*", "+gonz*", 20]
+
+
+def test_busqueda_no_acepta_cursor():
+    with pytest.raises(HTTPException) as exc:
+        aplicar_busqueda("SELECT * FROM usuario WHERE 1=1", [], ("nombre",), "ana", encode_cursor(3), 10)
+    assert exc.value.status_code == 400
@@ -0,0 +1,79 @@
+import pathlib, sys
+from contextlib import contextmanager
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from prometheus_client import REGISTRY
+from core.cache import Cache, MemoryBackend, catalogo
+from routes import rubros
+
+
+def _contador(namespace, result):
+    return REGISTRY.get_sample_value("cache_requests_total", {"namespace": namespace, "result": result}) or 0
+
+
+def test_read_through_con_ttl_e_invalidacion():
+    ahora = [0.0]
+    cache = Cache(MemoryBackend(clock=lambda: ahora[0]), ttl=60)
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        return [{"id": 1, "nombre": "Plomería"}]
+
+    hits, misses = _contador("test", "hit"), _contador("test", "miss")
+    assert cache.get_or_load("test", "lista", cargar) == [{"id": 1, "nombre": "Plomería"}]
+    assert cache.get_or_load("test", "lista", cargar) == [{"id": 1, "nombre": "Plomería"}]
+    assert len(cargas) == 1
+    assert _contador("test", "hit") - hits == 1
+    assert _contador("test", "miss") - misses == 1
+
+    # Invalidar sube la versión del namespace: la próxima lectura va a la DB
+    cache.invalidate("test")
+    assert cache.version("test") == 1
+    cache.get_or_load("test", "lista", cargar)
+    assert len(cargas) == 2
+
+    # Vencido el TTL también
+    ahora[0] += 61
+    cache.get_or_load("test", "lista", cargar)
+    assert len(cargas) == 3
+
+
+class FakeCursor:
+    """Cuenta las consultas a rubro (la de version_recurso no devuelve filas)."""
+
+    def __init__(self):
+        self.queries = 0
+        self._version = False
+
+    def execute(self, query, params=()):
+        self._version = "version_recurso" in query
+        if not self._version:
+            self.queries += 1
+
+    def fetchall(self):
+        return [] if self._version else [{"id": 1, "nombre": "Plomería", "activo": 1}]
+
+
+def test_list_rubros_usa_el_cache(client, monkeypatch):
+    cursor = FakeCursor()
+
+    @contextmanager
+    def fake_connection():
+        yield cursor, None
+
+    monkeypatch.setattr(rubros, "get_connection", fake_connection)
+    monkeypatch.setattr(catalogo, "backend", MemoryBackend())
+
+    for _ in range(3):
+        response = client.get("/rubros/")
+        assert response.status_code == 200
+        assert response.json() == [{"id": 1, "nombre": "Plomería", "activo": True}]
+    assert cursor.queries == 1
+
+    catalogo.invalidate("rubros")
+    client.get("/rubros/")
+    assert cursor.queries == 2
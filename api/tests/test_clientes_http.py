@@ -0,0 +1,54 @@
+import pathlib, sys, json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from prometheus_client import REGISTRY
+from core import clientes_http, events
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Servidor local que hace de CoreHub: guarda cada body y de qué conexión vino."""
+    protocol_version = "HTTP/1.1"  # keep-alive
+    recibidos = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        StandIn.recibidos.append((self.client_address, json.loads(body)))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def core_local(monkeypatch):
+    StandIn.recibidos = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(events, "CORE_URL", f"http://127.0.0.1:{server.server_port}/publish")
+    yield
+    clientes_http.close_clients()
+    server.shutdown()
+
+
+def _conexiones_nuevas():
+    return REGISTRY.get_sample_value("http_cliente_conexiones_nuevas_total", {"destino": "corehub"}) or 0
+
+
+def test_publish_event_reusa_la_conexion(core_local):
+    antes = _conexiones_nuevas()
+    for i in range(3):
+        response = events.publish_event(str(i), "2025-01-01T00:00:00+00:00", "pedido", "alta", {"id": i})
+        assert response.status_code == 200
+
+    assert [body["messageId"] for _, body in StandIn.recibidos] == ["0", "1", "2"]
+    # Los tres requests llegaron por la misma conexión TCP
+    assert len({addr for addr, _ in StandIn.recibidos}) == 1
+    assert _conexiones_nuevas() - antes == 1
@@ -0,0 +1,67 @@
+import pathlib, sys, gzip, json
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from core.compresion import CompressionMiddleware, elegir_encoding
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500, thread_min_size=5000)
+
+FILAS = [{"id": i, "nombre": "Prestador", "zonas": [{"id": 1, "nombre": "Palermo"}]} for i in range(200)]
+
+
+@app.get("/grande")
+def grande():
+    return FILAS
+
+
+@app.get("/chico")
+def chico():
+    return {"ok": True}
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((json.dumps(f) + "\n" for f in FILAS), media_type="application/x-ndjson")
+
+
+client = TestClient(app)
+
+
+def test_elegir_encoding_respeta_q():
+    assert elegir_encoding("gzip, deflate") == "gzip"
+    assert elegir_encoding("gzip;q=0, identity") is None
+    assert elegir_encoding("") is None
+
+
+def test_comprime_bodies_grandes_en_gzip():
+    response = client.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx ya lo descomprime; el Content-Length es el del body comprimido
+    assert response.json() == FILAS
+    assert int(response.headers["content-length"]) < len(json.dumps(FILAS)) / 5
+
+    ratio = REGISTRY.get_sample_value("http_compresion_ratio_count", {"handler": "/grande", "encoding": "gzip"})
+    assert ratio >= 1
+
+
+def test_no_comprime_chicos_streaming_ni_sin_accept_encoding():
+    assert "content-encoding" not in client.get("/chico", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/grande", headers={"Accept-Encoding": "identity"}).headers
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert len(response.text.splitlines()) == len(FILAS)
+
+
+def test_gzip_valido_para_el_cliente():
+    with client.stream("GET", "/grande", headers={"Accept-Encoding": "gzip"}) as response:
+        crudo = b"".join(response.iter_raw())
+    assert json.loads(gzip.decompress(crudo)) == FILAS
@@ -0,0 +1,109 @@
+import pathlib, sys
+import threading
+import pytest
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from mysql.connector.errors import PoolError
+from core.pool import ConnectionPool
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.ping_ok = True
+
+    def ping(self, reconnect=False):
+        if not self.ping_ok:
+            raise Exception("gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConn()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect=connect, **kwargs), created
+
+
+def test_reuses_connections_and_resets_on_release():
+    pool, created = make_pool(size=2, max_overflow=0)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    assert second.raw is first.raw
+    assert len(created) == 1
+    assert first.raw.rollbacks == 1
+
+
+def test_overflow_connections_are_closed_on_release():
+    pool, created = make_pool(size=1, max_overflow=1)
+    a = pool.acquire()
+    b = pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    assert pool.idle == 1
+    assert sum(c.closed for c in created) == 1
+
+
+def test_timeout_when_exhausted():
+    pool, _ = make_pool(size=1, max_overflow=0, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolError):
+        pool.acquire()
+
+
+def test_waiter_gets_released_connection():
+    pool, created = make_pool(size=1, max_overflow=0, timeout=2)
+    held = pool.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    pool.release(held)
+    t.join(timeout=2)
+    assert got and got[0].raw is held.raw
+    assert len(created) == 1
+
+
+def test_dead_connection_is_replaced_on_checkout():
+    pool, created = make_pool(size=1, max_overflow=0)
+    conn = pool.acquire()
+    conn.raw.ping_ok = False
+    pool.release(conn)
+    fresh = pool.acquire()
+    assert fresh.raw is not conn.raw
+    assert conn.raw.closed
+
+
+def test_recycle_after_max_age():
+    pool, created = make_pool(size=1, max_overflow=0, recycle=1)
+    conn = pool.acquire()
+    conn.created_at -= 5
+    pool.release(conn)
+    assert pool.acquire().raw is not conn.raw
+    assert len(created) == 2
+
+
+def test_get_connection_libera_el_slot_si_falla_el_cursor(monkeypatch):
+    from core import database
+
+    # FakeConn no tiene cursor(): falla igual que una conexión muerta
+    pool, created = make_pool(size=1, max_overflow=0, timeout=0.05)
+    monkeypatch.setattr(database, "pool", pool)
+    with pytest.raises(AttributeError):
+        with database.get_connection():
+            pass
+    assert created[0].closed
+    pool.acquire()  # el único slot quedó libre
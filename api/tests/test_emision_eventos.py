@@ -0,0 +1,40 @@
+import pathlib, sys, json
+from datetime import datetime
+from decimal import Decimal
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from services.eventos import emitir_evento, emitir_eventos
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self.lastrowid = 41
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        self.lastrowid += 1
+
+
+def test_emitir_evento_un_solo_insert_sin_commit():
+    cursor = FakeCursor()
+    row = {"id": 1, "tarifa": Decimal("10.50"), "fecha": datetime(2025, 1, 2, 3, 4, 5)}
+
+    assert emitir_evento(cursor, "pedido", "pedido_finalizado", row) == 42
+    assert len(cursor.executed) == 1
+    query, (topic, event_name, payload, created_at) = cursor.executed[0]
+    assert "created_at" in query
+    assert (topic, event_name) == ("pedido", "pedido_finalizado")
+    assert json.loads(payload) == {"id": 1, "tarifa": 10.5, "fecha": "2025-01-02T03:04:05"}
+    assert isinstance(created_at, datetime) and created_at.tzinfo is None
+
+
+def test_emitir_eventos_multi_fila():
+    cursor = FakeCursor()
+    emitir_eventos(cursor, [("habilidad", "baja", {"id": 1}), ("rubro", "baja", {"id": 2})])
+    query, params = cursor.executed[0]
+    assert query.count("(%s, %s, %s, %s)") == 2
+    assert params[0] == "habilidad" and params[4] == "rubro"
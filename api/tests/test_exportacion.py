@@ -0,0 +1,87 @@
+import pathlib, sys, json
+from contextlib import contextmanager
+from datetime import datetime
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+import pytest
+from core import exportacion
+from core.exportacion import NDJSON_MEDIA_TYPE
+from core.security import require_internal_or_admin
+from main import app
+
+
+class StreamCursor:
+    """Cursor sin buffer: entrega las filas en bloques con fetchmany (las consultas de hidratación no traen nada)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.bloques = []
+        self._pendientes = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        self._pendientes = list(self.rows) if "ORDER BY id" in query else []
+
+    def fetchmany(self, n):
+        bloque, self._pendientes = self._pendientes[:n], self._pendientes[n:]
+        self.bloques.append(len(bloque))
+        return bloque
+
+    def fetchall(self):
+        return self.fetchmany(len(self._pendientes))
+
+
+@pytest.fixture
+def cursores():
+    return []
+
+
+@pytest.fixture
+def filas(monkeypatch, cursores):
+    rows = []
+
+    @contextmanager
+    def fake_connection(buffered=True):
+        cursor = StreamCursor(rows)
+        cursores.append(cursor)
+        yield cursor, None
+
+    monkeypatch.setattr(exportacion, "get_connection", fake_connection)
+    monkeypatch.setattr(exportacion, "EXPORT_CHUNK_SIZE", 2)
+    app.dependency_overrides[require_internal_or_admin] = lambda: {"role": "internal"}
+    yield rows
+    app.dependency_overrides.pop(require_internal_or_admin, None)
+
+
+def test_export_una_linea_json_por_fila(client, filas, cursores):
+    fecha = datetime(2025, 5, 1, 12, 0)
+    filas.extend(
+        {"id": i, "estado": "pendiente", "descripcion": f"pedido\n{i}", "id_usuario": 1, "id_prestador": 2,
+         "fecha_creacion": fecha, "fecha_ultima_actualizacion": fecha, "es_critico": False}
+        for i in range(1, 6)
+    )
+
+    response = client.get("/pedidos/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    lineas = response.text.split("\n")
+    assert lineas[-1] == ""  # cada fila termina en "\n", incluida la última
+    pedidos = [json.loads(linea) for linea in lineas[:-1]]
+    assert [p["id"] for p in pedidos] == [1, 2, 3, 4, 5]
+    assert pedidos[0]["descripcion"] == "pedido\n1"
+    # Leído en bloques de EXPORT_CHUNK_SIZE (2), no de una vez
+    assert cursores[0].bloques == [2, 2, 1, 0]
+
+
+@pytest.mark.parametrize("ruta", ["/usuarios/export", "/prestadores/export", "/pedidos/export"])
+def test_export_tiene_prioridad_sobre_el_id(client, filas, ruta):
+    # Si /{id} se registrara antes, "export" no pasaría como int y respondería 422
+    response = client.get(ruta)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    assert response.text == ""
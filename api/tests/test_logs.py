@@ -0,0 +1,40 @@
+import pathlib, sys, json, logging
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from comun import logs
+
+
+def test_json_por_cola_con_niveles_y_muestreo(monkeypatch, capsys):
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_LEVELS", "test.logs.detalle=DEBUG")
+    monkeypatch.setenv("LOG_SAMPLING", "test.logs.ruidoso=3")
+    logs.configure_logging("api")
+    try:
+        detalle = logging.getLogger("test.logs.detalle")
+        ruidoso = logging.getLogger("test.logs.ruidoso")
+        detalle.debug("pedido %s", 7, extra={"id_pedido": 7})
+        for i in range(9):
+            ruidoso.info("evento %s", i)
+        ruidoso.warning("siempre pasa")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            detalle.exception("falló")
+    finally:
+        logs.shutdown_logging()
+        logging.getLogger("test.logs.detalle").setLevel(logging.NOTSET)
+
+    lineas = [json.loads(l) for l in capsys.readouterr().out.splitlines() if '"test.logs.' in l]
+
+    assert lineas[0]["msg"] == "pedido 7"
+    assert lineas[0]["level"] == "DEBUG"
+    assert lineas[0]["service"] == "api"
+    assert lineas[0]["id_pedido"] == 7
+    # Uno de cada 3 INFO del módulo muestreado; el WARNING pasa siempre
+    assert [l["msg"] for l in lineas if l["logger"] == "test.logs.ruidoso"] == [
+        "evento 0", "evento 3", "evento 6", "siempre pasa",
+    ]
+    assert "ValueError: boom" in lineas[-1]["exc"]
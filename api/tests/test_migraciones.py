@@ -0,0 +1,152 @@
+import os, pathlib, sys
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+import mysql.connector
+import pytest
+from core.migraciones import aplicar_migraciones, listar_migraciones, sentencias
+
+# ===========================
+# Runner (sin DB)
+# ===========================
+
+
+class FakeCursor:
+    def __init__(self, aplicadas=(), duplicados=()):
+        self.aplicadas = {v: "x" for v in aplicadas}
+        self.duplicados = duplicados
+        self.ejecutadas = []
+        self._result = []
+
+    def execute(self, query, params=()):
+        self.ejecutadas.append(query)
+        if any(d in query for d in self.duplicados):
+            raise mysql.connector.Error(msg="Duplicate key name", errno=1061)
+        if "GET_LOCK" in query:
+            self._result = [{"ok": 1}]
+        elif query.startswith("SELECT version, checksum"):
+            self._result = [{"version": v, "checksum": c} for v, c in self.aplicadas.items()]
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.aplicadas[params[0]] = params[2]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeConn:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _migraciones(tmp_path):
+    (tmp_path / "001_tabla.sql").write_text("-- comentario\nCREATE TABLE t (id INT);\n")
+    (tmp_path / "002_indices.sql").write_text("CREATE INDEX a ON t (id);\nCREATE INDEX b ON t (id);\n")
+    (tmp_path / "notas.txt").write_text("no es una migración")
+    return tmp_path
+
+
+def test_sentencias_y_orden(tmp_path):
+    directorio = _migraciones(tmp_path)
+    assert [v for v, _, _ in listar_migraciones(directorio)] == ["001", "002"]
+    assert sentencias("-- x\nCREATE INDEX a ON t (id);\n\nSELECT 1;") == ["CREATE INDEX a ON t (id)", "SELECT 1"]
+
+
+def test_aplica_solo_pendientes_y_tolera_ya_aplicado(tmp_path):
+    directorio = _migraciones(tmp_path)
+    cursor = FakeCursor(aplicadas=["001"], duplicados=["INDEX a"])
+
+    assert aplicar_migraciones(cursor, FakeConn(), directorio) == ["002"]
+    assert not any("CREATE TABLE t" in q for q in cursor.ejecutadas)
+    assert any("INDEX b" in q for q in cursor.ejecutadas)
+    assert "RELEASE_LOCK" in cursor.ejecutadas[-1]
+
+    # Segunda corrida: nada pendiente
+    assert aplicar_migraciones(cursor, FakeConn(), directorio) == []
+
+
+# ===========================
+# EXPLAIN de las búsquedas calientes (necesita MySQL)
+# ===========================
+# Si una de estas consultas deja de tener un índice utilizable (alguien borra la
+# migración o cambia la consulta) falla acá y no en producción con un full scan.
+
+CONSULTAS_CALIENTES = [
+    ("prestador", "SELECT id FROM prestador WHERE id_prestador = %s", (1,), "idx_prestador_id_prestador"),
+    ("usuario", "SELECT id FROM usuario WHERE id_usuario = %s", (1,), "idx_usuario_id_usuario"),
+    ("admin", "SELECT id FROM admin WHERE id_admin = %s", (1,), "idx_admin_id_admin"),
+    ("calificacion", "SELECT id FROM calificacion WHERE id_calificacion = %s", (1,), "idx_calificacion_id_calificacion"),
+    ("pedido", "SELECT id FROM pedido WHERE id_pedido = %s AND id_prestador = %s", (1, 1), "uq_pedido_pedido_prestador"),
+    (
+        "pedido",
+        "SELECT COUNT(*) AS total FROM pedido WHERE id_prestador = %s AND estado NOT IN ('finalizado', 'cancelado')",
+        (1,),
+        "idx_pedido_prestador_estado",
+    ),
+    (
+        "prestador",
+        "SELECT id FROM prestador WHERE MATCH(nombre, apellido, email, telefono, dni, ciudad) AGAINST (%s IN BOOLEAN MODE)",
+        ("+gonz*",),
+        "ft_prestador_busqueda",
+    ),
+    (
+        "usuario",
+        "SELECT id FROM usuario WHERE MATCH(nombre, apellido, dni, telefono, ciudad_pri) AGAINST (%s IN BOOLEAN MODE)",
+        ("+gonz*",),
+        "ft_usuario_busqueda",
+    ),
+    (
+        "inbound_events",
+        "SELECT id, message_id, subscription_id, topic, payload FROM inbound_events "
+        "WHERE status='pending' ORDER BY received_at, id LIMIT 100",
+        (),
+        "idx_inbound_events_status",
+    ),
+]
+
+# Con pocas filas MySQL puede preferir el full scan aunque el índice exista;
+# a partir de este tamaño se exige además que no lo haga.
+FILAS_MINIMAS_SIN_FULL_SCAN = 1000
+
+# El fixture aplica las migraciones (DDL, incluido el DROP INDEX de 005): solo
+# corre contra una base de prueba explícita, nunca contra la de MYSQL_DATABASE.
+# El host y las credenciales son los de siempre (DB_HOST, MYSQL_USER, ...).
+TEST_MYSQL_DATABASE = os.getenv("TEST_MYSQL_DATABASE")
+
+
+@pytest.fixture(scope="module")
+def db():
+    from core.database import db_config
+
+    if not TEST_MYSQL_DATABASE:
+        pytest.skip("TEST_MYSQL_DATABASE no definida (base de prueba para el EXPLAIN)")
+    try:
+        conn = mysql.connector.connect(**{**db_config, "database": TEST_MYSQL_DATABASE}, connection_timeout=3)
+    except mysql.connector.Error as e:
+        pytest.skip(f"Sin MySQL para EXPLAIN: {e}")
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    aplicar_migraciones(cursor, conn)
+    yield cursor
+    cursor.close()
+    conn.close()
+
+
+@pytest.mark.parametrize("tabla, query, params, indice", CONSULTAS_CALIENTES, ids=[c[3] for c in CONSULTAS_CALIENTES])
+def test_busquedas_calientes_usan_indice(db, tabla, query, params, indice):
+    db.execute("SELECT TABLE_ROWS AS filas FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (tabla,))
+    info = db.fetchone()
+    if info is None:
+        pytest.skip(f"No existe la tabla {tabla}")
+
+    db.execute("EXPLAIN " + query, params)
+    [plan] = [row for row in db.fetchall() if row["table"] == tabla]
+    assert indice in (plan["possible_keys"] or "").split(","), plan
+    if (info["filas"] or 0) >= FILAS_MINIMAS_SIN_FULL_SCAN:
+        assert plan["type"] != "ALL", plan
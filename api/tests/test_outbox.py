@@ -0,0 +1,88 @@
+import pathlib, sys, json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from core.outbox import OutboxDispatcher
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = "error" if status_code >= 300 else "ok"
+
+
+class FakeCursor:
+    def __init__(self, rows, executed):
+        self.rows = rows
+        self.executed = executed
+
+    def execute(self, query, params=()):
+        self.executed.append((" ".join(query.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.rows, self.executed)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def _evento(id, topic):
+    return {"id": id, "topic": topic, "event_name": "alta", "payload": json.dumps({"id": id}),
+            "created_at": datetime(2025, 1, 1), "attempts": 0}
+
+
+def _dispatcher(rows, falla=()):
+    publicados = []
+
+    def publish(message_id, timestamp, topic, event_name, payload):
+        publicados.append(message_id)
+        return FakeResponse(500 if int(message_id) in falla else 200)
+
+    d = OutboxDispatcher(publish=publish)
+    d._conn = FakeConn(rows)
+    d._executor = ThreadPoolExecutor(max_workers=2)
+    return d, publicados
+
+
+def test_fallo_frena_solo_su_topic():
+    rows = [_evento(1, "pedido"), _evento(2, "pedido"), _evento(3, "pedido"), _evento(4, "zona")]
+    d, publicados = _dispatcher(rows, falla={2})
+
+    # Devuelve los publicados (no los leídos): con fallos el loop espera en vez de releer el lote
+    assert d.dispatch_once() == 2
+    # el 3 no se intenta: el 2 del mismo topic falló y tiene que salir antes
+    assert sorted(publicados) == ["1", "2", "4"]
+
+    updates = [(q, p) for q, p in d._conn.executed if q.startswith("UPDATE")]
+    assert updates[0][1] == (1, 4)
+    assert "next_attempt_at" in updates[1][0] and updates[1][1][-1] == 2
+    assert d._conn.commits == 1
+
+
+def test_eventos_en_backoff_se_filtran_en_la_consulta():
+    d, publicados = _dispatcher([])
+    assert d.dispatch_once() == 0
+    select, _ = d._conn.executed[0]
+    # Ni el evento en espera ni los siguientes de su topic ocupan lugar en el lote
+    assert "next_attempt_at > NOW()" in select and "en_espera.topic IS NULL" in select
+    assert "(e.next_attempt_at IS NULL OR e.next_attempt_at <= NOW())" in select
@@ -0,0 +1,62 @@
+import pathlib, sys
+import pytest
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from fastapi import HTTPException, Response
+from core.paginacion import encode_cursor, decode_cursor, parse_fields, aplicar_keyset, armar_respuesta, filtro_ids, MAX_LIMIT, NEXT_CURSOR_HEADER
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(1234)) == 1234
+
+
+def test_invalid_cursor_is_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("no-es-un-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_compat_mode_leaves_query_untouched():
+    params = []
+    query = aplicar_keyset("SELECT * FROM pedido WHERE 1=1", params, None, None)
+    assert query == "SELECT * FROM pedido WHERE 1=1"
+    assert params == []
+
+
+def test_keyset_adds_filter_order_and_extra_row():
+    params = ["x"]
+    query = aplicar_keyset("SELECT * FROM pedido WHERE 1=1", params, encode_cursor(10), 5)
+    assert query.endswith("AND id > %s ORDER BY id LIMIT %s")
+    assert params == ["x", 10, 6]
+
+
+def test_fields_always_include_id_and_reject_unknown():
+    assert parse_fields("nombre", {"id", "nombre"}) == ["id", "nombre"]
+    with pytest.raises(HTTPException):
+        parse_fields("password", {"id", "nombre"})
+
+
+def test_next_cursor_header_only_when_more_rows():
+    response = Response()
+    rows = armar_respuesta([{"id": 1}, {"id": 2}, {"id": 3}], 2, response)
+    assert [r["id"] for r in rows] == [1, 2]
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == 2
+
+    response = Response()
+    armar_respuesta([{"id": 1}], 2, response)
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+
+def test_filtro_ids_repetido_es_un_in():
+    params = ["x"]
+    query = filtro_ids("SELECT id FROM usuario WHERE 1=1", params, "id_usuario", [3, 5])
+    assert query == "SELECT id FROM usuario WHERE 1=1 AND id_usuario IN (%s, %s)"
+    assert params == ["x", 3, 5]
+    assert filtro_ids("q", params, "id_usuario", None) == "q"
+
+    with pytest.raises(HTTPException) as exc:
+        filtro_ids("q", [], "id_usuario", list(range(MAX_LIMIT + 1)))
+    assert exc.value.status_code == 400
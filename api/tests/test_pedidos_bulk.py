@@ -0,0 +1,126 @@
+import pathlib, sys
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+import pytest
+from comun.pedidos import NoEncontrado, crear_pedidos, cancelar_pedidos_de_solicitud
+
+
+class FakeCursor:
+    """Simula la tabla pedido (con el índice único por (id_pedido, id_prestador))."""
+
+    def __init__(self, existentes, prestadores=(1, 2, 3, 9)):
+        self.rows = list(existentes)
+        self.prestadores = set(prestadores)
+        self.executed = []
+        self.lastrowid = None
+        self._result = []
+
+    def execute(self, query, params=()):
+        self.executed.append(query)
+        if query.startswith("SELECT id FROM prestador WHERE id IN"):
+            self._result = [{"id": i} for i in params if i in self.prestadores]
+        elif query.startswith("SELECT * FROM pedido WHERE (id_pedido, id_prestador) IN"):
+            pares = set(zip(params[::2], params[1::2]))
+            self._result = [r for r in self.rows if (r["id_pedido"], r["id_prestador"]) in pares]
+        elif query.startswith("INSERT INTO pedido"):
+            for i in range(0, len(params), 10):
+                fila = params[i:i + 10]
+                clave = (fila[9], fila[4])
+                if None not in clave and any((r["id_pedido"], r["id_prestador"]) == clave for r in self.rows):
+                    continue  # ON DUPLICATE KEY UPDATE id = id
+                # Ids no consecutivos, como con auto_increment_increment > 1
+                self.lastrowid = max(r["id"] for r in self.rows) + 2
+                self.rows.append({"id": self.lastrowid, "id_prestador": fila[4], "id_pedido": fila[9]})
+        elif query.startswith("SELECT * FROM pedido WHERE id IN"):
+            self._result = [r for r in self.rows if r["id"] in params]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_crear_pedidos_un_insert_e_idempotente():
+    cursor = FakeCursor([{"id": 7, "id_pedido": 100, "id_prestador": 1}])
+    pedidos = [
+        dict(id_pedido=100, id_prestador=1),   # ya existe
+        dict(id_pedido=100, id_prestador=2),
+        dict(id_pedido=100, id_prestador=2),   # repetido en el lote
+        dict(id_pedido=100, id_prestador=3),
+    ]
+
+    filas = crear_pedidos(cursor, pedidos)
+
+    assert [f["id"] for f in filas] == [7, 9, 9, 11]
+    inserts = [q for q in cursor.executed if q.startswith("INSERT")]
+    assert len(inserts) == 1 and inserts[0].count("NOW(), NOW()") == 2
+    assert inserts[0].endswith("ON DUPLICATE KEY UPDATE id = id")
+
+    # Reenviar el mismo lote no crea nada nuevo
+    assert [f["id"] for f in crear_pedidos(cursor, pedidos)] == [7, 9, 9, 11]
+    assert len([q for q in cursor.executed if q.startswith("INSERT")]) == 1
+
+
+def test_crear_pedidos_con_alta_concurrente_devuelve_la_fila_existente():
+    cursor = FakeCursor([{"id": 1, "id_pedido": 50, "id_prestador": 9}])
+    execute = cursor.execute
+
+    def execute_con_carrera(query, params=()):
+        # Otro reintento inserta la misma clave entre el SELECT y el INSERT
+        if query.startswith("INSERT INTO pedido"):
+            cursor.rows.append({"id": 40, "id_pedido": 100, "id_prestador": 2})
+        execute(query, params)
+
+    cursor.execute = execute_con_carrera
+    filas = crear_pedidos(cursor, [dict(id_pedido=100, id_prestador=2)])
+
+    assert [f["id"] for f in filas] == [40]
+    assert len([r for r in cursor.rows if r["id_pedido"] == 100]) == 1
+    assert cursor.executed[-1].endswith("FOR UPDATE")
+
+
+def test_crear_pedidos_sin_clave_usa_lastrowid():
+    cursor = FakeCursor([{"id": 1, "id_pedido": 50, "id_prestador": 9}])
+    pedidos = [dict(id_prestador=2), dict(id_pedido=100, id_prestador=2), dict(id_prestador=2)]
+
+    filas = crear_pedidos(cursor, pedidos)
+
+    assert [(f["id"], f["id_pedido"]) for f in filas] == [(5, None), (3, 100), (7, None)]
+
+
+def test_crear_pedidos_valida_prestadores_antes_de_insertar():
+    cursor = FakeCursor([{"id": 1, "id_pedido": 50, "id_prestador": 9}])
+    with pytest.raises(NoEncontrado, match=r"Prestadores no encontrados: \[4\]"):
+        crear_pedidos(cursor, [dict(id_pedido=100, id_prestador=4), dict(id_pedido=100, id_prestador=2)])
+    assert not any(q.startswith("INSERT") for q in cursor.executed)
+
+
+class CancelCursor:
+    def __init__(self, ids):
+        self.ids = ids
+        self.executed = []
+        self._result = []
+
+    def execute(self, query, params=()):
+        self.executed.append(query.strip())
+        if query.startswith("SELECT id FROM pedido"):
+            self._result = [{"id": i} for i in self.ids]
+        elif "FROM" in query and "p.id IN" in query:
+            self._result = [{"id_pedido": 100, "estado": "cancelado"} for _ in params]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_cancelar_solicitud_un_update_y_un_insert_de_eventos():
+    cursor = CancelCursor([4, 5, 6])
+    assert cancelar_pedidos_de_solicitud(cursor, 100) == [4, 5, 6]
+    assert sum(q.startswith("UPDATE pedido") for q in cursor.executed) == 1
+    inserts = [q for q in cursor.executed if q.startswith("INSERT INTO eventos_publicados")]
+    assert len(inserts) == 1 and inserts[0].count("(%s, %s, %s, %s)") == 3
+
+    # Sin pedidos pendientes de cancelar no escribe nada
+    cursor = CancelCursor([])
+    assert cancelar_pedidos_de_solicitud(cursor, 100) == []
+    assert len(cursor.executed) == 1
@@ -0,0 +1,29 @@
+import pathlib, sys, json
+from datetime import date, datetime
+from decimal import Decimal
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from comun import serializacion
+
+
+def test_dumps_serializa_tipos_de_filas_igual_que_la_stdlib():
+    fila = {
+        "id": 1,
+        "fecha": datetime(2025, 3, 1, 10, 30, 15, 123456),
+        "dia": date(2025, 3, 1),
+        "tarifa": Decimal("1500.50"),
+        "nombre": "Muñoz",
+    }
+    esperado = json.loads(json.dumps(fila, default=serializacion.json_default))
+
+    assert json.loads(serializacion.dumps(fila)) == esperado
+    assert json.loads(serializacion.dumps_bytes(fila)) == esperado
+    assert "Muñoz" in serializacion.dumps(fila)
+
+
+def test_loads_acepta_str_y_bytes():
+    assert serializacion.loads('{"a": [1, 2]}') == {"a": [1, 2]}
+    assert serializacion.loads('{"n": "ñ"}'.encode("utf-8")) == {"n": "ñ"}
@@ -0,0 +1,68 @@
+import pathlib, sys
+from contextlib import contextmanager
+from datetime import datetime
+
+API_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from core.cache import MemoryBackend, catalogo
+from core.versiones import incrementar_version
+from routes import zonas
+
+
+class FakeCursor:
+    def __init__(self):
+        self.version = {"recurso": "zonas", "version": 3, "actualizado": datetime(2025, 5, 1, 12, 0, 0, 500000)}
+        self.queries = []
+        self._result = []
+
+    def execute(self, query, params=()):
+        self.queries.append((query, params))
+        if "version_recurso" in query:
+            self._result = [self.version]
+        else:
+            self._result = [{"id": 1, "nombre": "Palermo"}]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_etag_y_last_modified_responden_304(client, monkeypatch):
+    cursor = FakeCursor()
+
+    @contextmanager
+    def fake_connection():
+        yield cursor, None
+
+    monkeypatch.setattr(zonas, "get_connection", fake_connection)
+    monkeypatch.setattr(catalogo, "backend", MemoryBackend())
+
+    response = client.get("/zonas/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert response.headers["last-modified"] == "Thu, 01 May 2025 12:00:00 GMT"
+
+    no_modificado = client.get("/zonas/", headers={"If-None-Match": etag})
+    assert no_modificado.status_code == 304
+    assert no_modificado.content == b""
+    assert no_modificado.headers["etag"] == etag
+
+    assert client.get("/zonas/", headers={"If-Modified-Since": "Thu, 01 May 2025 12:00:00 GMT"}).status_code == 304
+    assert client.get("/zonas/", headers={"If-Modified-Since": "Thu, 01 May 2025 11:59:59 GMT"}).status_code == 200
+
+    # Otra versión (una escritura la subió e invalidó el cache): el ETag viejo ya no sirve
+    cursor.version = {**cursor.version, "version": 4}
+    catalogo.invalidate("zonas")
+    response = client.get("/zonas/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_incrementar_version_un_solo_upsert():
+    cursor = FakeCursor()
+    incrementar_version(cursor, "rubros", "habilidades")
+    [(query, params)] = cursor.queries
+    assert "ON DUPLICATE KEY UPDATE version = version + 1" in query
+    assert params == ("rubros", "habilidades")
@@ -0,0 +1,12 @@
+# ===========================
+# Código compartido entre servicios
+# ===========================
+# Lo que los servicios necesitan hacer igual (serialización, logging, outbox de
+# eventos, reglas de pedidos y calificaciones) vive acá una sola vez en lugar de copiarse.
+#
+# En el repo está en la raíz; el deploy la copia dentro de cada servicio
+# (api/comun, worker/comun, webhook/comun), así cada imagen se sigue construyendo con su propia
+# carpeta como contexto. Para correr un servicio desde el repo sin Docker:
+#     PYTHONPATH=.. uvicorn main:app        (desde api/)
+#     PYTHONPATH=.. python worker.py        (desde worker/)
+#     PYTHONPATH=.. uvicorn webhook:app     (desde webhook/)
@@ -0,0 +1,55 @@
+from comun.errores import DatosInvalidos, NoEncontrado
+
+# ===========================
+# Calificaciones: reglas compartidas por la API y el worker
+# ===========================
+# POST/PATCH /calificaciones (API) y el DbGateway del worker escriben las
+# calificaciones con estas funciones. Como en comun.pedidos, reciben un cursor de
+# diccionarios y trabajan dentro de la transacción del caller (no hacen commit).
+
+COLUMNAS_INSERT = ("estrellas", "descripcion", "id_prestador", "id_usuario", "id_calificacion")
+
+# Campos que se pueden modificar (PATCH /calificaciones/{id})
+CAMPOS_ACTUALIZABLES = ("estrellas", "descripcion", "id_calificacion")
+
+SELECT_CALIFICACION = "SELECT id, estrellas, descripcion, id_prestador, id_usuario, id_calificacion FROM calificacion"
+
+
+def _fila(cursor, calificacion_id):
+    cursor.execute(SELECT_CALIFICACION + " WHERE id = %s", (calificacion_id,))
+    return cursor.fetchone()
+
+
+def crear_calificacion(cursor, calificacion: dict) -> dict:
+    """Valida que existan el prestador y el usuario (NoEncontrado si no) e inserta la calificación. Devuelve la fila."""
+    cursor.execute("SELECT id FROM prestador WHERE id = %s", (calificacion.get("id_prestador"),))
+    if not cursor.fetchone():
+        raise NoEncontrado("Prestador no encontrado")
+    cursor.execute("SELECT id FROM usuario WHERE id = %s", (calificacion.get("id_usuario"),))
+    if not cursor.fetchone():
+        raise NoEncontrado("Usuario no encontrado")
+
+    cursor.execute(
+        f"INSERT INTO calificacion ({', '.join(COLUMNAS_INSERT)}) VALUES ({', '.join(['%s'] * len(COLUMNAS_INSERT))})",
+        tuple(calificacion.get(columna) for columna in COLUMNAS_INSERT),
+    )
+    return _fila(cursor, cursor.lastrowid)
+
+
+def actualizar_calificacion(cursor, calificacion_id, cambios: dict) -> dict:
+    """
+    Aplica `cambios` (solo CAMPOS_ACTUALIZABLES; DatosInvalidos si no queda ninguno)
+    y devuelve la fila. La existencia se verifica con SELECT ... FOR UPDATE, no con
+    el rowcount del UPDATE (pymysql cuenta solo las filas cambiadas).
+    """
+    campos = [key for key in CAMPOS_ACTUALIZABLES if key in cambios]
+    if not campos:
+        raise DatosInvalidos("No se enviaron campos válidos para actualizar")
+    cursor.execute("SELECT id FROM calificacion WHERE id = %s FOR UPDATE", (calificacion_id,))
+    if not cursor.fetchone():
+        raise NoEncontrado("Calificación no encontrada")
+    cursor.execute(
+        f"UPDATE calificacion SET {', '.join(f'{key}=%s' for key in campos)} WHERE id = %s",
+        (*(cambios[key] for key in campos), calificacion_id),
+    )
+    return _fila(cursor, calificacion_id)
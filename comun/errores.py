@@ -0,0 +1,13 @@
+# ===========================
+# Errores de las reglas compartidas (comun/)
+# ===========================
+# La API los traduce a HTTPException y el DbGateway del worker a un
+# GatewayResponse con el mismo status y detail.
+
+
+class NoEncontrado(Exception):
+    """La entidad (o una a la que hace referencia) no existe. La API responde 404."""
+
+
+class DatosInvalidos(Exception):
+    """El cambio pedido no se puede aplicar (p. ej. no trae campos). La API responde 400."""
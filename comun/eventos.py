@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from comun.serializacion import dumps
+
+# ===========================
+# Outbox de eventos (eventos_publicados)
+# ===========================
+# Las filas que escriben la API y el worker para que el dispatcher de la API
+# las publique en el CoreHub (ver api/core/outbox.py).
+
+INSERT_EVENTO = "INSERT INTO eventos_publicados (topic, event_name, payload, created_at) VALUES "
+VALORES_EVENTO = "(%s, %s, %s, %s)"
+
+
+def ahora_utc():
+    # created_at se guarda como DATETIME en UTC (sin tz); el dispatcher le agrega +00:00
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def insertar_eventos(cursor, eventos: list) -> None:
+    """
+    Inserta los eventos `(topic, event_name, payload)` con un solo INSERT multi-fila
+    dentro de la transacción del caller. Los ids se asignan en el orden de la lista.
+    No hace commit.
+    """
+    if not eventos:
+        return
+    created_at = ahora_utc()
+    params = []
+    for topic, event_name, payload in eventos:
+        params.extend((topic, event_name, dumps(payload), created_at))
+    cursor.execute(INSERT_EVENTO + ", ".join([VALORES_EVENTO] * len(eventos)), tuple(params))
@@ -0,0 +1,171 @@
+import atexit
+import copy
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from comun.serializacion import dumps
+
+# ===========================
+# Logging estructurado
+# ===========================
+# Lo usan los tres servicios: configure_logging("api" | "worker" | "webhook").
+# Una línea JSON por registro (LOG_FORMAT=text para leerlo en desarrollo). Los
+# módulos usan logging.getLogger(__name__) y formato perezoso
+# (log.info("pedido %s", id)): con el nivel apagado el mensaje no se arma.
+# El que loguea solo encola el registro; el JSON y la escritura a stdout los
+# hace un thread aparte (QueueHandler -> QueueListener).
+#
+# LOG_LEVEL       nivel raíz (INFO)
+# LOG_LEVELS      niveles por módulo: "core.events=DEBUG,uvicorn.access=WARNING"
+#                 (worker: "handlers=DEBUG,acks=WARNING")
+# LOG_SAMPLING    muestreo por módulo de los registros de menos de WARNING, uno
+#                 de cada N: "core.events=100". WARNING y ERROR pasan siempre.
+# LOG_QUEUE_SIZE  tope de la cola; si se llena se descartan los registros de
+#                 menos de WARNING en lugar de frenar al que loguea.
+# Se leen al llamar a configure_logging (después de load_dotenv).
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+# Atributos propios de LogRecord; el resto viene de extra={...} y va al JSON
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+def _parse_pares(valor: str) -> dict:
+    """'a=1,b.c=2' -> {'a': '1', 'b.c': '2'}"""
+    pares = {}
+    for item in valor.split(","):
+        nombre, _, dato = item.partition("=")
+        if nombre.strip() and dato.strip():
+            pares[nombre.strip()] = dato.strip()
+    return pares
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD:
+                data[clave] = valor
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        try:
+            return dumps(data)
+        except TypeError:
+            return dumps({clave: valor if isinstance(valor, (str, int, float, bool, type(None))) else str(valor)
+                          for clave, valor in data.items()})
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar uno de cada N registros (< WARNING) de los módulos configurados."""
+
+    def __init__(self, tasas: dict):
+        super().__init__()
+        self.tasas = tasas
+        self._contadores = {}
+
+    def _tasa(self, nombre: str) -> int:
+        # El módulo o el paquete más cercano configurado ("core" cubre "core.events")
+        while nombre:
+            if nombre in self.tasas:
+                return self.tasas[nombre]
+            nombre = nombre.rpartition(".")[0]
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        tasa = self._tasa(record.name)
+        if tasa <= 1:
+            return True
+        contador = self._contadores.get(record.name)
+        if contador is None:
+            contador = self._contadores.setdefault(record.name, itertools.count())
+        return next(contador) % tasa == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # En el thread que loguea solo se resuelven el mensaje y la traza (los
+        # args pueden cambiar después); el formato final lo arma el listener.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener = None
+_handler = None
+_anteriores = []
+
+
+def configure_logging(service: str):
+    """Reemplaza los handlers del logger raíz por la cola + listener. Idempotente."""
+    global _listener, _handler, _anteriores
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        salida.setFormatter(JsonFormatter(service))
+    else:
+        salida.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    _handler = NonBlockingQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    tasas = {nombre: int(n) for nombre, n in _parse_pares(os.getenv("LOG_SAMPLING", "")).items()}
+    if tasas:
+        _handler.addFilter(SamplingFilter(tasas))
+
+    root = logging.getLogger()
+    _anteriores = root.handlers[:]
+    for anterior in _anteriores:
+        root.removeHandler(anterior)
+    root.addHandler(_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for nombre, nivel in _parse_pares(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(nombre).setLevel(nivel.upper())
+
+    _listener = logging.handlers.QueueListener(_handler.queue, salida)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Vacía la cola, frena el listener y vuelve a dejar los handlers que había antes."""
+    global _listener, _handler, _anteriores
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_handler)
+    for anterior in _anteriores:
+        root.addHandler(anterior)
+    _listener = _handler = None
+    _anteriores = []
@@ -0,0 +1,217 @@
+from comun.errores import NoEncontrado
+from comun.eventos import insertar_eventos
+
+# ===========================
+# Pedidos: reglas compartidas por la API y el worker
+# ===========================
+# POST /pedidos/bulk, PATCH/DELETE /pedidos/{id} y la cancelación por solicitud
+# (API) y el DbGateway del worker escriben los pedidos con estas funciones.
+# Reciben un cursor de diccionarios (mysql-connector o pymysql) y trabajan
+# dentro de la transacción del caller: ninguna hace commit.
+#
+# Los eventos se escriben con `emitir(cursor, [(topic, event_name, payload), ...])`;
+# por defecto comun.eventos.insertar_eventos (la API pasa la versión con métricas).
+
+COLUMNAS_INSERT = (
+    "estado", "descripcion", "tarifa", "fecha", "id_prestador", "id_usuario", "id_habilidad", "direccion", "es_critico",
+    "fecha_creacion", "fecha_ultima_actualizacion", "id_pedido",
+)
+VALORES_INSERT = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s)"
+
+# Campos que se pueden modificar (PATCH /pedidos/{id})
+CAMPOS_ACTUALIZABLES = ("estado", "tarifa", "id_prestador", "fecha", "id_habilidad", "id_pedido", "es_critico", "direccion")
+
+# Estado nuevo -> evento que se publica
+PEDIDO_EVENTOS = {
+    "aprobado_por_prestador": "cotizacion_enviada",
+    "finalizado": "pedido_finalizado",
+    "cancelado": "pedido_cancelado",
+}
+
+# Payload de los eventos de pedido (ids externos de usuario y prestador)
+SELECT_EVENTO_PEDIDO = """
+    SELECT
+        p.estado, p.descripcion, p.tarifa, p.fecha_creacion, p.fecha_ultima_actualizacion, p.fecha, p.id_habilidad, p.es_critico, p.direccion, p.id_pedido,
+        u.id_usuario AS id_usuario,
+        pr.id_prestador AS id_prestador
+    FROM
+        pedido p
+    INNER JOIN
+        usuario u ON p.id_usuario = u.id
+    INNER JOIN
+        prestador pr ON p.id_prestador = pr.id
+"""
+
+
+def _clave(pedido: dict):
+    """Clave de idempotencia: (id_pedido, id_prestador), solo si vienen las dos."""
+    if pedido.get("id_pedido") is None or pedido.get("id_prestador") is None:
+        return None
+    return (pedido["id_pedido"], pedido["id_prestador"])
+
+
+def _valores(pedido: dict) -> tuple:
+    return (
+        pedido.get("estado") or "pendiente", pedido.get("descripcion"), pedido.get("tarifa"), pedido.get("fecha"),
+        pedido.get("id_prestador"), pedido.get("id_usuario"), pedido.get("id_habilidad"), pedido.get("direccion"),
+        bool(pedido.get("es_critico") or False), pedido.get("id_pedido"),
+    )
+
+
+def _insert(cantidad: int) -> str:
+    return f"INSERT INTO pedido ({', '.join(COLUMNAS_INSERT)}) VALUES {', '.join([VALORES_INSERT] * cantidad)}"
+
+
+def _filas_por_clave(cursor, claves, bloquear: bool = False) -> dict:
+    """{(id_pedido, id_prestador): fila}. Con bloquear=True es una lectura con FOR UPDATE."""
+    if not claves:
+        return {}
+    placeholders = ", ".join(["(%s, %s)"] * len(claves))
+    cursor.execute(
+        f"SELECT * FROM pedido WHERE (id_pedido, id_prestador) IN ({placeholders}) ORDER BY id"
+        + (" FOR UPDATE" if bloquear else ""),
+        tuple(v for k in claves for v in k),
+    )
+    filas = {}
+    for row in cursor.fetchall():
+        # Si quedaran duplicados de antes del índice único, gana el de menor id
+        filas.setdefault((row["id_pedido"], row["id_prestador"]), row)
+    return filas
+
+
+def ids_inexistentes(cursor, tabla: str, ids) -> list:
+    """Ids (no nulos) de `ids` que no existen en `tabla`, con una sola consulta."""
+    ids = sorted({i for i in ids if i is not None})
+    if not ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"SELECT id FROM {tabla} WHERE id IN ({placeholders})", tuple(ids))
+    existentes = {row["id"] for row in cursor.fetchall()}
+    return [i for i in ids if i not in existentes]
+
+
+def _bloquear_pedido(cursor, pedido_id):
+    cursor.execute("SELECT id FROM pedido WHERE id = %s FOR UPDATE", (pedido_id,))
+    if not cursor.fetchone():
+        raise NoEncontrado("Pedido no encontrado")
+
+
+def _fila_evento(cursor, pedido_id):
+    cursor.execute(SELECT_EVENTO_PEDIDO + " WHERE p.id = %s", (pedido_id,))
+    return cursor.fetchone()
+
+
+def crear_pedidos(cursor, pedidos: list) -> list:
+    """
+    Crea varios pedidos (dicts con las columnas de pedido) con un único INSERT multi-fila.
+
+    Valida antes que existan los prestadores y usuarios (NoEncontrado si falta alguno).
+    Es idempotente por (id_pedido, id_prestador): los que ya existen (o vienen
+    repetidos en la lista) no se vuelven a insertar y se devuelve la fila existente.
+    El índice único uq_pedido_pedido_prestador lo garantiza también entre
+    reintentos concurrentes. Devuelve una fila por pedido recibido, en el mismo orden.
+    """
+    faltan = ids_inexistentes(cursor, "prestador", (p.get("id_prestador") for p in pedidos))
+    if faltan:
+        raise NoEncontrado(f"Prestadores no encontrados: {faltan}")
+    faltan = ids_inexistentes(cursor, "usuario", (p.get("id_usuario") for p in pedidos))
+    if faltan:
+        raise NoEncontrado(f"Usuarios no encontrados: {faltan}")
+
+    por_clave = _filas_por_clave(cursor, list(dict.fromkeys(k for k in map(_clave, pedidos) if k is not None)))
+
+    con_clave, sin_clave, vistos = [], [], set(por_clave)
+    for pedido in pedidos:
+        clave = _clave(pedido)
+        if clave is None:
+            sin_clave.append(pedido)
+        elif clave not in vistos:
+            vistos.add(clave)
+            con_clave.append(pedido)
+
+    if con_clave:
+        # Si otra transacción insertó la misma clave después del SELECT, el INSERT
+        # no la duplica. Se releen por clave con FOR UPDATE: una lectura con lock ve
+        # la última versión confirmada (la del snapshot no vería la fila ajena).
+        cursor.execute(
+            _insert(len(con_clave)) + " ON DUPLICATE KEY UPDATE id = id",
+            tuple(v for p in con_clave for v in _valores(p)),
+        )
+        por_clave.update(_filas_por_clave(cursor, [_clave(p) for p in con_clave], bloquear=True))
+
+    # Sin clave no se pueden releer por (id_pedido, id_prestador): van de a uno,
+    # con su lastrowid (no se asume que un INSERT multi-fila dé ids consecutivos)
+    ids = []
+    for pedido in sin_clave:
+        cursor.execute(_insert(1), _valores(pedido))
+        ids.append(cursor.lastrowid)
+    por_id = {}
+    if ids:
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"SELECT * FROM pedido WHERE id IN ({placeholders})", tuple(ids))
+        por_id = {row["id"]: row for row in cursor.fetchall()}
+
+    ids = iter(ids)
+    return [por_clave[_clave(p)] if _clave(p) is not None else por_id[next(ids)] for p in pedidos]
+
+
+def actualizar_pedido(cursor, pedido_id, cambios: dict, emitir=insertar_eventos) -> dict:
+    """
+    Aplica `cambios` (solo CAMPOS_ACTUALIZABLES) y, si el estado nuevo tiene evento
+    (PEDIDO_EVENTOS), lo registra. Devuelve el pedido con el payload de los eventos.
+
+    La existencia se verifica con SELECT ... FOR UPDATE y no con el rowcount del
+    UPDATE: pymysql cuenta filas cambiadas, y reaplicar los mismos valores daría 0.
+    """
+    _bloquear_pedido(cursor, pedido_id)
+    campos, valores = [], []
+    for key in CAMPOS_ACTUALIZABLES:
+        if key in cambios:
+            campos.append(f"{key}=%s")
+            valores.append(cambios[key])
+    campos.append("fecha_ultima_actualizacion=NOW()")
+    cursor.execute(f"UPDATE pedido SET {', '.join(campos)} WHERE id = %s", (*valores, pedido_id))
+
+    pedido = _fila_evento(cursor, pedido_id)
+    event_name = PEDIDO_EVENTOS.get(cambios.get("estado"))
+    if event_name:
+        emitir(cursor, [("pedido", event_name, pedido)])
+    return pedido
+
+
+def cancelar_pedido(cursor, pedido_id, emitir=insertar_eventos) -> dict:
+    """Pasa el pedido a 'cancelado' y registra pedido_cancelado. Devuelve el payload del evento."""
+    _bloquear_pedido(cursor, pedido_id)
+    cursor.execute(
+        "UPDATE pedido SET estado = %s, fecha_ultima_actualizacion = NOW() WHERE id = %s",
+        ("cancelado", pedido_id),
+    )
+    pedido = _fila_evento(cursor, pedido_id)
+    emitir(cursor, [("pedido", "pedido_cancelado", pedido)])
+    return pedido
+
+
+def cancelar_pedidos_de_solicitud(cursor, id_pedido: int, emitir=insertar_eventos) -> list:
+    """
+    Pasa a 'cancelado' todos los pedidos de una solicitud (id_pedido externo) con
+    un solo UPDATE y registra sus eventos pedido_cancelado con un solo INSERT.
+
+    Los que ya estaban cancelados no se tocan ni generan evento. Devuelve los ids
+    internos cancelados.
+    """
+    cursor.execute(
+        "SELECT id FROM pedido WHERE id_pedido = %s AND estado <> 'cancelado' ORDER BY id FOR UPDATE",
+        (id_pedido,),
+    )
+    ids = [row["id"] for row in cursor.fetchall()]
+    if not ids:
+        return []
+
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(
+        f"UPDATE pedido SET estado = 'cancelado', fecha_ultima_actualizacion = NOW() WHERE id IN ({placeholders})",
+        tuple(ids),
+    )
+    cursor.execute(SELECT_EVENTO_PEDIDO + f" WHERE p.id IN ({placeholders}) ORDER BY p.id", tuple(ids))
+    emitir(cursor, [("pedido", "pedido_cancelado", fila) for fila in cursor.fetchall()])
+    return ids
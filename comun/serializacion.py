@@ -0,0 +1,61 @@
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende de lo instalado
+    orjson = None
+
+# ===========================
+# Serialización JSON
+# ===========================
+# Compartida por la API y el worker. Las filas de mysql-connector y pymysql
+# traen datetime/date/Decimal, que json.dumps no sabe serializar. En lugar de
+# recorrer cada dict antes de serializar, se le pasa `default` al encoder y solo
+# se convierten los valores que lo necesitan.
+#
+# Backend: orjson si está instalado (varias veces más rápido y trabaja en bytes),
+# si no la stdlib. JSON_BACKEND=json fuerza la stdlib.
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson is not None else "json")
+if JSON_BACKEND == "orjson" and orjson is None:
+    JSON_BACKEND = "json"
+
+
+def json_default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+if JSON_BACKEND == "orjson":
+    _OPCIONES = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, default=json_default, option=_OPCIONES)
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, default=json_default, option=_OPCIONES).decode("utf-8")
+
+    def loads(data):
+        """Acepta str, bytes o bytearray."""
+        return orjson.loads(data)
+
+else:
+    def dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+    def dumps_bytes(obj) -> bytes:
+        return dumps(obj).encode("utf-8")
+
+    def loads(data):
+        """Acepta str, bytes o bytearray."""
+        return json.loads(data)
@@ -0,0 +1,98 @@
+"""
+Benchmark: requests/s sostenidos del endpoint POST /webhook.
+
+Manda eventos con messageId únicos ('bench-ingesta-*') desde N clientes
+concurrentes (httpx.AsyncClient) durante --seconds segundos, contra un webhook
+levantado con su MySQL (uvicorn o el contenedor). Reporta req/s, p50/p95/p99 y
+errores por nivel de concurrencia.
+
+Los eventos usan el topic 'bench', que el worker ignora; conviene correrlo con
+el worker apagado. Con --cleanup borra las filas del benchmark al terminar
+(usa las mismas variables de entorno que el webhook: DB_HOST, MYSQL_USER, ...).
+
+Para comparar con el group commit, correrlo dos veces: con el webhook normal y
+con WEBHOOK_GROUP_COMMIT=true (ajustando WEBHOOK_GROUP_COMMIT_WAIT_MS y
+WEBHOOK_GROUP_COMMIT_MAX_ROWS).
+
+Uso (desde webhook/):
+    [WEBHOOK_GROUP_COMMIT=true] uvicorn webhook:app --port 8081
+    python -m benchmarks.bench_ingesta --url http://localhost:8081 [--levels 10 50 200] [--seconds 10] [--cleanup]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+
+import httpx
+
+_seq = itertools.count()
+
+
+async def cliente(client, fin, latencias, errores):
+    while time.perf_counter() < fin:
+        body = {
+            "messageId": f"bench-ingesta-{os.getpid()}-{next(_seq)}",
+            "timestamp": "2025-01-01T00:00:00+00:00",
+            "destination": {"topic": "bench", "eventName": "noop"},
+            "payload": {"n": 1},
+        }
+        inicio = time.perf_counter()
+        try:
+            response = await client.post("/webhook", json=body, headers={"x-subscription-id": "bench"})
+            if response.status_code >= 400:
+                errores[str(response.status_code)] = errores.get(str(response.status_code), 0) + 1
+            else:
+                latencias.append(time.perf_counter() - inicio)
+        except httpx.HTTPError as e:
+            errores[type(e).__name__] = errores.get(type(e).__name__, 0) + 1
+
+
+async def correr_nivel(url, concurrencia, segundos):
+    limits = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        latencias, errores = [], {}
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(client, inicio + segundos, latencias, errores) for _ in range(concurrencia)))
+        return latencias, errores, time.perf_counter() - inicio
+
+
+def limpiar():
+    import pymysql
+    conn = pymysql.connect(
+        host=os.getenv("DB_HOST", "localhost"), port=int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("MYSQL_USER"), password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE", "catalogo"),
+    )
+    with conn.cursor() as c:
+        borradas = c.execute("DELETE FROM inbound_events WHERE message_id LIKE 'bench-ingesta-%%'")
+    conn.commit()
+    conn.close()
+    print(f"{borradas} filas del benchmark borradas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8081")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    print(f"POST {args.url}/webhook durante {args.seconds:.0f}s por nivel")
+    print(f"{'clientes':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errores")
+    try:
+        for concurrencia in args.levels:
+            latencias, errores, duracion = asyncio.run(correr_nivel(args.url, concurrencia, args.seconds))
+            latencias.sort()
+            p = lambda q: latencias[min(len(latencias) - 1, int(len(latencias) * q))] * 1000 if latencias else float("nan")
+            p50 = statistics.median(latencias) * 1000 if latencias else float("nan")
+            print(f"{concurrencia:>8} {len(latencias) / duracion:>9.1f} {p50:>8.1f} {p(0.95):>8.1f} {p(0.99):>8.1f}  {errores or '-'}")
+    finally:
+        if args.cleanup:
+            limpiar()
+
+
+if __name__ == "__main__":
+    main()
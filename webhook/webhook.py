@@ -1,22 +1,21 @@
 from fastapi import FastAPI, Request, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
-import os, json, logging, pymysql
+from contextlib import asynccontextmanager
+import asyncio, os, logging, pymysql, queue, socket, time
 from dotenv import load_dotenv
+from comun.logs import configure_logging
+from comun.serializacion import loads
 
 # ===========================
 # Cargar variables desde .env
 # ===========================
 load_dotenv()
 
-# Config logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
+# Config logger (JSON por una cola, ver comun/logs.py)
+configure_logging("webhook")
 log = logging.getLogger("webhook")
 
-app = FastAPI()
-
 # ===========================
 # Configuración DB desde env
 # ===========================
@@ -32,12 +31,267 @@ missing = [k for k in REQUIRED if not os.getenv(k)]
 if missing:
     raise SystemExit(f"Faltan variables de entorno: {', '.join(missing)}")
 
+# ===========================
+# Aviso al worker (UDP, best effort)
+# ===========================
+# Después de guardar el evento se manda un datagrama al worker para que lo
+# procese sin esperar su próximo poll. Si se pierde, el poll lo levanta igual.
+# WORKER_WAKEUP_ADDR=host:puerto (ej. worker:9099); vacío = desactivado.
+WORKER_WAKEUP_ADDR = os.getenv("WORKER_WAKEUP_ADDR", "")
+# El nombre se resuelve en segundo plano (nunca en el request): al arrancar y
+# después cada WAKEUP_RESOLVE_TTL_SEC, porque el worker puede cambiar de IP al
+# reiniciarse. Si el DNS falla se reintenta con backoff y mientras tanto se usa
+# la última IP conocida (o no se avisa, y queda el poll).
+WAKEUP_RESOLVE_TTL_SEC = 60
+WAKEUP_RESOLVE_RETRY_MIN_SEC = 1
+_wakeup_sock = None
+_wakeup_host, _wakeup_port = None, None
+_wakeup_ip = None
+if WORKER_WAKEUP_ADDR:
+    _wakeup_host, _, _port = WORKER_WAKEUP_ADDR.rpartition(":")
+    _wakeup_port = int(_port)
+    _wakeup_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    _wakeup_sock.setblocking(False)
+
+async def resolve_wakeup_addr():
+    """Mantiene resuelta la IP del worker (loop.getaddrinfo corre fuera del event loop)."""
+    global _wakeup_ip
+    loop = asyncio.get_running_loop()
+    retry = WAKEUP_RESOLVE_RETRY_MIN_SEC
+    while True:
+        try:
+            infos = await loop.getaddrinfo(_wakeup_host, _wakeup_port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            _wakeup_ip = infos[0][4][0]
+            retry = WAKEUP_RESOLVE_RETRY_MIN_SEC
+            await asyncio.sleep(WAKEUP_RESOLVE_TTL_SEC)
+        except OSError as e:
+            log.warning("No se pudo resolver %s (reintento en %ss): %s", _wakeup_host, retry, e)
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, WAKEUP_RESOLVE_TTL_SEC)
+
+def notify_worker():
+    if _wakeup_sock is None or _wakeup_ip is None:
+        return
+    try:
+        _wakeup_sock.sendto(b"1", (_wakeup_ip, _wakeup_port))
+    except OSError as e:
+        log.debug("No se pudo avisar al worker: %s", e)
+
 def db():
     return pymysql.connect(
         host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASS,
         database=DB_NAME, cursorclass=pymysql.cursors.DictCursor, autocommit=True
     )
 
+# ===========================
+# Pool de conexiones
+# ===========================
+# Conexiones abiertas que se reusan entre requests (antes se abría una por POST
+# y no se cerraba). El INSERT corre en el threadpool para no bloquear el event
+# loop. Una conexión que estuvo quieta más de DB_PING_INTERVAL_SEC se pinguea
+# antes de usarla; si falla el ping o una operación, se cierra y se descarta.
+DB_POOL_SIZE = int(os.getenv("WEBHOOK_DB_POOL_SIZE", "8"))
+DB_PING_INTERVAL_SEC = float(os.getenv("DB_PING_INTERVAL_SEC", "30"))
+_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def checkout():
+    try:
+        conn, last_used = _pool.get_nowait()
+    except queue.Empty:
+        return db()
+    if time.monotonic() - last_used >= DB_PING_INTERVAL_SEC:
+        try:
+            conn.ping(reconnect=True)
+        except Exception:
+            # La conexión no vuelve al pool: se cierra y se abre una nueva
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return db()
+    return conn
+
+def checkin(conn):
+    try:
+        _pool.put_nowait((conn, time.monotonic()))
+    except queue.Full:
+        conn.close()
+
+def close_pool():
+    while True:
+        try:
+            conn, _ = _pool.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+INBOUND_EVENTS_DDL = """
+    CREATE TABLE IF NOT EXISTS inbound_events (
+      id BIGINT AUTO_INCREMENT PRIMARY KEY,
+      message_id VARCHAR(128) NOT NULL UNIQUE,
+      subscription_id VARCHAR(128) NULL,
+      topic VARCHAR(200),
+      event_name VARCHAR(100),
+      payload JSON NOT NULL,
+      received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      processed_at TIMESTAMP NULL,
+      status ENUM('pending','processing','done','error') DEFAULT 'pending',
+      error_text TEXT NULL,
+      INDEX idx_inbound_events_status (status, received_at, id)
+    )
+"""
+
+def ensure_schema():
+    """Crea inbound_events si no existe. Se corre una vez al arrancar (las columnas del worker las agrega api/migrations/006)."""
+    conn = checkout()
+    try:
+        with conn.cursor() as c:
+            c.execute(INBOUND_EVENTS_DDL)
+    except Exception:
+        conn.close()
+        raise
+    checkin(conn)
+
+def persist_event(msg_id, subscription, topic, event_name, payload):
+    """El único acceso a la DB del hot path: un INSERT idempotente por messageId."""
+    persist_events([(msg_id, subscription, topic, event_name, payload)])
+
+def persist_events(rows):
+    """Un solo INSERT multi-fila (autocommit: un solo commit) para varios eventos."""
+    conn = checkout()
+    try:
+        with conn.cursor() as c:
+            c.execute(f"""
+                INSERT INTO inbound_events (message_id, subscription_id, topic, event_name, payload)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))}
+                ON DUPLICATE KEY UPDATE payload = VALUES(payload)
+            """, tuple(v for row in rows for v in row))
+    except Exception:
+        conn.close()
+        raise
+    checkin(conn)
+
+# ===========================
+# Group commit (opcional)
+# ===========================
+# Con WEBHOOK_GROUP_COMMIT=true los requests concurrentes no hacen cada uno su
+# INSERT: se encolan y un flusher los escribe juntos en un INSERT multi-fila
+# cuando pasan WEBHOOK_GROUP_COMMIT_WAIT_MS desde el primero o se juntan
+# WEBHOOK_GROUP_COMMIT_MAX_ROWS. Cada request espera a que su lote esté
+# confirmado antes de responder 200, así que la garantía es la misma que antes
+# (si el INSERT del lote falla, todos sus requests responden 500).
+GROUP_COMMIT = os.getenv("WEBHOOK_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+GROUP_COMMIT_MAX_ROWS = int(os.getenv("WEBHOOK_GROUP_COMMIT_MAX_ROWS", "100"))
+GROUP_COMMIT_WAIT_MS = float(os.getenv("WEBHOOK_GROUP_COMMIT_WAIT_MS", "5"))
+
+class GroupCommitter:
+    def __init__(self, max_rows: int, wait_ms: float):
+        self.max_rows = max_rows
+        self.wait = wait_ms / 1000
+        self._buffer = []
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Deja de aceptar eventos y espera a que el flusher baje lo que quedó (sin cortar un lote a medias)."""
+        self._stopping = True
+        self._arrived.set()
+        self._full.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                log.error("El group commit terminó con error al apagarse: %s", e)
+            self._task = None
+        while self._buffer:
+            await self._flush()
+
+    async def submit(self, row):
+        """Encola el evento y vuelve cuando su lote quedó confirmado en la DB."""
+        if self._stopping:
+            raise RuntimeError("El webhook se está apagando")
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((row, future))
+        self._arrived.set()
+        if len(self._buffer) >= self.max_rows:
+            self._full.set()
+        await future
+
+    async def _run(self):
+        # Al apagarse sigue hasta vaciar el buffer y sale
+        while not self._stopping or self._buffer:
+            await self._arrived.wait()
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.wait)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._buffer = self._buffer[:self.max_rows], self._buffer[self.max_rows:]
+        if not self._buffer:
+            self._arrived.clear()
+        if len(self._buffer) < self.max_rows:
+            self._full.clear()
+        if not batch:
+            return
+        try:
+            await run_in_threadpool(persist_events, [row for row, _ in batch])
+        except asyncio.CancelledError:
+            # Los requests del lote responden 500 en vez de quedar colgados
+            self._fail(batch, RuntimeError("Group commit cancelado"))
+            raise
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+        log.debug("📝 Group commit: %s eventos en un INSERT", len(batch))
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+group_committer = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global group_committer
+    resolver = asyncio.create_task(resolve_wakeup_addr()) if _wakeup_sock is not None else None
+    try:
+        await run_in_threadpool(ensure_schema)
+    except Exception as e:
+        # No frena el arranque: el worker también crea la tabla al iniciar
+        log.error(f"No se pudo verificar inbound_events al arrancar: {e}")
+    if GROUP_COMMIT:
+        group_committer = GroupCommitter(GROUP_COMMIT_MAX_ROWS, GROUP_COMMIT_WAIT_MS)
+        group_committer.start()
+    yield
+    if group_committer is not None:
+        await group_committer.stop()
+        group_committer = None
+    if resolver is not None:
+        resolver.cancel()
+        try:
+            await resolver
+        except asyncio.CancelledError:
+            pass
+    close_pool()
+
+app = FastAPI(lifespan=lifespan)
+
 # ===========================
 # Healthcheck endpoint
 # ===========================
@@ -55,10 +309,14 @@ async def webhook(
     x_subscription_id: str | None = Header(default=None),
 ):
     raw = await request.body()
-    log.info("📩 New request received")
+    log.debug("📩 New request received")
 
     try:
-        body = json.loads(raw.decode("utf-8"))
+        # El body se guarda tal cual llegó (sin volver a serializarlo); solo se
+        # parsea para leer messageId y destination. Se guarda como str porque la
+        # columna JSON no acepta bytes con charset binario.
+        payload = raw.decode("utf-8")
+        body = loads(payload)
     except Exception:
         log.warning("❌ Invalid JSON received")
         raise HTTPException(status_code=400, detail="Invalid JSON")
@@ -74,39 +332,24 @@ async def webhook(
         log.warning("⚠️ Request missing messageId, rejecting")
         raise HTTPException(status_code=400, detail="Missing messageId")
 
-    log.info(
-        f"✅ Request parsed: messageId={msg_id}, subscriptionId={subscription}, "
-        f"topic={topic}, eventName={event_name}"
+    log.debug(
+        "✅ Request parsed: messageId=%s, subscriptionId=%s, topic=%s, eventName=%s",
+        msg_id, subscription, topic, event_name,
     )
 
-    # Persistencia idempotente
+    # Persistencia idempotente (en el threadpool, con una conexión del pool)
     try:
-        conn = db()
-        with conn.cursor() as c:
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS inbound_events (
-                  id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                  message_id VARCHAR(128) NOT NULL UNIQUE,
-                  subscription_id VARCHAR(128) NULL,
-                  topic VARCHAR(200),
-                  event_name VARCHAR(100),
-                  payload JSON NOT NULL,
-                  received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  processed_at TIMESTAMP NULL,
-                  status ENUM('pending','processing','done','error') DEFAULT 'pending',
-                  error_text TEXT NULL
-                )
-            """)
-            c.execute("""
-                INSERT INTO inbound_events (message_id, subscription_id, topic, event_name, payload)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE payload = VALUES(payload)
-            """, (msg_id, subscription, topic, event_name, json.dumps(body)))
-        log.info(f"📝 Event persisted in DB: messageId={msg_id}")
+        row = (msg_id, subscription, topic, event_name, payload)
+        if group_committer is not None:
+            await group_committer.submit(row)
+        else:
+            await run_in_threadpool(persist_event, *row)
+        log.info("📝 Event persisted in DB: messageId=%s", msg_id)
+        notify_worker()
     except Exception as e:
-        log.exception(f"💥 DB insert failed for messageId={msg_id}: {e}")
+        log.exception("💥 DB insert failed for messageId=%s: %s", msg_id, e)
         raise HTTPException(status_code=500, detail="Persistence failed")
 
     # Responder rápido 2xx
-    log.info(f"✅ Responding 200 OK for messageId={msg_id}")
+    log.debug("✅ Responding 200 OK for messageId=%s", msg_id)
     return JSONResponse({"received": True, "messageId": msg_id})
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core_ack import send_ack
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# ACKs al CoreHub en lote
+# ===========================
+# El ACK ya no se manda dentro de process_message: un evento con status='done' y
+# acked_at NULL es un ACK pendiente. Esa marca se guarda en el mismo commit que el
+# 'done', así que si el worker se cae no se pierde ningún ACK.
+#
+# Un thread aparte junta los pendientes y los manda cuando se acumulan
+# WORKER_ACK_BATCH_SIZE avisos o pasan WORKER_ACK_FLUSH_SEC segundos. El CoreHub
+# solo tiene ACK por mensaje, así que cada lote se manda con llamadas en paralelo
+# (WORKER_ACK_CONCURRENCY) sobre las sesiones con keep-alive de clientes_http.
+# Los que fallan quedan pendientes y se reintentan en el próximo flush, hasta
+# WORKER_ACK_MAX_ATTEMPTS intentos.
+
+WORKER_ACK_BATCH_SIZE = int(os.getenv("WORKER_ACK_BATCH_SIZE", "50"))
+WORKER_ACK_FLUSH_SEC = float(os.getenv("WORKER_ACK_FLUSH_SEC", "1"))
+WORKER_ACK_CONCURRENCY = int(os.getenv("WORKER_ACK_CONCURRENCY", "4"))
+WORKER_ACK_MAX_ATTEMPTS = int(os.getenv("WORKER_ACK_MAX_ATTEMPTS", "10"))
+
+
+class AckBatcher:
+    def __init__(self, send=send_ack, batch_size=50, flush_interval=1.0, concurrency=4, max_attempts=10):
+        self._send = send
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._connections = None
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._executor = None
+
+    def start(self, connections):
+        if self._thread is not None:
+            return
+        self._connections = connections
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ack")
+        self._thread = threading.Thread(target=self._run, name="ack-batcher", daemon=True)
+        self._thread.start()
+        log.info(f"ACKs en lote: batch={self.batch_size} flush={self.flush_interval}s concurrency={self.concurrency}")
+
+    def notify(self):
+        """Avisa que hay un ACK pendiente más (ya persistido). Con `batch_size` avisos se adelanta el flush."""
+        with self._cond:
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stop and self._pending < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stop = self._stop
+                self._pending = 0
+            try:
+                # Si hay más de un lote pendiente (y no hubo fallos), se siguen mandando sin esperar
+                while self.flush_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                log.exception(f"Error mandando ACKs, se reintenta en el próximo flush: {e}")
+            if stop:
+                return
+
+    def flush_once(self) -> int:
+        """Manda un lote de ACKs pendientes. Devuelve cuántos salieron bien."""
+        with self._connections.connection() as conn:
+            with conn.cursor() as c:
+                c.execute("""
+                    SELECT id, message_id, subscription_id FROM inbound_events
+                    WHERE status='done' AND acked_at IS NULL AND subscription_id IS NOT NULL
+                      AND ack_attempts < %s
+                    ORDER BY id
+                    LIMIT %s
+                """, (self.max_attempts, self.batch_size))
+                rows = c.fetchall()
+            conn.rollback()
+            if not rows:
+                return 0
+
+            inicio = time.perf_counter()
+            resultados = list(self._executor.map(
+                lambda row: self._send(row["message_id"], row["subscription_id"]), rows
+            ))
+            ok = [row["id"] for row, enviado in zip(rows, resultados) if enviado]
+            fallidos = [row["id"] for row, enviado in zip(rows, resultados) if not enviado]
+
+            with conn.cursor() as c:
+                if ok:
+                    c.execute(
+                        f"UPDATE inbound_events SET acked_at=NOW() WHERE id IN ({', '.join(['%s'] * len(ok))})",
+                        tuple(ok),
+                    )
+                if fallidos:
+                    c.execute(
+                        f"UPDATE inbound_events SET ack_attempts=ack_attempts+1 WHERE id IN ({', '.join(['%s'] * len(fallidos))})",
+                        tuple(fallidos),
+                    )
+            conn.commit()
+            log.info(f"ACKs enviados: {len(ok)} ok, {len(fallidos)} fallidos en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            return len(ok)
+
+
+ack_batcher = AckBatcher(
+    batch_size=WORKER_ACK_BATCH_SIZE,
+    flush_interval=WORKER_ACK_FLUSH_SEC,
+    concurrency=WORKER_ACK_CONCURRENCY,
+    max_attempts=WORKER_ACK_MAX_ATTEMPTS,
+)
+
+
+def notify_ack():
+    ack_batcher.notify()
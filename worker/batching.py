@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from comun.serializacion import loads
+
+# ===========================
+# Agrupado de eventos por entidad
+# ===========================
+# El worker toma los eventos en lotes y los procesa en paralelo, pero los que
+# tocan la misma entidad (misma solicitud, mismo usuario/prestador) tienen que
+# procesarse en orden de llegada. Cada evento se traduce a un conjunto de claves
+# de entidad; los eventos que comparten alguna clave (directa o transitivamente)
+# quedan en el mismo grupo, y cada grupo se procesa en serie.
+
+
+def _add(keys, kind, value):
+    if value is not None and value != "":
+        keys.add((kind, str(value)))
+
+
+def entity_keys(topic, payload):
+    """Claves de entidad de un evento de inbound_events (payload ya parseado)."""
+    keys = set()
+    data = payload.get("payload") if isinstance(payload, dict) else None
+    if not isinstance(data, dict):
+        return keys
+
+    if topic == "user":
+        _add(keys, "user", data.get("userId"))
+
+    elif topic in ("solicitud", "cotizacion", "calificacion"):
+        _add(keys, "solicitud", data.get("solicitud_id"))
+        _add(keys, "solicitud", data.get("solicitudId"))
+        # Los ids externos de usuario/prestador son los userId de los eventos de "user":
+        # un pedido no puede crearse antes que el usuario o prestador al que apunta.
+        _add(keys, "user", data.get("prestador_id"))
+        _add(keys, "user", data.get("usuario_id"))
+        for solicitud in data.get("solicitudes") or []:
+            if not isinstance(solicitud, dict):
+                continue
+            _add(keys, "solicitud", solicitud.get("solicitudId"))
+            _add(keys, "user", solicitud.get("usuarioId"))
+            for prestador in solicitud.get("top3") or []:
+                if isinstance(prestador, dict):
+                    _add(keys, "user", prestador.get("prestadorId"))
+
+    return keys
+
+
+def _parse(row):
+    payload = row.get("payload")
+    if isinstance(payload, (str, bytes)):
+        try:
+            return loads(payload)
+        except ValueError:
+            return None
+    return payload
+
+
+def group_by_entity(rows):
+    """
+    Parte un lote (ya ordenado por llegada) en grupos independientes.
+    Dentro de cada grupo se conserva el orden original.
+    """
+    parent = list(range(len(rows)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for i, row in enumerate(rows):
+        for key in entity_keys(row.get("topic"), _parse(row)):
+            if key in owner:
+                a, b = find(i), find(owner[key])
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+            else:
+                owner[key] = i
+
+    groups = OrderedDict()
+    for i, row in enumerate(rows):
+        groups.setdefault(find(i), []).append(row)
+    return list(groups.values())
@@ -0,0 +1,98 @@
+"""
+Benchmark: latencia desde que un evento entra a inbound_events hasta que lo toma un handler.
+
+Levanta el loop real del worker (run) en un thread contra una MySQL local y, como
+haría el webhook, inserta eventos de a uno y manda el aviso UDP. Mide el tiempo
+desde el INSERT hasta que se llama al handler del evento.
+
+Correrlo una vez por backend para comparar:
+    python -m benchmarks.bench_wakeup_latency --backend udp
+    python -m benchmarks.bench_wakeup_latency --backend none   # solo poll con backoff
+
+Usa las mismas variables de entorno que el worker (DB_HOST, DB_PORT, MYSQL_USER, ...)
+y necesita las migraciones de la API aplicadas (python -m core.migraciones desde api/).
+Las filas del benchmark usan message_id 'bench-lat-*' y se borran al terminar.
+"""
+import argparse
+import json
+import logging
+import pathlib
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+
+WORKER_DIR = pathlib.Path(__file__).resolve().parents[1]
+# También la raíz del repo, por el paquete comun/
+for path in (WORKER_DIR.parent, WORKER_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import process
+import worker
+
+WAKEUP_ADDR = "127.0.0.1:9199"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("udp", "none"), default="udp")
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--gap-ms", type=float, default=300, help="pausa media entre eventos (el worker queda ocioso)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    worker.WAKEUP_BACKEND = args.backend
+    worker.WAKEUP_ADDR = WAKEUP_ADDR
+
+    handled = {}
+    done = threading.Condition()
+
+    def handle(event_name, payload, gateway):
+        with done:
+            handled[payload["payload"]["seq"]] = time.perf_counter()
+            done.notify_all()
+
+    process.users.handle = handle
+
+    conn = worker.db()
+    faltantes = worker.columnas_faltantes(conn)
+    if faltantes:
+        raise SystemExit(f"A inbound_events le faltan {', '.join(faltantes)}: aplicar las migraciones de la API")
+    threading.Thread(target=worker.run, daemon=True).start()
+    time.sleep(0.5)
+
+    host, port = WAKEUP_ADDR.split(":")
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    latencias = []
+    try:
+        for seq in range(args.events):
+            time.sleep(random.uniform(0, 2 * args.gap_ms) / 1000)
+            inicio = time.perf_counter()
+            with conn.cursor() as c:
+                c.execute(
+                    "INSERT INTO inbound_events (message_id, topic, event_name, payload) VALUES (%s, %s, %s, %s)",
+                    (f"bench-lat-{seq}-{time.time_ns()}", "user", "bench_noop", json.dumps({"payload": {"seq": seq}})),
+                )
+            conn.commit()
+            if args.backend == "udp":
+                sock.sendto(b"1", (host, int(port)))
+            with done:
+                done.wait_for(lambda: seq in handled, timeout=10)
+            latencias.append((handled[seq] - inicio) * 1000)
+    finally:
+        with conn.cursor() as c:
+            c.execute("DELETE FROM inbound_events WHERE message_id LIKE 'bench-lat-%%'")
+        conn.commit()
+        conn.close()
+
+    latencias.sort()
+    print(f"backend={args.backend} eventos={len(latencias)}")
+    print(f"p50={statistics.median(latencias):.1f} ms  "
+          f"p95={latencias[int(len(latencias) * 0.95) - 1]:.1f} ms  max={latencias[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: throughput del worker con claim por lotes y procesamiento concurrente.
+
+Carga N eventos sintéticos en inbound_events de una MySQL local y los procesa con
+distintas combinaciones de WORKER_BATCH_SIZE / WORKER_CONCURRENCY. La combinación
+batch=1 / concurrency=1 equivale al loop anterior (claim_one + proceso sincrónico).
+
+Los eventos son del topic "user" con un event_name que el handler ignora, así se
+mide el costo propio del worker (claim, lectura, UPDATE a 'done'). Con --handler-ms
+se simula la latencia de la llamada HTTP a la API que hacen los handlers reales.
+
+Usa las mismas variables de entorno que el worker (DB_HOST, DB_PORT, MYSQL_USER, ...)
+y necesita las migraciones de la API aplicadas (python -m core.migraciones desde api/).
+Las filas del benchmark usan message_id 'bench-*' y se borran al terminar.
+
+Uso (desde worker/):
+    python -m benchmarks.bench_worker_throughput [--events 2000] [--entities 200] [--handler-ms 20]
+"""
+import argparse
+import json
+import logging
+import pathlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WORKER_DIR = pathlib.Path(__file__).resolve().parents[1]
+# También la raíz del repo, por el paquete comun/
+for path in (WORKER_DIR.parent, WORKER_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import process
+import worker
+
+CONFIGS = ((1, 1), (20, 1), (20, 4), (50, 8), (100, 16))
+
+
+def cargar_eventos(conn, total, entidades):
+    with conn.cursor() as c:
+        c.execute("DELETE FROM inbound_events WHERE message_id LIKE 'bench-%%'")
+        filas = [
+            (f"bench-{i}", "user", "bench_noop", json.dumps({"payload": {"userId": i % entidades}}))
+            for i in range(total)
+        ]
+        c.executemany(
+            "INSERT INTO inbound_events (message_id, topic, event_name, payload) VALUES (%s, %s, %s, %s)",
+            filas,
+        )
+    conn.commit()
+
+
+def reiniciar(conn):
+    with conn.cursor() as c:
+        c.execute("UPDATE inbound_events SET status='pending', processed_at=NULL WHERE message_id LIKE 'bench-%%'")
+    conn.commit()
+
+
+def correr(batch, concurrency):
+    executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+    conn = worker.connections.get()
+    procesados = 0
+    inicio = time.perf_counter()
+    try:
+        while True:
+            rows = worker.claim_batch(conn, batch)
+            if not rows:
+                break
+            worker.process_batch(rows, executor)
+            procesados += len(rows)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return procesados, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--entities", type=int, default=200, help="userIds distintos (eventos del mismo userId van en serie)")
+    parser.add_argument("--handler-ms", type=float, default=0.0, help="latencia simulada por handler")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    if args.handler_ms:
+        process.users.handle = lambda *a, **kw: time.sleep(args.handler_ms / 1000)
+
+    conn = worker.db()
+    try:
+        faltantes = worker.columnas_faltantes(conn)
+        if faltantes:
+            raise SystemExit(f"A inbound_events le faltan {', '.join(faltantes)}: aplicar las migraciones de la API")
+        cargar_eventos(conn, args.events, args.entities)
+
+        print(f"{args.events} eventos, {args.entities} entidades, handler {args.handler_ms} ms")
+        print(f"{'batch':>6} {'conc':>5} {'eventos':>8} {'seg':>8} {'ev/s':>9}")
+        for batch, concurrency in CONFIGS:
+            reiniciar(conn)
+            procesados, segundos = correr(batch, concurrency)
+            print(f"{batch:>6} {concurrency:>5} {procesados:>8} {segundos:>8.2f} {procesados / segundos:>9.1f}")
+    finally:
+        with conn.cursor() as c:
+            c.execute("DELETE FROM inbound_events WHERE message_id LIKE 'bench-%%'")
+        conn.commit()
+        conn.close()
+        worker.connections.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import HTTP_CLIENT_IN_FLIGHT, HTTP_CLIENT_NEW_CONNECTIONS, HTTP_CLIENT_SECONDS
+from comun.serializacion import dumps_bytes
+
+# ===========================
+# Sesiones HTTP compartidas
+# ===========================
+# Una requests.Session por destino ("api", "corehub") y por thread: las conexiones
+# quedan abiertas (keep-alive) entre eventos en lugar de abrir DNS + TCP + TLS en
+# cada llamada. Es por thread porque Session no garantiza ser thread-safe y el
+# worker procesa grupos en paralelo. Todas las llamadas llevan timeout de
+# conexión y de lectura explícitos.
+
+HTTP_CONNECT_TIMEOUT_SEC = float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", "3"))
+HTTP_READ_TIMEOUT_SEC = float(os.getenv("HTTP_READ_TIMEOUT_SEC", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "4"))
+
+_local = threading.local()
+
+
+class _AdapterContado(HTTPAdapter):
+    """HTTPAdapter que cuenta las conexiones TCP nuevas del destino (los pools de urllib3 no exponen un hook)."""
+
+    def __init__(self, destino: str, **kwargs):
+        self.destino = destino
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        contador = HTTP_CLIENT_NEW_CONNECTIONS.labels(destino=self.destino)
+
+        def contar(new_conn):
+            def _new_conn(pool):
+                contador.inc()
+                return new_conn(pool)
+            return _new_conn
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(cls.__name__, (cls,), {"_new_conn": contar(cls._new_conn)})
+            for scheme, cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+def get_session(destino: str) -> requests.Session:
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    session = sessions.get(destino)
+    if session is None:
+        session = requests.Session()
+        adapter = _AdapterContado(destino, pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        sessions[destino] = session
+    return session
+
+
+def request(destino: str, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    requests.request con la sesión del destino; `timeout` (lectura) por defecto HTTP_READ_TIMEOUT_SEC.
+    Registra requests en curso, duración y conexiones nuevas por destino (metrics.py).
+    """
+    if kwargs.get("json") is not None:
+        # El body se serializa con serializacion (orjson) en vez del json de requests
+        kwargs["data"] = dumps_bytes(kwargs.pop("json"))
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
+    HTTP_CLIENT_IN_FLIGHT.labels(destino=destino).inc()
+    inicio = time.perf_counter()
+    try:
+        return get_session(destino).request(
+            method, url, timeout=(HTTP_CONNECT_TIMEOUT_SEC, timeout or HTTP_READ_TIMEOUT_SEC), **kwargs
+        )
+    finally:
+        HTTP_CLIENT_IN_FLIGHT.labels(destino=destino).dec()
+        HTTP_CLIENT_SECONDS.labels(destino=destino).observe(time.perf_counter() - inicio)
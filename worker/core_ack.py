@@ -1,14 +1,17 @@
 import os
-import requests
 import logging
+from clientes_http import request
+
+log = logging.getLogger(__name__)
 
 CORE_ACK_URL = "https://api.arreglacore.click/messages/ack/{subscriptionId}"
 CORE_API_KEY = os.getenv("CORE_API_KEY")
 
-def send_ack(message_id, subscription_id):
+def send_ack(message_id, subscription_id) -> bool:
+    """Manda el ACK de un mensaje. Devuelve True si el CoreHub lo aceptó (lo usa acks.AckBatcher)."""
     if not subscription_id:
-        logging.warning(f"No hay subscription_id para {message_id}, omitiendo ACK.")
-        return
+        log.warning(f"No hay subscription_id para {message_id}, omitiendo ACK.")
+        return True
 
     # URL correcta reemplazando subscriptionId
     url = CORE_ACK_URL.format(subscriptionId=subscription_id)
@@ -20,8 +23,10 @@ def send_ack(message_id, subscription_id):
     }
 
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=5)
+        r = request("corehub", "POST", url, json=payload, headers=headers, timeout=5)
         r.raise_for_status()
-        logging.info(f"ACK enviado correctamente para {message_id}")
+        log.info(f"ACK enviado correctamente para {message_id}")
+        return True
     except Exception as e:
-        logging.warning(f"Fallo al enviar ACK para {message_id}: {e}")
+        log.warning(f"Fallo al enviar ACK para {message_id}: {e}")
+        return False
@@ -0,0 +1,74 @@
+import contextlib
+import logging
+import threading
+import time
+import pymysql
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Conexiones persistentes del worker
+# ===========================
+# Cada thread (el loop principal y los del pool de procesamiento) mantiene su
+# propia conexión abierta entre vueltas. Antes de usarla, si pasó más de
+# `ping_interval` desde el último uso se le hace un ping (reconecta si el server
+# la cerró). Si una operación falla con OperationalError la conexión se descarta
+# y la próxima vuelta abre una nueva.
+
+
+class ConnectionManager:
+    def __init__(self, connect, ping_interval: float = 30):
+        self._connect = connect
+        self._ping_interval = ping_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = set()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        now = time.monotonic()
+        if conn is not None and now - self._local.last_used >= self._ping_interval:
+            try:
+                conn.ping(reconnect=True)
+            except Exception as e:
+                log.warning(f"Conexión a la DB perdida, se abre una nueva: {e}")
+                self.discard()
+                conn = None
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._all.add(conn)
+        self._local.last_used = now
+        return conn
+
+    def discard(self):
+        """Cierra y olvida la conexión del thread actual."""
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.get()
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            self.discard()
+            raise
+
+    def close_all(self):
+        with self._lock:
+            conns, self._all = self._all, set()
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
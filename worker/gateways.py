@@ -0,0 +1,337 @@
+import logging
+from datetime import datetime, timezone
+import requests
+from clientes_http import request
+from idcache import IdCache, MISSING
+from metrics import ID_CACHE_ENTRIES, ID_CACHE_LOOKUPS
+from comun.calificaciones import actualizar_calificacion, crear_calificacion
+from comun.errores import DatosInvalidos, NoEncontrado
+from comun.pedidos import actualizar_pedido, cancelar_pedido, cancelar_pedidos_de_solicitud, crear_pedidos
+from comun.serializacion import dumps
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Acceso a la API desde los handlers
+# ===========================
+# Los handlers no llaman a requests directamente sino a un gateway con
+# operaciones por recurso (buscar id, crear, modificar, borrar):
+#   - HttpGateway: llama a los endpoints de la API (comportamiento de siempre).
+#   - DbGateway:   resuelve en la DB del catálogo, sobre la misma conexión y
+#                  transacción con la que el worker marca el evento como 'done'.
+#                  Cubre las búsquedas de ids, pedidos y calificaciones (el grueso
+#                  del tráfico); el alta/modificación de usuarios, prestadores y
+#                  admins sigue por HTTP (hashing de contraseñas, validaciones).
+#                  Los pedidos y calificaciones se escriben con las mismas funciones
+#                  que la API (comun.pedidos, comun.calificaciones), así las dos
+#                  rutas no pueden divergir.
+# Se elige con WORKER_HANDLER_MODE=http|db (ver process.py).
+#
+# Las búsquedas id externo -> id interno de usuarios/prestadores/admins pasan
+# por un IdCache compartido (ver idcache.py); resolve_ids resuelve varios de una.
+
+
+class GatewayResponse:
+    """Respuesta con la misma forma que requests.Response (lo que usan los handlers)."""
+
+    def __init__(self, status_code: int, data=None):
+        self.status_code = status_code
+        self._data = data
+
+    @property
+    def text(self):
+        return dumps(self._data)
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}: {self.text}", response=self)
+
+
+# Recurso -> filtro con el id externo (lo que se cachea)
+CACHEABLE = {
+    "usuarios": "id_usuario",
+    "prestadores": "id_prestador",
+    "admins": "id_admin",
+}
+
+# Ids por llamada al resolver varios por HTTP (la API acepta hasta 1000; esto acota la URL)
+ID_LOOKUP_BATCH = 100
+
+
+def _norm_id(value):
+    """Los ids externos llegan como int o como string según el evento."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class HttpGateway:
+    def __init__(self, api_base_url: str, headers: dict, timeout: float = 5, id_cache: IdCache = None):
+        self.api_base_url = api_base_url
+        self.headers = headers
+        self.timeout = timeout
+        self.id_cache = id_cache if id_cache is not None else IdCache(maxsize=0)
+
+    def _url(self, resource, item_id=None, interno=False):
+        # Las colecciones de la API están en "/recurso/" (sin la barra responde con un redirect)
+        if item_id is None:
+            return f"{self.api_base_url}/{resource}/"
+        url = f"{self.api_base_url}/{resource}/{item_id}"
+        if interno:
+            url += "/interno"
+        return url
+
+    def find_id(self, resource: str, **filters):
+        """Id interno de la primera fila de `resource` que cumple los filtros (o None)."""
+        if len(filters) == 1 and CACHEABLE.get(resource) in filters:
+            (filtro, external_id), = filters.items()
+            return self.resolve_ids(resource, filtro, [external_id]).get(external_id)
+        ids = self._list_ids(resource, filters, limit=1)
+        return ids[0] if ids else None
+
+    def resolve_ids(self, resource: str, filtro: str, external_ids):
+        """
+        {id_externo: id_interno | None} para varios ids de una vez. Solo se consultan
+        los que no están en cache; un error de la consulta no se cachea (se propaga).
+        """
+        cacheable = CACHEABLE.get(resource) == filtro
+        resolved, misses = {}, []
+        for ext in dict.fromkeys(_norm_id(e) for e in external_ids if e is not None):
+            cached = self.id_cache.get((resource, filtro, ext)) if cacheable else MISSING
+            if cached is MISSING:
+                misses.append(ext)
+                result = "miss"
+            else:
+                resolved[ext] = cached
+                result = "hit" if cached is not None else "negative_hit"
+            if cacheable:
+                ID_CACHE_LOOKUPS.labels(resource=resource, result=result).inc()
+
+        if misses:
+            found = self._fetch_ids(resource, filtro, misses)
+            for ext in misses:
+                resolved[ext] = found.get(ext)
+                if cacheable:
+                    self.id_cache.set((resource, filtro, ext), resolved[ext])
+            ID_CACHE_ENTRIES.set(len(self.id_cache))
+
+        return {e: resolved[_norm_id(e)] for e in external_ids if e is not None}
+
+    def _fetch_ids(self, resource, filtro, external_ids):
+        if CACHEABLE.get(resource) != filtro:
+            # Los demás filtros de la API aceptan un solo valor: una consulta por id
+            found = {}
+            for ext in external_ids:
+                ids = self._list_ids(resource, {filtro: ext}, limit=1)
+                if ids:
+                    found[ext] = ids[0]
+            return found
+        # /usuarios, /prestadores y /admins aceptan el filtro repetido (?id_usuario=1&id_usuario=2):
+        # una sola llamada por tanda de ID_LOOKUP_BATCH ids
+        found = {}
+        for i in range(0, len(external_ids), ID_LOOKUP_BATCH):
+            params = {filtro: external_ids[i:i + ID_LOOKUP_BATCH], "fields": f"id,{filtro}"}
+            response = request("api", "GET", self._url(resource), params=params, headers=self.headers, timeout=self.timeout)
+            response.raise_for_status()
+            # Igual que find_id: si hubiera duplicados, gana el id más bajo
+            for item in sorted(response.json() or [], key=lambda item: item["id"]):
+                found.setdefault(_norm_id(item.get(filtro)), item["id"])
+        return found
+
+    def list_ids(self, resource: str, **filters):
+        return self._list_ids(resource, filters)
+
+    def _list_ids(self, resource, filters, limit=None):
+        params = {k: v for k, v in filters.items() if v is not None}
+        params["fields"] = "id"
+        if limit is not None:
+            params["limit"] = limit
+        response = request("api", "GET", self._url(resource), params=params, headers=self.headers, timeout=self.timeout)
+        log.debug("Respuesta del API (%s): %s", resource, response.status_code)
+        response.raise_for_status()
+        return [item.get("id") for item in response.json() or [] if item.get("id")]
+
+    def create(self, resource: str, body: dict):
+        try:
+            return request("api", "POST", self._url(resource), json=body, headers=self.headers, timeout=self.timeout)
+        finally:
+            # Puede haber quedado cacheado como inexistente
+            if resource in CACHEABLE:
+                self.id_cache.invalidate((resource, CACHEABLE[resource], _norm_id(body.get(CACHEABLE[resource]))))
+
+    def create_bulk(self, resource: str, bodies: list):
+        """Alta de varias filas en una sola llamada (POST /recurso/bulk)."""
+        return request("api", "POST", f"{self.api_base_url}/{resource}/bulk", json=bodies, headers=self.headers, timeout=self.timeout)
+
+    def cancel_solicitud(self, id_pedido):
+        """Cancela todos los pedidos de una solicitud (id_pedido externo) en una sola operación."""
+        return request(
+            "api", "POST", f"{self.api_base_url}/pedidos/solicitud/{id_pedido}/cancelar", headers=self.headers, timeout=self.timeout
+        )
+
+    def update(self, resource: str, item_id, body: dict, interno: bool = False):
+        return request("api", "PATCH", self._url(resource, item_id, interno), json=body, headers=self.headers, timeout=self.timeout)
+
+    def delete(self, resource: str, item_id, interno: bool = False):
+        try:
+            return request("api", "DELETE", self._url(resource, item_id, interno), headers=self.headers, timeout=self.timeout)
+        finally:
+            if resource in CACHEABLE:
+                self.id_cache.invalidate_internal(resource, item_id)
+
+
+# Recurso de la API -> (tabla, filtros permitidos en las búsquedas)
+LOOKUPS = {
+    "usuarios": ("usuario", {"id_usuario"}),
+    "prestadores": ("prestador", {"id_prestador"}),
+    "admins": ("admin", {"id_admin"}),
+    "pedidos": ("pedido", {"id_pedido", "id_prestador"}),
+    "calificaciones": ("calificacion", {"id_calificacion"}),
+}
+
+
+def _to_db_datetime(value):
+    """ISO string (con o sin tz) -> datetime naive en UTC, como lo guarda la API."""
+    if not isinstance(value, str):
+        return value
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class DbGateway(HttpGateway):
+    """
+    Gateway sobre la conexión del worker. No hace commit: el evento entero
+    (escrituras del handler + status='done') se confirma o se revierte junto.
+    """
+
+    def __init__(self, conn, api_base_url: str, headers: dict, timeout: float = 5, id_cache: IdCache = None):
+        super().__init__(api_base_url, headers, timeout, id_cache)
+        self.conn = conn
+
+    def _fetch_ids(self, resource, filtro, external_ids):
+        if resource not in LOOKUPS:
+            return super()._fetch_ids(resource, filtro, external_ids)
+        table, allowed = LOOKUPS[resource]
+        if filtro not in allowed:
+            raise ValueError(f"Filtro '{filtro}' no soportado para {resource}")
+        placeholders = ", ".join(["%s"] * len(external_ids))
+        with self.conn.cursor() as c:
+            c.execute(
+                f"SELECT id, {filtro} AS externo FROM {table} WHERE {filtro} IN ({placeholders}) ORDER BY id",
+                tuple(external_ids),
+            )
+            found = {}
+            for row in c.fetchall():
+                # Igual que find_id: si hubiera duplicados, gana el id más bajo
+                found.setdefault(row["externo"], row["id"])
+        return found
+
+    def _list_ids(self, resource, filters, limit=None):
+        if resource not in LOOKUPS:
+            return super()._list_ids(resource, filters, limit)
+        table, allowed = LOOKUPS[resource]
+        where, params = [], []
+        for key, value in filters.items():
+            if key not in allowed:
+                raise ValueError(f"Filtro '{key}' no soportado para {resource}")
+            if value is not None:
+                where.append(f"{key} = %s")
+                params.append(value)
+        query = f"SELECT id FROM {table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        with self.conn.cursor() as c:
+            c.execute(query, tuple(params))
+            return [row["id"] for row in c.fetchall()]
+
+    def create(self, resource, body):
+        if resource == "pedidos":
+            return self._create_pedido(body)
+        if resource == "calificaciones":
+            return self._create_calificacion(body)
+        return super().create(resource, body)
+
+    def create_bulk(self, resource, bodies):
+        if resource == "pedidos":
+            return self._create_pedidos(bodies)
+        return super().create_bulk(resource, bodies)
+
+    def cancel_solicitud(self, id_pedido):
+        # Igual que POST /pedidos/solicitud/{id}/cancelar (comun.pedidos)
+        with self.conn.cursor() as c:
+            ids = cancelar_pedidos_de_solicitud(c, id_pedido)
+        return GatewayResponse(200, {"detail": f"{len(ids)} pedidos cancelados", "ids": ids})
+
+    def update(self, resource, item_id, body, interno=False):
+        if resource == "pedidos" and not interno:
+            return self._update_pedido(item_id, body)
+        if resource == "calificaciones" and not interno:
+            return self._update_calificacion(item_id, body)
+        return super().update(resource, item_id, body, interno)
+
+    def delete(self, resource, item_id, interno=False):
+        if resource == "pedidos" and not interno:
+            return self._cancel_pedido(item_id)
+        return super().delete(resource, item_id, interno)
+
+    # ---------------------------
+    # Pedidos
+    # ---------------------------
+    def _create_pedido(self, body):
+        response = self._create_pedidos([body])
+        return GatewayResponse(response.status_code, response.json()[0])
+
+    def _create_pedidos(self, bodies):
+        # Igual que POST /pedidos/bulk (comun.pedidos.crear_pedidos, con la validación de prestadores y usuarios)
+        pedidos = [{**body, "fecha": _to_db_datetime(body.get("fecha"))} for body in bodies]
+        try:
+            with self.conn.cursor() as c:
+                return GatewayResponse(201, crear_pedidos(c, pedidos))
+        except NoEncontrado as e:
+            return GatewayResponse(404, {"detail": str(e)})
+
+    def _update_pedido(self, pedido_id, body):
+        cambios = {**body, "fecha": _to_db_datetime(body["fecha"])} if "fecha" in body else body
+        try:
+            with self.conn.cursor() as c:
+                return GatewayResponse(200, actualizar_pedido(c, pedido_id, cambios))
+        except NoEncontrado as e:
+            return GatewayResponse(404, {"detail": str(e)})
+
+    def _cancel_pedido(self, pedido_id):
+        try:
+            with self.conn.cursor() as c:
+                cancelar_pedido(c, pedido_id)
+        except NoEncontrado as e:
+            return GatewayResponse(404, {"detail": str(e)})
+        return GatewayResponse(200, {"detail": "Pedido cancelado correctamente"})
+
+    # ---------------------------
+    # Calificaciones
+    # ---------------------------
+    def _create_calificacion(self, body):
+        # Igual que POST /calificaciones (comun.calificaciones)
+        try:
+            with self.conn.cursor() as c:
+                return GatewayResponse(200, crear_calificacion(c, body))
+        except NoEncontrado as e:
+            return GatewayResponse(404, {"detail": str(e)})
+
+    def _update_calificacion(self, calificacion_id, body):
+        try:
+            with self.conn.cursor() as c:
+                return GatewayResponse(200, actualizar_calificacion(c, calificacion_id, body))
+        except NoEncontrado as e:
+            return GatewayResponse(404, {"detail": str(e)})
+        except DatosInvalidos as e:
+            return GatewayResponse(400, {"detail": str(e)})
@@ -1,22 +1,28 @@
-import logging, requests
+import logging, pymysql
 
-def obtener_id_real(id_secundario,endpoint,id_real,url,headers):
+log = logging.getLogger(__name__)
+
+def obtener_id_real(id_secundario, endpoint, id_real, gateway):
     try:
-        response = requests.get(
-            f"{url}/{endpoint}",
-            params={id_real:id_secundario},
-            headers=headers,
-            timeout=5
-        )
-        # obtener el id real a través del response
-        if response.status_code == 200:
-            prestador_data = response.json()
-            if prestador_data:
-                id_encontrado = prestador_data[0].get("id")
-                logging.info(f"id obtenido: {id_encontrado}")
-        logging.info(f"Respuesta del API: {response.status_code} - {response.text}")
+        # Solo necesitamos el id interno: el gateway pide 1 fila y solo esa columna
+        id_encontrado = gateway.find_id(endpoint, **{id_real: id_secundario})
+        if id_encontrado:
+            log.debug("id obtenido: %s", id_encontrado)
         return id_encontrado
+    except pymysql.MySQLError:
+        # Con el gateway a DB, un error de la base aborta el evento (se hace rollback)
+        raise
     except Exception as e:
-            logging.exception(f"Error al enviar GET de {endpoint} {e}")
+            log.exception(f"Error al buscar id en {endpoint} {e}")
             return None
-    
+
+
+def obtener_ids_reales(ids_secundarios, endpoint, id_real, gateway):
+    """Como obtener_id_real pero para varios ids en una sola consulta: {id_secundario: id | None}."""
+    try:
+        return gateway.resolve_ids(endpoint, id_real, ids_secundarios)
+    except pymysql.MySQLError:
+        raise
+    except Exception as e:
+        log.exception(f"Error al buscar ids en {endpoint} {e}")
+        return {}
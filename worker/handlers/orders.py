@@ -1,8 +1,9 @@
 
 import logging, requests
-from handlers.helpers import obtener_id_real
+from handlers.helpers import obtener_id_real, obtener_ids_reales
 from datetime import datetime, timezone
-import urllib.parse
+
+log = logging.getLogger(__name__)
 
 
 def _normalize_fecha(fecha, horario=None):
@@ -73,44 +74,34 @@ def _normalize_fecha(fecha, horario=None):
   return fecha
 
 
-def _find_pedido_internal_id(api_base, hdrs, prestador_internal, pedido_externo):
+def _find_pedido_internal_id(gateway, prestador_internal, pedido_externo):
   """Buscar pedido interno por id_prestador (interno) y id_pedido (externo).
   Devuelve el campo `id` del primer resultado o None.
   """
   try:
-    params = {}
-    if prestador_internal is not None:
-      params["id_prestador"] = prestador_internal
-    if pedido_externo is not None:
-      params["id_pedido"] = pedido_externo
-    query = urllib.parse.urlencode(params)
-    url = f"{api_base}/pedidos"
-    if query:
-      url = f"{url}?{query}"
-    resp = requests.get(url, headers=hdrs, timeout=5)
-    if resp.status_code != 200:
-      logging.warning(f"⚠️ Búsqueda de pedido falló ({resp.status_code}): {resp.text}")
-      return None
-    items = resp.json()
-    if isinstance(items, list) and len(items) > 0:
-      return items[0].get("id")
-    return None
+    return gateway.find_id("pedidos", id_prestador=prestador_internal, id_pedido=pedido_externo)
   except requests.RequestException as e:
-    logging.error(f"💥 Error buscando pedido: {e}")
+    log.error(f"💥 Error buscando pedido: {e}")
     return None
 
-def handle(event_name, payload, api_base_url, headers):
+def handle(event_name, payload, gateway):
   # COTIZACION CREADA --> testear
   if event_name == "emitida":
-    logging.info("📦 Nueva solicitud de cotización emitida")
+    log.info("📦 Nueva solicitud de cotización emitida")
     payload_data = payload.get("payload", {})
 
     solicitudes = payload_data.get("solicitudes", [])
     if not solicitudes:
-        logging.warning("⚠️ No se encontraron solicitudes en el payload, evento ignorado.")
+        log.warning("⚠️ No se encontraron solicitudes en el payload, evento ignorado.")
         return
 
-    total_creados = 0
+    bodies = []
+
+    # Resolver de una vez los usuarios y los prestadores del top3 de todas las solicitudes
+    ids_usuarios = obtener_ids_reales(
+      [s.get("usuarioId") for s in solicitudes], "usuarios", "id_usuario", gateway)
+    ids_prestadores = obtener_ids_reales(
+      [p.get("prestadorId") for s in solicitudes for p in s.get("top3", [])], "prestadores", "id_prestador", gateway)
 
     for solicitud in solicitudes:
       solicitud_id = solicitud.get("solicitudId")
@@ -123,7 +114,7 @@ def handle(event_name, payload, api_base_url, headers):
       fecha_normalizada_base = _normalize_fecha(raw_fecha, raw_horario)
 
       id_usuario_real = solicitud.get("usuarioId")
-      id_usuario = obtener_id_real(id_usuario_real, "usuarios", "id_usuario", api_base_url, headers)
+      id_usuario = ids_usuarios.get(id_usuario_real)
       direccion_dict = solicitud.get("direccion")
       if direccion_dict:
         parts = []
@@ -158,7 +149,7 @@ def handle(event_name, payload, api_base_url, headers):
         prest_fecha_raw = prestador.get("fecha") or raw_fecha
         prest_horario_raw = prestador.get("horario") or raw_horario
         fecha_para_prestador = _normalize_fecha(prest_fecha_raw, prest_horario_raw) if (prest_fecha_raw or prest_horario_raw) else fecha_normalizada_base
-        id_prestador = obtener_id_real(prestador.get("prestadorId"), "prestadores", "id_prestador", api_base_url, headers)
+        id_prestador = ids_prestadores.get(prestador.get("prestadorId"))
         body = {
           "id_pedido": solicitud_id,
           "descripcion": descripcion or f"Solicitud {solicitud_id}",
@@ -172,36 +163,34 @@ def handle(event_name, payload, api_base_url, headers):
           "tarifa": None
         }
 
-        logging.info(f"📝 Creando pedido para prestador {prestador.get('prestadorNombre')} con body: {body}")
+        log.debug("📝 Pedido para prestador %s con body: %s", prestador.get('prestadorNombre'), body)
+        bodies.append(body)
 
-        try:
-          response = requests.post(
-            f"{api_base_url}/pedidos/",
-            json=body,
-            headers=headers,
-            timeout=5
-          )
+    if not bodies:
+      log.info("📊 Ninguna solicitud trae prestadores en top3, no se crean pedidos.")
+      return
 
-          if response.status_code == 201:
-            total_creados += 1
-            logging.info(f"✅ Pedido creado correctamente para prestador {prestador.get('prestadorId')}")
-          else:
-            logging.warning(f"⚠️ Error creando pedido ({response.status_code}): {response.text}")
+    # Todos los pedidos del evento en una sola llamada (idempotente por solicitud + prestador)
+    try:
+      response = gateway.create_bulk("pedidos", bodies)
 
-        except requests.Timeout:
-          logging.error(f"⏰ Timeout al crear pedido para prestador {prestador.get('prestadorId')}")
-        except requests.RequestException as e:
-          logging.error(f"💥 Error de request al crear pedido: {e}")
+      if response.status_code in (200, 201):
+        log.info("📊 Total de pedidos creados o ya existentes: %s", len(response.json()))
+      else:
+        log.warning(f"⚠️ Error creando pedidos ({response.status_code}): {response.text}")
 
-    logging.info(f"📊 Total de pedidos creados: {total_creados}")
+    except requests.Timeout:
+      log.error(f"⏰ Timeout al crear {len(bodies)} pedidos")
+    except requests.RequestException as e:
+      log.error(f"💥 Error de request al crear pedidos: {e}")
 
   # COTIZACION ACEPTADA
   elif event_name == "aceptada":
-      logging.info("📦 Nueva solicitud de cotización aceptada")
-      logging.info(f"Payload recibido: {payload}")
+      log.info("📦 Nueva solicitud de cotización aceptada")
+      log.debug("Payload recibido: %s", payload)
       data = payload.get("payload", {})
       if not data:
-          logging.warning("⚠️ No se encontró payload con datos de pago, evento ignorado.")
+          log.warning("⚠️ No se encontró payload con datos de pago, evento ignorado.")
           return
 
       pedido_externo = data.get("solicitud_id")
@@ -210,13 +199,13 @@ def handle(event_name, payload, api_base_url, headers):
       prestador_int = None
       if prestador_ext is not None:
           try:
-              prestador_int = obtener_id_real(prestador_ext, "prestadores", "id_prestador", api_base_url, headers)
+              prestador_int = obtener_id_real(prestador_ext, "prestadores", "id_prestador", gateway)
           except Exception:
               prestador_int = None
 
-      id_pedido_internal = _find_pedido_internal_id(api_base_url, headers, prestador_int, pedido_externo)
+      id_pedido_internal = _find_pedido_internal_id(gateway, prestador_int, pedido_externo)
       if id_pedido_internal is None:
-          logging.warning(f"⚠️ No se encontró pedido interno para solicitud {pedido_externo} y prestador {prestador_ext}")
+          log.warning(f"⚠️ No se encontró pedido interno para solicitud {pedido_externo} y prestador {prestador_ext}")
           return
 
       # Normalización del payload
@@ -224,31 +213,26 @@ def handle(event_name, payload, api_base_url, headers):
           "estado": "aprobado_por_usuario",
           "tarifa": data.get("monto")
       }
-      logging.info(f"🔄 Payload normalizado: {body}")
+      log.debug("🔄 Payload normalizado: %s", body)
 
       # persistir en la tabla pedidos
       try:
-          response = requests.patch(
-              f"{api_base_url}/pedidos/{id_pedido_internal}",
-              json=body,
-              timeout=5,
-              headers=headers
-          )
-          logging.info(f"Respuesta del API al actualizar el pedido: {response.status_code} - {response.text}")
+          response = gateway.update("pedidos", id_pedido_internal, body)
+          log.info("Respuesta del API al actualizar el pedido: %s", response.status_code)
           if response.status_code == 200:
-              logging.info("✅ Cotización aceptada")
+              log.info("✅ Cotización aceptada")
       except requests.Timeout:
-          logging.error("⏰ Timeout al crear pedido")
+          log.error("⏰ Timeout al crear pedido")
       except requests.RequestException as e:
-          logging.error(f"💥 Error al crear pedido: {e}")
+          log.error(f"💥 Error al crear pedido: {e}")
 
   # COTIZACION RECHAZADA (igual que cancelación de pedidos)
   elif event_name == "rechazada":
-    logging.info("📦 Nueva solicitud de pedido cancelado")
-    logging.info(f"Payload recibido: {payload}")
+    log.info("📦 Nueva solicitud de pedido cancelado")
+    log.debug("Payload recibido: %s", payload)
     data = payload.get("payload", {})
     if not data:
-      logging.warning("⚠️ No se encontró payload con datos de pago, evento ignorado.")
+      log.warning("⚠️ No se encontró payload con datos de pago, evento ignorado.")
       return
 
     pedido_externo = data.get("solicitud_id")
@@ -256,73 +240,44 @@ def handle(event_name, payload, api_base_url, headers):
     prestador_int = None
     if prestador_ext is not None:
       try:
-        prestador_int = obtener_id_real(prestador_ext, "prestadores", "id_prestador", api_base_url, headers)
+        prestador_int = obtener_id_real(prestador_ext, "prestadores", "id_prestador", gateway)
       except Exception:
         prestador_int = None
 
-    id_pedido_internal = _find_pedido_internal_id(api_base_url, headers, prestador_int, pedido_externo)
+    id_pedido_internal = _find_pedido_internal_id(gateway, prestador_int, pedido_externo)
     if id_pedido_internal is None:
-      logging.warning(f"⚠️ No se encontró pedido interno para solicitud {pedido_externo} y prestador {prestador_ext}")
+      log.warning(f"⚠️ No se encontró pedido interno para solicitud {pedido_externo} y prestador {prestador_ext}")
       return
 
     try:
-      response = requests.delete(
-        f"{api_base_url}/pedidos/{id_pedido_internal}",
-        timeout=5,
-        headers=headers
-      )
-      logging.info(f"Respuesta del API al cancelar el pedido: {response.status_code} - {response.text}")
+      response = gateway.delete("pedidos", id_pedido_internal)
+      log.info("Respuesta del API al cancelar el pedido: %s", response.status_code)
     except requests.Timeout:
-      logging.error("⏰ Timeout al cancelar pedido")
+      log.error("⏰ Timeout al cancelar pedido")
     except requests.RequestException as e:
-      logging.error(f"💥 Error al cancelar pedido: {e}")
+      log.error(f"💥 Error al cancelar pedido: {e}")
   
   elif event_name == "cancelada":
-    logging.info("📦 Evento de cotización cancelada - marcar pedidos como cancelado")
-    logging.info(f"Payload recibido: {payload}")
+    log.info("📦 Evento de cotización cancelada - marcar pedidos como cancelado")
+    log.debug("Payload recibido: %s", payload)
     data = payload.get("payload", {})
     if not data:
-      logging.warning("⚠️ No se encontró payload con datos, evento ignorado.")
+      log.warning("⚠️ No se encontró payload con datos, evento ignorado.")
       return
 
     # Aceptamos varias claves que pueden nombrar al id externo
     solicitud_id = data.get("solicitud_id")
     if not solicitud_id:
-      logging.warning("⚠️ No se encontró 'solicitud_id' en el payload, evento ignorado.")
+      log.warning("⚠️ No se encontró 'solicitud_id' en el payload, evento ignorado.")
       return
 
+    # Un solo UPDATE del lado de la API/DB para todos los pedidos de la solicitud
     try:
-      # Obtener todos los pedidos que coincidan con el id_pedido externo
-      url = f"{api_base_url}/pedidos"
-      resp = requests.get(url, headers=headers, params={"id_pedido": solicitud_id}, timeout=5)
-      if resp.status_code != 200:
-        logging.warning(f"⚠️ Falló la búsqueda de pedidos para solicitud {solicitud_id} ({resp.status_code}): {resp.text}")
-        return
-
-      items = resp.json()
-      if not isinstance(items, list) or len(items) == 0:
-        logging.info(f"ℹ️ No se encontraron pedidos para solicitud {solicitud_id}.")
-        return
-
-      # Actualizar cada pedido a estado 'cancelado'
-      for item in items:
-        pedido_internal_id = item.get("id")
-        if not pedido_internal_id:
-          continue
-        try:
-          patch_resp = requests.patch(
-            f"{api_base_url}/pedidos/{pedido_internal_id}",
-            json={"estado": "cancelado"},
-            timeout=5,
-            headers=headers
-          )
-          logging.info(f"Respuesta al actualizar pedido {pedido_internal_id}: {patch_resp.status_code} - {patch_resp.text}")
-          if patch_resp.status_code == 200:
-            logging.info(f"✅ Pedido interno {pedido_internal_id} marcado como 'cancelado'")
-        except requests.Timeout:
-          logging.error(f"⏰ Timeout al actualizar pedido {pedido_internal_id}")
-        except requests.RequestException as e:
-          logging.error(f"💥 Error al actualizar pedido {pedido_internal_id}: {e}")
-
+      response = gateway.cancel_solicitud(solicitud_id)
+      log.info("Respuesta al cancelar pedidos de solicitud %s: %s", solicitud_id, response.status_code)
+      if response.status_code == 200:
+        log.info(f"✅ Pedidos de solicitud {solicitud_id} marcados como 'cancelado': {response.json().get('ids')}")
+    except requests.Timeout:
+      log.error(f"⏰ Timeout al cancelar pedidos de solicitud {solicitud_id}")
     except requests.RequestException as e:
-      logging.error(f"💥 Error buscando pedidos para solicitud {solicitud_id}: {e}")
+      log.error(f"💥 Error cancelando pedidos para solicitud {solicitud_id}: {e}")
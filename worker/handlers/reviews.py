@@ -1,8 +1,10 @@
 import logging
-import requests
+import pymysql
 from handlers.helpers import obtener_id_real    
 
-def handle(event_name, payload, API_BASE_URL, headers):
+log = logging.getLogger(__name__)
+
+def handle(event_name, payload, gateway):
     """
     Maneja los eventos relacionados con calificaciones (reviews).
 
@@ -30,13 +32,13 @@ def handle(event_name, payload, API_BASE_URL, headers):
     usuario_id = data.get("usuario_id")
     
     if not data:
-        logging.warning("⚠️ No se encontró payload con datos de calificación, evento ignorado.")
+        log.warning("⚠️ No se encontró payload con datos de calificación, evento ignorado.")
         return
     # obtener id real del prestador
-    id_prestador = obtener_id_real(prestador_id,"prestadores","id_prestador",API_BASE_URL,headers)
+    id_prestador = obtener_id_real(prestador_id,"prestadores","id_prestador",gateway)
     
     # obtener id real del usuario
-    id_usuario = obtener_id_real(usuario_id,"usuarios","id_usuario",API_BASE_URL,headers)
+    id_usuario = obtener_id_real(usuario_id,"usuarios","id_usuario",gateway)
 
 
     # === Normalizar claves ===
@@ -48,60 +50,45 @@ def handle(event_name, payload, API_BASE_URL, headers):
         "estrellas": float(data.get("puntuacion", 0)),
         "descripcion": data.get("comentario"),
     }
-    logging.info(f"🔄 Payload normalizado: {body}")
+    log.debug("🔄 Payload normalizado: %s", body)
 
     # === event_name: Calificación creada ===
     if event_name == "creada":
-        logging.info("📝 Nueva calificación creada")
+        log.info("📝 Nueva calificación creada")
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/calificaciones",
-                json=body,
-                headers=headers,
-                timeout=5
-            )
-            logging.info(f"Respuesta del API al crear calificación: {response.status_code} - {response.text}")
+            response = gateway.create("calificaciones", body)
+            log.info("Respuesta del API al crear calificación: %s", response.status_code)
+        except pymysql.MySQLError:
+            raise
         except Exception as e:
-            logging.exception(f"Error al enviar POST de calificación creada: {e}")
+            log.exception(f"Error al enviar POST de calificación creada: {e}")
 
     # === event_name: Calificación actualizada ===
     elif event_name == "actualizada":
-        logging.info("✏️ Calificación actualizada")
+        log.info("✏️ Calificación actualizada")
         calificacion_id = data.get("calificacion_id")
         id_calificacion = None
         try:
-            response = requests.get(
-                f"{API_BASE_URL}/calificaciones",
-                params={"id_calificacion": calificacion_id},
-                headers=headers,
-                timeout=5
-            )
-            # obtener el id real a través del response
-            if response.status_code == 200:
-                calificacion_data = response.json()
-                if calificacion_data:
-                    logging.info(f"Calificación obtenida: {calificacion_data}")
-                    id_calificacion = calificacion_data[0].get("id") #chequear si hace falta el [0]
-            logging.info(f"Respuesta del API al obtener calificación: {response.status_code} - {response.text}")
+            id_calificacion = gateway.find_id("calificaciones", id_calificacion=calificacion_id)
+            log.info(f"Calificación obtenida: {id_calificacion}")
+        except pymysql.MySQLError:
+            raise
         except Exception as e:
-            logging.exception(f"Error al enviar GET de calificación actualizada: {e}")
+            log.exception(f"Error al enviar GET de calificación actualizada: {e}")
 
         if not id_calificacion:
-            logging.warning("⚠️ No se encontró 'calificacion_id' en el payload, no se puede actualizar.")
+            log.warning("⚠️ No se encontró 'calificacion_id' en el payload, no se puede actualizar.")
             return
 
 
         try:
-            response = requests.patch(
-                f"{API_BASE_URL}/calificaciones/{id_calificacion}",
-                json=body,
-                headers=headers,
-                timeout=5
-            )
-            logging.info(f"Respuesta del API al actualizar calificación: {response.status_code} - {response.text}")
+            response = gateway.update("calificaciones", id_calificacion, body)
+            log.info("Respuesta del API al actualizar calificación: %s", response.status_code)
+        except pymysql.MySQLError:
+            raise
         except Exception as e:
-            logging.exception(f"Error al enviar PATCH de calificación actualizada: {e}")
+            log.exception(f"Error al enviar PATCH de calificación actualizada: {e}")
 
     # === Cualquier otro evento ===
     else:
-        logging.info(f"Evento de calificación no manejado: {event_name} / {event_name}")
+        log.info(f"Evento de calificación no manejado: {event_name} / {event_name}")
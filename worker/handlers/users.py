@@ -1,66 +1,44 @@
 import logging
+import pymysql
 import requests
-import os
+
+log = logging.getLogger(__name__)
 
 # Ver el tema de que, al ejecutar un request de un endpoint, este no esté llamando al publish y que no se ejecute un loop infinito
 
-def find_user_by_external_id(external_id: int, api_base_url: str, headers: dict):    
-    # Probar en /usuarios
-    try:
-        params = {"id_usuario": external_id}
-        get_res = requests.get(f"{api_base_url}/usuarios", params=params, headers=headers)
-        if get_res.status_code == 200:
-            user_list = get_res.json()
-            if user_list and len(user_list) > 0:
-                internal_id = user_list[0].get("id")
-                if internal_id:
-                    logging.info(f"ID Externo {external_id} encontrado en /usuarios (Cliente)")
-                    return {"role": "cliente", "internal_id": internal_id, "api_path": "/usuarios"}
-    except Exception as e:
-        logging.error(f"Error al buscar en /usuarios: {e}")
+# (recurso de la API, filtro por id externo, rol)
+USER_RESOURCES = (
+    ("usuarios", "id_usuario", "cliente"),
+    ("prestadores", "id_prestador", "prestador"),
+    ("admins", "id_admin", "admin"),
+)
 
-    # Probar en /prestadores
-    try:
-        # Tu endpoint GET /prestadores SÍ tiene este filtro
-        params = {"id_prestador": external_id}
-        get_res = requests.get(f"{api_base_url}/prestadores", params=params, headers=headers)
-        if get_res.status_code == 200:
-            user_list = get_res.json()
-            if user_list and len(user_list) > 0:
-                internal_id = user_list[0].get("id")
-                if internal_id:
-                    logging.info(f"ID Externo {external_id} encontrado en /prestadores")
-                    return {"role": "prestador", "internal_id": internal_id, "api_path": "/prestadores"}
-    except Exception as e:
-        logging.error(f"Error al buscar en /prestadores: {e}")
+def find_user_by_external_id(external_id: int, gateway):
+    # Probar en /usuarios, /prestadores y /admins, en ese orden
+    for resource, filtro, role in USER_RESOURCES:
+        try:
+            internal_id = gateway.find_id(resource, **{filtro: external_id})
+            if internal_id:
+                log.info(f"ID Externo {external_id} encontrado en /{resource}")
+                return {"role": role, "internal_id": internal_id, "resource": resource}
+        except pymysql.MySQLError:
+            raise
+        except Exception as e:
+            log.error(f"Error al buscar en /{resource}: {e}")
 
-    # Probar en /admins
-    try:
-        params = {"id_admin": external_id}
-        get_res = requests.get(f"{api_base_url}/admins", params=params, headers=headers)
-        if get_res.status_code == 200:
-            user_list = get_res.json()
-            if user_list and len(user_list) > 0:
-                internal_id = user_list[0].get("id")
-                if internal_id:
-                    logging.info(f"ID Externo {external_id} encontrado en /admins")
-                    return {"role": "admin", "internal_id": internal_id, "api_path": "/admins"}
-    except Exception as e:
-        logging.error(f"Error al buscar en /admins: {e}")
-        
-    logging.warning(f"ID Externo {external_id} no fue encontrado en ninguna tabla.")
+    log.warning(f"ID Externo {external_id} no fue encontrado en ninguna tabla.")
     return None
 
-def handle(event_name, payload, API_BASE_URL, headers):
+def handle(event_name, payload, gateway):
     data = payload.get("payload", {})
     
-    logging.info(f"Procesando evento de usuario: {event_name} con payload {payload} y datos {data}")
+    log.info("Procesando evento de usuario: %s", event_name)
+    log.debug("Payload del evento de usuario: %s", payload)
     
     user_role = data.get("role", "usuario").lower()
     
     if event_name == "user_created":
-        logging.info(f"Alta de {user_role} recibida")
-        logging.info(f"headers: {headers}")
+        log.info(f"Alta de {user_role} recibida")
         response = None
         user_id_str = data.get("userId")
         user_id_int = None
@@ -68,11 +46,11 @@ def handle(event_name, payload, API_BASE_URL, headers):
             try:
                 user_id_int = int(user_id_str)
             except ValueError:
-                logging.error(f"Error: userId '{user_id_str}' no es un entero. No se puede crear usuario.")
+                log.error(f"Error: userId '{user_id_str}' no es un entero. No se puede crear usuario.")
                 return
 
         if not user_id_int:
-             logging.error("Error: user_created recibido sin userId válido.")
+             log.error("Error: user_created recibido sin userId válido.")
              return
 
         match user_role:
@@ -104,7 +82,7 @@ def handle(event_name, payload, API_BASE_URL, headers):
                     "departamento_sec": addr_sec.get("apartment")
                 }
                 
-                response = requests.post(f"{API_BASE_URL}/usuarios", json=cliente_body, headers=headers)
+                response = gateway.create("usuarios", cliente_body)
             
             case "admin":
                 admin_body = {
@@ -116,7 +94,7 @@ def handle(event_name, payload, API_BASE_URL, headers):
                     "activo": data.get("activo", True),
                     "profileImageUrl": data.get("foto", None)
                 }
-                response = requests.post(f"{API_BASE_URL}/admins", json=admin_body, headers=headers)
+                response = gateway.create("admins", admin_body)
             
             case "prestador":
                 addresses = data.get("address", [])
@@ -139,38 +117,37 @@ def handle(event_name, payload, API_BASE_URL, headers):
                     "departamento": addr.get("apartment"),
                     "id_prestador": user_id_int
                 }
-                response = requests.post(f"{API_BASE_URL}/prestadores", json=prestador_body, headers=headers)
+                response = gateway.create("prestadores", prestador_body)
         
         if response is not None:
-            logging.info(f"Respuesta del API al crear {user_role}: {response.status_code} - {response.text}")
+            log.info("Respuesta del API al crear %s: %s", user_role, response.status_code)
             if response.status_code >= 400:
-                 logging.error(f"Error DETALLADO al crear {user_role}: {response.text}")
+                 log.error(f"Error DETALLADO al crear {user_role}: {response.text}")
         else:
-            logging.info(f"No se llamó a la API para {user_role}")
+            log.info(f"No se llamó a la API para {user_role}")
 
     elif event_name == "user_updated":
-        logging.info("Update de usuario recibida (rol desconocido)")
-        logging.info(f"headers: {headers}")
+        log.info("Update de usuario recibida (rol desconocido)")
         
         user_id_str = data.get("userId")
         if not user_id_str:
-            logging.error("Evento 'user_updated' recibido sin 'userId'.")
+            log.error("Evento 'user_updated' recibido sin 'userId'.")
             return
         try:
             user_id_int = int(user_id_str)
         except ValueError:
-            logging.error(f"Error: userId '{user_id_str}' no es un entero. No se puede actualizar.")
+            log.error(f"Error: userId '{user_id_str}' no es un entero. No se puede actualizar.")
             return
 
-        user_info = find_user_by_external_id(user_id_int, API_BASE_URL, headers)
+        user_info = find_user_by_external_id(user_id_int, gateway)
         
         if user_info is None:
-            logging.error(f"Usuario con id_externo {user_id_int} no encontrado. No se puede actualizar.")
+            log.error(f"Usuario con id_externo {user_id_int} no encontrado. No se puede actualizar.")
             return
         
         role = user_info["role"]
         internal_id = user_info["internal_id"]
-        api_path = user_info["api_path"]
+        resource = user_info["resource"]
         
         patch_body = {}
         response = None
@@ -210,7 +187,7 @@ def handle(event_name, payload, API_BASE_URL, headers):
                             "departamento_sec": addr_sec.get("apartment")
                         })
                 
-                response = requests.patch(f"{API_BASE_URL}{api_path}/{internal_id}", json=patch_body, headers=headers)
+                response = gateway.update(resource, internal_id, patch_body)
 
             case "admin":
                 field_map = {
@@ -224,7 +201,7 @@ def handle(event_name, payload, API_BASE_URL, headers):
                     if event_key in data:
                         patch_body[api_key] = data[event_key]
                 
-                response = requests.patch(f"{API_BASE_URL}{api_path}/{internal_id}", json=patch_body, headers=headers)
+                response = gateway.update(resource, internal_id, patch_body)
             case "prestador":
                 field_map = {
                     "firstName": "nombre",
@@ -254,18 +231,17 @@ def handle(event_name, payload, API_BASE_URL, headers):
                             "departamento": addr.get("apartment")
                         })
                 
-                response = requests.patch(f"{API_BASE_URL}{api_path}/{internal_id}/interno", json=patch_body, headers=headers)
+                response = gateway.update(resource, internal_id, patch_body, interno=True)
         
         if response is not None:
-            logging.info(f"Respuesta del API al actualizar {user_role}: {response.status_code} - {response.text}")
+            log.info("Respuesta del API al actualizar %s: %s", user_role, response.status_code)
             if response.status_code >= 400:
-                 logging.error(f"Error DETALLADO al actualizar {user_role}: {response.text}")
+                 log.error(f"Error DETALLADO al actualizar {user_role}: {response.text}")
         else:
-            logging.info(f"No se llamó a la API para {user_role}")
+            log.info(f"No se llamó a la API para {user_role}")
     
     elif event_name == "user_rejected":
-        logging.info(f"rejected de {user_role} recibida")
-        logging.info(f"headers: {headers}")
+        log.info(f"rejected de {user_role} recibida")
         response = None
         match user_role:
             case "cliente":
@@ -276,58 +252,57 @@ def handle(event_name, payload, API_BASE_URL, headers):
                 pass
                 # Aca habría que hacer algo? Supongo que no
         if response is not None:
-            logging.info(f"Respuesta del API al rechazar {user_role}: {response.status_code} - {response.text}")
+            log.info("Respuesta del API al rechazar %s: %s", user_role, response.status_code)
         else:
-            logging.info(f"No se llamó a la API")
+            log.info(f"No se llamó a la API")
 
     elif event_name == "user_deactivated":
-        logging.info("Deactivate de usuario recibida (rol desconocido)")
-        logging.info(f"headers: {headers}")
+        log.info("Deactivate de usuario recibida (rol desconocido)")
         response = None
         
         user_id_str = data.get("userId")
         if not user_id_str:
-            logging.error("Evento 'user_deactivated' recibido sin 'userId'.")
+            log.error("Evento 'user_deactivated' recibido sin 'userId'.")
             return
 
         try:
             user_id_int = int(user_id_str)
         except ValueError:
-            logging.error(f"Error: userId '{user_id_str}' no es un entero. No se puede desactivar.")
+            log.error(f"Error: userId '{user_id_str}' no es un entero. No se puede desactivar.")
             return
         
-        user_info = find_user_by_external_id(user_id_int, API_BASE_URL, headers)
+        user_info = find_user_by_external_id(user_id_int, gateway)
 
         if user_info is None:
-            logging.error(f"Usuario con id_externo {user_id_int} no encontrado. No se puede desactivar.")
+            log.error(f"Usuario con id_externo {user_id_int} no encontrado. No se puede desactivar.")
             return
 
         role = user_info["role"]
         internal_id = user_info["internal_id"]
-        api_path = user_info["api_path"]
+        resource = user_info["resource"]
 
-        logging.info(f"Usuario encontrado. Rol: {role}, ID Interno: {internal_id}. Procediendo a desactivar (DELETE).")
+        log.info(f"Usuario encontrado. Rol: {role}, ID Interno: {internal_id}. Procediendo a desactivar (DELETE).")
         
-        delete_url = f"{API_BASE_URL}{api_path}/{internal_id}"
+        delete_path = f"/{resource}/{internal_id}"
         if role == "prestador":
-            delete_url += "/interno"
-            
-        logging.info(f"Enviando DELETE para rol '{role}' a {delete_url}")
+            delete_path += "/interno"
+
+        log.info(f"Enviando DELETE para rol '{role}' a {delete_path}")
         try:
-            response = requests.delete(delete_url, headers=headers)
+            response = gateway.delete(resource, internal_id, interno=(role == "prestador"))
             response.raise_for_status()
-            logging.info(f"Usuario {role} con ID interno {internal_id} desactivado correctamente.")
+            log.info(f"Usuario {role} con ID interno {internal_id} desactivado correctamente.")
         except requests.exceptions.RequestException as e:
-            logging.error(f"Error en DELETE a {delete_url}: {e}")
+            log.error(f"Error en DELETE a {delete_path}: {e}")
 
         if response is not None:
-            logging.info(f"Respuesta del API al desactivar {role}: {response.status_code} - {response.text if response.text else '(No body)'}")
+            log.info("Respuesta del API al desactivar %s: %s", role, response.status_code)
         else:
-             logging.warning(f"No se pudo completar la llamada DELETE para {role} {internal_id} o ya estaba loggeado el error.")
+             log.warning(f"No se pudo completar la llamada DELETE para {role} {internal_id} o ya estaba loggeado el error.")
         
         if response is not None:
-            logging.info(f"Respuesta del API al desactivar {user_role}: {response.status_code} - {response.text}")
+            log.info("Respuesta del API al desactivar %s: %s", user_role, response.status_code)
         else:
-            logging.info(f"No se llamó a la API")
+            log.info(f"No se llamó a la API")
     else:
-        logging.info(f"Evento de usuario no manejado: {event_name}")
\ No newline at end of file
+        log.info(f"Evento de usuario no manejado: {event_name}")
\ No newline at end of file
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ===========================
+# Cache de ids externos -> ids internos
+# ===========================
+# Los handlers traducen id_usuario/id_prestador/id_admin (ids del Core) al id
+# interno de la tabla en casi cada evento. Esos mapeos prácticamente no cambian,
+# así que se cachean en memoria:
+#   - LRU acotado a `maxsize` entradas, con TTL por entrada.
+#   - Cache negativo: "no existe" también se guarda, con un TTL más corto (el
+#     alta puede llegar por otro camino, p. ej. directo a la API).
+#   - El gateway invalida las entradas cuando el propio worker crea o da de baja
+#     un usuario/prestador/admin.
+# La clave es (recurso, filtro, id_externo). Es thread-safe (el worker procesa
+# grupos en paralelo).
+
+MISSING = object()
+
+
+class IdCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 600, negative_ttl: float = 30, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._data = OrderedDict()  # clave -> (id_interno | None, vence)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve el id interno, None si está cacheado como inexistente, o MISSING."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires <= self._clock():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._data[key] = (value, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_internal(self, resource: str, internal_id):
+        """Borra las entradas de `resource` que apuntan a `internal_id` (baja por id interno)."""
+        with self._lock:
+            stale = [k for k, (v, _) in self._data.items() if k[0] == resource and v == internal_id]
+            for k in stale:
+                del self._data[k]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,50 @@
+import logging
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Métricas del worker
+# ===========================
+# Se exponen en http://<worker>:WORKER_METRICS_PORT/metrics si la variable está
+# definida (el worker no tiene API HTTP propia).
+
+# --- Cache de ids externos -> internos (idcache.py) ---
+# Tasa de aciertos:
+#   sum(rate(worker_id_cache_lookups_total{result=~"hit|negative_hit"}[5m]))
+#     / sum(rate(worker_id_cache_lookups_total[5m]))
+ID_CACHE_LOOKUPS = Counter(
+    "worker_id_cache_lookups_total",
+    "Búsquedas de id interno en el cache, por recurso y resultado (hit, negative_hit, miss)",
+    ["resource", "result"],
+)
+ID_CACHE_ENTRIES = Gauge(
+    "worker_id_cache_entries",
+    "Entradas actualmente guardadas en el cache de ids",
+)
+
+# --- Requests salientes (clientes_http.py), por destino ---
+# Mismas métricas que los clientes HTTP de la API, con prefijo worker_
+HTTP_CLIENT_IN_FLIGHT = Gauge(
+    "worker_http_cliente_requests_en_curso",
+    "Requests salientes del worker en curso, por destino",
+    ["destino"],
+)
+HTTP_CLIENT_NEW_CONNECTIONS = Counter(
+    "worker_http_cliente_conexiones_nuevas_total",
+    "Conexiones TCP abiertas por las sesiones del worker (con keep-alive debería crecer poco), por destino",
+    ["destino"],
+)
+HTTP_CLIENT_SECONDS = Histogram(
+    "worker_http_cliente_request_seconds",
+    "Duración de los requests salientes del worker, por destino (api, corehub)",
+    ["destino"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def start_metrics_server(port):
+    if not port:
+        return
+    start_http_server(int(port))
+    log.info(f"Métricas del worker en :{port}/metrics")
@@ -1,17 +1,48 @@
-import json, logging
-from core_ack import send_ack
+import logging
+from acks import notify_ack
 from handlers import users, orders, reviews
 from config import get_api_base_url
+from gateways import HttpGateway, DbGateway
+from idcache import IdCache
+from comun.serializacion import loads
 import os
 
+log = logging.getLogger(__name__)
+
 API_BASE_URL = get_api_base_url()
 INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+# "http": los handlers llaman a la API; "db": escriben directo en la DB del catálogo,
+# en la misma transacción que marca el evento como 'done' (ver gateways.py)
+HANDLER_MODE = os.getenv("WORKER_HANDLER_MODE", "http").lower()
+# Cache de ids externos -> internos (ver idcache.py); tamaño 0 lo desactiva
+ID_CACHE_SIZE = int(os.getenv("WORKER_ID_CACHE_SIZE", "10000"))
+ID_CACHE_TTL_SEC = float(os.getenv("WORKER_ID_CACHE_TTL_SEC", "600"))
+ID_CACHE_NEGATIVE_TTL_SEC = float(os.getenv("WORKER_ID_CACHE_NEGATIVE_TTL_SEC", "30"))
         
 headers = {
     "x-internal-token": INTERNAL_API_TOKEN,
     "Content-Type": "application/json"
 }
 
+id_cache = IdCache(ID_CACHE_SIZE, ID_CACHE_TTL_SEC, ID_CACHE_NEGATIVE_TTL_SEC)
+http_gateway = HttpGateway(API_BASE_URL, headers, id_cache=id_cache)
+
+
+def make_gateway(conn):
+    if HANDLER_MODE == "db":
+        return DbGateway(conn, API_BASE_URL, headers, id_cache=id_cache)
+    return http_gateway
+
+def finish(conn, msg_id, status, error_text=None):
+    """Deja el evento en un estado final ('done' o 'error') para que reclaim_stale no lo devuelva a la cola."""
+    with conn.cursor() as c:
+        c.execute("""
+            UPDATE inbound_events
+            SET status=%s, error_text=%s, processed_at=NOW()
+            WHERE message_id=%s
+        """, (status, error_text, msg_id))
+    conn.commit()
+
 def process_message(conn, msg_id):
     try:
         # --------------------
@@ -22,47 +53,54 @@ def process_message(conn, msg_id):
             event = c.fetchone()
 
         if not event:
-            logging.warning(f" Mensaje no encontrado en inbound_events: {msg_id}")
+            log.warning(f" Mensaje no encontrado en inbound_events: {msg_id}")
             return
 
         topic = event.get("topic")
         event_name = event.get("event_name")
-        sub_id = event.get("subscription_id")
 
         # --------------------
         # 2) Validaciones básicas
         # --------------------
         if not topic or not event_name:
-            logging.error(f"❌ Evento inválido en DB (topic/event_name faltan) → msg_id={msg_id}")
+            log.error(f"❌ Evento inválido en DB (topic/event_name faltan) → msg_id={msg_id}")
+            finish(conn, msg_id, "error", "Evento inválido: faltan topic/event_name")
             return
 
         try:
-            payload = json.loads(event["payload"])
+            payload = loads(event["payload"])
         except Exception:
-            logging.error(f"❌ Payload inválido (no es JSON válido) → msg_id={msg_id}")
+            log.error(f"❌ Payload inválido (no es JSON válido) → msg_id={msg_id}")
+            finish(conn, msg_id, "error", "Payload inválido: no es JSON válido")
             return
 
-        logging.info(f"🔍 Procesando evento → topic={topic} | event={event_name}")
+        log.info("🔍 Procesando evento → topic=%s | event=%s", topic, event_name)
 
         # --------------------
         # 3) Dispatch según topic
         # --------------------
+        gateway = make_gateway(conn)
+
         if topic == "user":
-            users.handle(event_name, payload, API_BASE_URL, headers)
+            users.handle(event_name, payload, gateway)
 
         elif topic == "calificacion":
-            reviews.handle(event_name, payload, API_BASE_URL, headers)
+            reviews.handle(event_name, payload, gateway)
 
         elif topic in ("solicitud", "cotizacion"):
             # La cancelación en matching implica rechazo en ORDERS
-            orders.handle(event_name, payload, API_BASE_URL, headers)
+            orders.handle(event_name, payload, gateway)
 
         else:
-            logging.info(f"⚠️ Topic no reconocido, evento ignorado → topic={topic}")
+            log.info("⚠️ Topic no reconocido, evento ignorado → topic=%s", topic)
+            # Se da por procesado (y se confirma al Core): reintentarlo no cambia nada
+            finish(conn, msg_id, "done")
+            notify_ack()
             return
 
         # --------------------
-        # 4) Marcar como procesado
+        # 4) Marcar como procesado (con el gateway a DB, en el mismo commit
+        #    que las escrituras del handler). Queda con acked_at NULL: ACK pendiente
         # --------------------
         with conn.cursor() as c:
             c.execute("""
@@ -73,18 +111,20 @@ def process_message(conn, msg_id):
         conn.commit()
 
         # --------------------
-        # 5) ACK al Core
+        # 5) ACK al Core: lo manda en lote acks.AckBatcher
         # --------------------
-        send_ack(msg_id, sub_id)
+        notify_ack()
 
-        logging.info(f"✅ Mensaje procesado correctamente → msg_id={msg_id}")
+        log.info("✅ Mensaje procesado correctamente → msg_id=%s", msg_id)
 
     except Exception as e:
         # --------------------
         # 6) Error en procesamiento
         # --------------------
-        logging.exception(f"💥 Error procesando msg_id={msg_id}: {e}")
+        log.exception(f"💥 Error procesando msg_id={msg_id}: {e}")
 
+        # Descarta lo que el handler haya escrito a medias antes de marcar el error
+        conn.rollback()
         with conn.cursor() as c:
             c.execute("""
                 UPDATE inbound_events 
@@ -93,3 +133,10 @@ def process_message(conn, msg_id):
             """, (str(e), msg_id))
         conn.commit()
 
+    finally:
+        # La conexión es persistente y sin autocommit: ningún camino puede dejar la
+        # transacción abierta, o las próximas lecturas del thread usarían un snapshot viejo
+        try:
+            conn.rollback()
+        except Exception:
+            pass
@@ -0,0 +1,8 @@
+import pathlib
+import sys
+
+# Agregamos la carpeta worker/ y la raíz del repo (paquete comun/) al sys.path
+WORKER_DIR = pathlib.Path(__file__).resolve().parents[1]
+for path in (WORKER_DIR.parent, WORKER_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
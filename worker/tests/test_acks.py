@@ -0,0 +1,112 @@
+import contextlib
+import threading
+import time
+
+from acks import AckBatcher
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        self.conn.executed.append((query, params))
+        if query.startswith("SELECT"):
+            self._rows = self.conn.pendientes[:params[1]]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, pendientes):
+        self.pendientes = pendientes
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class FakeConnections:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield self.conn
+
+
+class FlushContado(AckBatcher):
+    """No toca la DB: registra cada flush (y cuándo) para probar el disparo."""
+
+    def __init__(self, **kwargs):
+        super().__init__(send=lambda *a: True, **kwargs)
+        self.flushes = []
+        self.flushed = threading.Event()
+
+    def flush_once(self):
+        self.flushes.append(time.monotonic())
+        self.flushed.set()
+        return 0
+
+
+def test_flush_manda_el_lote_y_marca_ok_y_fallidos():
+    rows = [{"id": i, "message_id": f"m{i}", "subscription_id": "s"} for i in (1, 2, 3)]
+    conn = FakeConn(rows)
+    batcher = AckBatcher(send=lambda message_id, subscription_id: message_id != "m2", batch_size=10, concurrency=2)
+    batcher.start(FakeConnections(conn))
+    try:
+        assert batcher.flush_once() == 2
+    finally:
+        batcher.stop()
+
+    updates = [(q, p) for q, p in conn.executed if q.startswith("UPDATE")]
+    assert updates[0] == ("UPDATE inbound_events SET acked_at=NOW() WHERE id IN (%s, %s)", (1, 3))
+    assert updates[1] == ("UPDATE inbound_events SET ack_attempts=ack_attempts+1 WHERE id IN (%s)", (2,))
+    assert conn.commits >= 1
+
+
+def test_flush_al_juntar_batch_size_avisos():
+    batcher = FlushContado(batch_size=3, flush_interval=60)
+    batcher.start(FakeConnections(None))
+    try:
+        batcher.notify()
+        batcher.notify()
+        assert not batcher.flushed.wait(0.2)
+        batcher.notify()
+        assert batcher.flushed.wait(2)
+    finally:
+        batcher.stop()
+
+
+def test_flush_por_tiempo_sin_avisos():
+    batcher = FlushContado(batch_size=100, flush_interval=0.05)
+    inicio = time.monotonic()
+    batcher.start(FakeConnections(None))
+    try:
+        assert batcher.flushed.wait(2)
+        assert batcher.flushes[0] - inicio >= 0.04
+    finally:
+        batcher.stop()
+
+
+def test_stop_hace_un_ultimo_flush():
+    batcher = FlushContado(batch_size=100, flush_interval=60)
+    batcher.start(FakeConnections(None))
+    batcher.notify()
+    batcher.stop()
+    assert len(batcher.flushes) == 1
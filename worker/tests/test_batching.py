@@ -0,0 +1,60 @@
+import pathlib, sys, json
+
+WORKER_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(WORKER_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKER_DIR))
+
+from batching import entity_keys, group_by_entity
+
+
+def _evento(id, topic="solicitud", **data):
+    return {"id": id, "topic": topic, "payload": json.dumps({"payload": data})}
+
+
+def _ids(groups):
+    return [[row["id"] for row in group] for group in groups]
+
+
+def test_entidades_distintas_quedan_en_grupos_distintos():
+    rows = [
+        _evento(1, solicitud_id=10),
+        _evento(2, solicitud_id=20),
+        _evento(3, solicitud_id=10),
+        _evento(4, "user", userId=99),
+    ]
+    assert _ids(group_by_entity(rows)) == [[1, 3], [2], [4]]
+
+
+def test_union_de_grupos_conserva_el_orden_de_llegada():
+    # 1 y 2 arrancan en grupos separados; el 4 los une (misma solicitud que el 2 y
+    # mismo prestador que el 1), y el 5 cuelga del usuario que usó el 3.
+    rows = [
+        _evento(1, solicitud_id=10, prestador_id=7),
+        _evento(2, solicitud_id=20),
+        _evento(3, solicitud_id=30, usuario_id=5),
+        _evento(4, solicitud_id=20, prestador_id=7),
+        _evento(5, "user", userId=5),
+        _evento(6, solicitud_id=20),
+    ]
+    assert _ids(group_by_entity(rows)) == [[1, 2, 4, 6], [3, 5]]
+
+
+def test_union_transitiva_por_el_final_del_lote():
+    # Cada evento abre su propio grupo hasta que el último los une a todos
+    rows = [_evento(i, solicitud_id=i) for i in range(1, 6)]
+    rows.append(_evento(6, solicitudes=[{"solicitudId": i} for i in (5, 3, 1, 4, 2)]))
+    assert _ids(group_by_entity(rows)) == [[1, 2, 3, 4, 5, 6]]
+
+
+def test_payload_invalido_o_sin_claves_va_solo():
+    rows = [
+        {"id": 1, "topic": "solicitud", "payload": "no es json"},
+        _evento(2, solicitud_id=10),
+        {"id": 3, "topic": "otro", "payload": json.dumps({"payload": {"solicitud_id": 10}})},
+    ]
+    assert _ids(group_by_entity(rows)) == [[1], [2], [3]]
+
+
+def test_claves_de_solicitudes_con_top3():
+    data = {"solicitudes": [{"solicitudId": 1, "usuarioId": 2, "top3": [{"prestadorId": 3}, {"prestadorId": 4}]}]}
+    assert entity_keys("solicitud", {"payload": data}) == {("solicitud", "1"), ("user", "2"), ("user", "3"), ("user", "4")}
@@ -0,0 +1,83 @@
+from gateways import DbGateway
+
+
+class FakeCursor:
+    """Tabla pedido en memoria; como pymysql, rowcount cuenta solo las filas cambiadas."""
+
+    def __init__(self, pedidos, prestadores=(), usuarios=()):
+        self.pedidos = pedidos
+        self.ids = {"prestador": set(prestadores), "usuario": set(usuarios)}
+        self.executed = []
+        self.rowcount = 0
+        self._result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        self.executed.append(query)
+        if query.startswith("SELECT id FROM pedido WHERE id = %s"):
+            self._result = [{"id": params[0]}] if params[0] in self.pedidos else []
+        elif query.startswith(("SELECT id FROM prestador", "SELECT id FROM usuario")):
+            tabla = query.split()[3]
+            self._result = [{"id": i} for i in params if i in self.ids[tabla]]
+        elif query.startswith("UPDATE pedido SET"):
+            self.rowcount = 0  # mismos valores que ya tenía
+        elif "FROM pedido p" in query:
+            self._result = [dict(self.pedidos[params[0]])]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeConn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def _gateway(cursor):
+    return DbGateway(FakeConn(cursor), "http://api", {})
+
+
+def test_reentrega_con_los_mismos_valores_no_da_404():
+    cursor = FakeCursor({5: {"estado": "finalizado", "id_pedido": 100}})
+    response = _gateway(cursor).update("pedidos", 5, {"estado": "finalizado"})
+
+    assert response.status_code == 200
+    assert response.json()["estado"] == "finalizado"
+    assert any(q.startswith("INSERT INTO eventos_publicados") for q in cursor.executed)
+
+
+def test_pedido_inexistente_da_404_sin_escribir():
+    cursor = FakeCursor({})
+    assert _gateway(cursor).update("pedidos", 5, {"estado": "finalizado"}).status_code == 404
+    assert _gateway(cursor).delete("pedidos", 5).status_code == 404
+    assert not any(q.startswith(("UPDATE", "INSERT")) for q in cursor.executed)
+
+
+def test_alta_de_pedidos_valida_prestador_como_la_api():
+    cursor = FakeCursor({}, prestadores=[1], usuarios=[2])
+    response = _gateway(cursor).create_bulk("pedidos", [{"id_pedido": 100, "id_prestador": 3, "id_usuario": 2}])
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Prestadores no encontrados: [3]"}
+    assert not any(q.startswith("INSERT") for q in cursor.executed)
+
+
+def test_calificacion_sin_campos_o_inexistente_como_la_api():
+    cursor = FakeCursor({})
+    assert _gateway(cursor).update("calificaciones", 7, {"id_prestador": 1}).status_code == 400
+    response = _gateway(cursor).update("calificaciones", 7, {"estrellas": 4.0})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Calificación no encontrada"}
+    assert not any(q.startswith("UPDATE") for q in cursor.executed)
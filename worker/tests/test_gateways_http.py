@@ -0,0 +1,52 @@
+import gateways
+from gateways import HttpGateway
+from idcache import IdCache
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        pass
+
+
+def test_resolve_ids_una_llamada_para_todos_los_que_faltan(monkeypatch):
+    llamadas = []
+    tabla = {10: 1, 11: 2, 12: 3}
+
+    def request(destino, method, url, params=None, **kwargs):
+        llamadas.append((url, params))
+        return FakeResponse([{"id": tabla[e], "id_usuario": e} for e in params["id_usuario"] if e in tabla])
+
+    monkeypatch.setattr(gateways, "request", request)
+    gateway = HttpGateway("http://api", {}, id_cache=IdCache(clock=lambda: 0))
+    gateway.id_cache.set(("usuarios", "id_usuario", 10), 1)
+
+    assert gateway.resolve_ids("usuarios", "id_usuario", ["10", 11, 12, 99]) == {"10": 1, 11: 2, 12: 3, 99: None}
+    assert llamadas == [("http://api/usuarios/", {"id_usuario": [11, 12, 99], "fields": "id,id_usuario"})]
+
+    # Todo quedó en cache (99 como inexistente): no hay otra llamada
+    assert gateway.resolve_ids("usuarios", "id_usuario", [11, 99]) == {11: 2, 99: None}
+    assert len(llamadas) == 1
+
+
+def test_resolve_ids_en_tandas(monkeypatch):
+    llamadas = []
+
+    def request(destino, method, url, params=None, **kwargs):
+        llamadas.append(len(params["id_prestador"]))
+        return FakeResponse([{"id": e + 1000, "id_prestador": e} for e in params["id_prestador"]])
+
+    monkeypatch.setattr(gateways, "request", request)
+    monkeypatch.setattr(gateways, "ID_LOOKUP_BATCH", 2)
+    resueltos = HttpGateway("http://api", {}).resolve_ids("prestadores", "id_prestador", [1, 2, 3, 4, 5])
+
+    assert llamadas == [2, 2, 1]
+    assert resueltos == {e: e + 1000 for e in range(1, 6)}
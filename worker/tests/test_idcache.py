@@ -0,0 +1,50 @@
+from idcache import IdCache, MISSING
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_desaloja_la_menos_usada():
+    cache = IdCache(maxsize=2, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_ttl_positivo_y_negativo():
+    clock = FakeClock()
+    cache = IdCache(ttl=60, negative_ttl=5, clock=clock)
+    cache.set("existe", 7)
+    cache.set("no_existe", None)
+    assert cache.get("no_existe") is None
+
+    clock.now += 5
+    assert cache.get("no_existe") is MISSING
+    assert cache.get("existe") == 7
+
+    clock.now += 55
+    assert cache.get("existe") is MISSING
+    assert len(cache) == 0
+
+
+def test_invalidaciones_y_cache_desactivado():
+    cache = IdCache(clock=FakeClock())
+    cache.set(("usuarios", "id_usuario", 10), 3)
+    cache.set(("prestadores", "id_prestador", 10), 3)
+    cache.invalidate_internal("usuarios", 3)
+    assert cache.get(("usuarios", "id_usuario", 10)) is MISSING
+    assert cache.get(("prestadores", "id_prestador", 10)) == 3
+
+    apagado = IdCache(maxsize=0)
+    apagado.set("a", 1)
+    assert apagado.get("a") is MISSING
@@ -0,0 +1,85 @@
+import pytest
+
+import process
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        self.conn.executed.append((query, params))
+
+    def fetchone(self):
+        return self.conn.event
+
+
+class FakeConn:
+    def __init__(self, event):
+        self.event = event
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def acks(monkeypatch):
+    avisos = []
+    monkeypatch.setattr(process, "notify_ack", lambda: avisos.append(1))
+    return avisos
+
+
+def _estado_final(conn):
+    updates = [p for q, p in conn.executed if q.startswith("UPDATE inbound_events")]
+    assert len(updates) == 1 and conn.commits == 1
+    status, error_text, msg_id = updates[0]
+    assert msg_id == "m1"
+    return status, error_text
+
+
+def test_sin_topic_queda_en_error(acks):
+    conn = FakeConn({"topic": None, "event_name": "alta", "payload": "{}"})
+    process.process_message(conn, "m1")
+    status, error_text = _estado_final(conn)
+    assert status == "error" and "topic/event_name" in error_text
+    assert not acks
+
+
+def test_payload_invalido_queda_en_error(acks):
+    conn = FakeConn({"topic": "user", "event_name": "alta", "payload": "{no es json"})
+    process.process_message(conn, "m1")
+    status, error_text = _estado_final(conn)
+    assert status == "error" and "JSON" in error_text
+    assert not acks
+
+
+def test_topic_desconocido_queda_done_y_se_confirma(acks):
+    conn = FakeConn({"topic": "otro", "event_name": "alta", "payload": "{}"})
+    process.process_message(conn, "m1")
+    assert _estado_final(conn) == ("done", None)
+    assert acks == [1]
+
+
+def test_mensaje_inexistente_no_escribe(acks):
+    conn = FakeConn(None)
+    process.process_message(conn, "m1")
+    assert not any(q.startswith("UPDATE") for q, _ in conn.executed)
+    assert not acks
+    # Cierra el snapshot del SELECT: la conexión del thread se reusa
+    assert conn.rollbacks == 1
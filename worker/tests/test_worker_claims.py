@@ -0,0 +1,117 @@
+import pathlib, sys, os
+import contextlib
+
+WORKER_DIR = pathlib.Path(__file__).resolve().parents[1]
+if str(WORKER_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKER_DIR))
+
+# worker.py valida las variables de la DB al importarse (no se conecta)
+for variable, valor in {"DB_HOST": "localhost", "DB_PORT": "3306", "MYSQL_USER": "test",
+                        "MYSQL_PASSWORD": "test", "MYSQL_DATABASE": "catalogo"}.items():
+    os.environ.setdefault(variable, valor)
+
+import pymysql
+import worker
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        self.conn.executed.append((query, params))
+        if query.startswith("SELECT id, message_id"):
+            self._rows = self.conn.pendientes
+        elif query.startswith("UPDATE"):
+            self.rowcount = self.conn.rowcount
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConn:
+    def __init__(self, pendientes=(), rowcount=0):
+        self.pendientes = list(pendientes)
+        self.rowcount = rowcount
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class FakeConnections:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield self.conn
+
+
+def _updates(conn):
+    return [(q, p) for q, p in conn.executed if q.startswith("UPDATE")]
+
+
+def test_claim_marca_processing_con_claimed_at():
+    conn = FakeConn([{"id": 1, "message_id": "a"}, {"id": 2, "message_id": "b"}])
+    rows = worker.claim_batch(conn, 10)
+
+    assert [r["id"] for r in rows] == [1, 2]
+    [(query, params)] = _updates(conn)
+    assert "status='processing', claimed_at=NOW()" in query
+    assert params == (1, 2)
+    assert conn.commits == 1
+
+
+def test_grupo_que_falla_libera_los_que_faltan(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(worker, "connections", FakeConnections(conn))
+    procesados = []
+
+    def process_message(conn, message_id):
+        if message_id == "c":
+            raise pymysql.err.OperationalError(2013, "Lost connection")
+        procesados.append(message_id)
+
+    monkeypatch.setattr(worker, "process_message", process_message)
+    rows = [{"id": i, "message_id": m} for i, m in enumerate("abcd", start=1)]
+    worker.process_group(rows)
+
+    assert procesados == ["a", "b"]
+    # El que falló y los siguientes vuelven a 'pending' (solo si siguen en 'processing')
+    [(query, params)] = _updates(conn)
+    assert "SET status='pending'" in query and "AND status='processing'" in query
+    assert params == (3, 4)
+
+
+def test_grupo_completo_no_libera_nada(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(worker, "connections", FakeConnections(conn))
+    monkeypatch.setattr(worker, "process_message", lambda conn, message_id: None)
+    worker.process_group([{"id": 1, "message_id": "a"}])
+    assert _updates(conn) == []
+
+
+def test_reclaim_devuelve_claims_viejos_a_pending():
+    conn = FakeConn(rowcount=3)
+    assert worker.reclaim_stale(conn, timeout_sec=600) == 3
+
+    [(query, params)] = _updates(conn)
+    assert "WHERE status='processing' AND claimed_at < NOW() - INTERVAL %s SECOND" in query
+    assert params == (600,)
+    assert conn.commits == 1
@@ -0,0 +1,84 @@
+import logging
+import select
+import socket
+import threading
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Aviso de eventos nuevos (webhook -> worker)
+# ===========================
+# El webhook, después de guardar un evento en inbound_events, manda un datagrama
+# UDP al worker para que no tenga que esperar al próximo poll. El aviso es solo
+# una pista: si se pierde, el poll con backoff lo levanta igual.
+#
+# Backends (WORKER_WAKEUP_BACKEND):
+#   - "udp":  escucha en WORKER_WAKEUP_ADDR (host:puerto)
+#   - "none": sin aviso externo, solo poll (también sirve como aviso en proceso,
+#             llamando a notify() desde otro thread)
+
+
+class InProcessWakeup:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Espera hasta `timeout` segundos. Devuelve True si llegó un aviso."""
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return woken
+
+    def close(self):
+        pass
+
+
+class UdpWakeup(InProcessWakeup):
+    def __init__(self, host: str, port: int):
+        super().__init__()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.setblocking(False)
+
+    def wait(self, timeout: float) -> bool:
+        if self._event.is_set():
+            self._event.clear()
+            return True
+        ready, _, _ = select.select([self._sock], [], [], timeout)
+        if not ready:
+            return False
+        # Varios avisos seguidos valen como uno: se vacía el socket
+        while True:
+            try:
+                self._sock.recv(64)
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        self._sock.close()
+
+
+def parse_addr(addr: str, default_port: int = 9099):
+    host, _, port = addr.rpartition(":")
+    if not host:
+        return addr, default_port
+    return host, int(port)
+
+
+def make_wakeup(backend: str, addr: str):
+    backend = (backend or "none").lower()
+    if backend == "udp":
+        host, port = parse_addr(addr)
+        try:
+            wakeup = UdpWakeup(host, port)
+            log.info(f"Escuchando avisos de eventos nuevos en udp://{host}:{port}")
+            return wakeup
+        except OSError as e:
+            log.warning(f"No se pudo abrir udp://{host}:{port} para avisos, se usa solo poll: {e}")
+    elif backend != "none":
+        log.warning(f"WORKER_WAKEUP_BACKEND desconocido '{backend}', se usa solo poll")
+    return InProcessWakeup()
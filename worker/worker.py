@@ -1,17 +1,42 @@
 # api/worker/worker.py
 import os, time, logging, pymysql, uuid
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from process import process_message
+from batching import group_by_entity
+from db import ConnectionManager
+from wakeup import make_wakeup
+from metrics import start_metrics_server
+from acks import ack_batcher
+from comun.logs import configure_logging
 import requests
 
+log = logging.getLogger("worker")
+
 # from core_ack import send_ack
 
 # Cargar .env (busca en el cwd y en la raíz del proyecto)
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 WORKER_ID = os.getenv("WORKER_ID", f"worker-{uuid.uuid4().hex[:8]}")
-POLL_INTERVAL_SEC = int(os.getenv("POLL_INTERVAL_SEC", "2"))
+# Poll de respaldo con backoff: arranca en POLL_MIN_SEC y se duplica hasta POLL_INTERVAL_SEC
+POLL_INTERVAL_SEC = float(os.getenv("POLL_INTERVAL_SEC", "2"))
+POLL_MIN_SEC = float(os.getenv("POLL_MIN_SEC", "0.1"))
+# Aviso del webhook cuando entra un evento (ver wakeup.py)
+WAKEUP_BACKEND = os.getenv("WORKER_WAKEUP_BACKEND", "udp")
+WAKEUP_ADDR = os.getenv("WORKER_WAKEUP_ADDR", "0.0.0.0:9099")
+# Cuántos eventos se toman por vuelta y cuántos grupos de entidad se procesan en paralelo
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "20"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# Un evento en 'processing' con un claim más viejo que esto se da por abandonado
+# (worker caído a mitad de un lote) y vuelve a 'pending'. Tiene que superar lo
+# que puede tardar un lote entero; el barrido corre cada WORKER_RECLAIM_INTERVAL_SEC.
+WORKER_CLAIM_TIMEOUT_SEC = int(os.getenv("WORKER_CLAIM_TIMEOUT_SEC", "600"))
+WORKER_RECLAIM_INTERVAL_SEC = float(os.getenv("WORKER_RECLAIM_INTERVAL_SEC", "60"))
+# Si una conexión estuvo quieta más que esto, se le hace ping antes de usarla
+DB_PING_INTERVAL_SEC = int(os.getenv("DB_PING_INTERVAL_SEC", "30"))
+# Puerto para exponer /metrics de Prometheus (vacío = no se expone)
+WORKER_METRICS_PORT = os.getenv("WORKER_METRICS_PORT", "")
 
 # ===========================
 # Configuración DB desde env
@@ -38,95 +63,179 @@ def db():
         cursorclass=pymysql.cursors.DictCursor
     )
 
-def ensure_schema(conn):
+# Una conexión persistente por thread (loop principal + pool de procesamiento)
+connections = ConnectionManager(db, ping_interval=DB_PING_INTERVAL_SEC)
+
+# Columnas del worker en inbound_events: las agrega api/migrations/006 (las
+# migraciones las aplica la API al arrancar o `python -m core.migraciones`)
+INBOUND_EVENTS_COLUMNS = ("acked_at", "ack_attempts", "claimed_at")
+
+def columnas_faltantes(conn):
+    """Columnas del worker que todavía no tiene inbound_events (todas si la tabla no existe)."""
     with conn.cursor() as c:
         c.execute("""
-            CREATE TABLE IF NOT EXISTS inbound_events (
-              id BIGINT AUTO_INCREMENT PRIMARY KEY,
-              message_id VARCHAR(128) NOT NULL UNIQUE,
-              subscription_id VARCHAR(128) NULL,
-              topic VARCHAR(200),
-              event_name VARCHAR(100),
-              payload JSON NOT NULL,
-              received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-              processed_at TIMESTAMP NULL,
-              status ENUM('pending','processing','done','error') DEFAULT 'pending',
-              error_text TEXT NULL
-            )
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'inbound_events'
         """)
-    conn.commit()
+        existentes = {row["COLUMN_NAME"] for row in c.fetchall()}
+    conn.rollback()
+    return [col for col in INBOUND_EVENTS_COLUMNS if col not in existentes]
 
-def claim_one(conn):
+def bootstrap_schema():
+    """Espera a que inbound_events tenga las columnas del worker (reintenta hasta que la DB responda y estén)."""
+    while True:
+        try:
+            with connections.connection() as conn:
+                faltantes = columnas_faltantes(conn)
+            if not faltantes:
+                return
+            log.error(f"A inbound_events le faltan {', '.join(faltantes)} (aplicar migraciones de la API), reintentando")
+        except pymysql.err.OperationalError as e:
+            log.error(f"No se pudo verificar el schema, reintentando: {e}")
+        time.sleep(5)
+
+def has_pending(conn):
+    """Chequeo barato (sin locks, por índice) para no abrir una transacción de claim cuando no hay nada."""
+    with conn.cursor() as c:
+        c.execute("SELECT 1 FROM inbound_events WHERE status='pending' LIMIT 1")
+        row = c.fetchone()
+    # Cerrar el snapshot: si no, las próximas lecturas no verían eventos nuevos
+    conn.rollback()
+    return row is not None
+
+def claim_batch(conn, limit):
+    """
+    Toma hasta `limit` eventos pendientes (en orden de llegada) y los marca como 'processing'.
+    Con SKIP LOCKED varios workers pueden reclamar lotes distintos al mismo tiempo.
+    """
     try:
         with conn.cursor() as c:
             c.execute("START TRANSACTION")
+            query = """
+                SELECT id, message_id, subscription_id, topic, payload FROM inbound_events
+                WHERE status='pending'
+                ORDER BY received_at, id
+                LIMIT %s
+                FOR UPDATE{}
+            """
             try:
-                c.execute("""
-                    SELECT id, message_id FROM inbound_events
-                    WHERE status='pending'
-                    ORDER BY received_at, id
-                    LIMIT 1
-                    FOR UPDATE SKIP LOCKED
-                """)
+                c.execute(query.format(" SKIP LOCKED"), (limit,))
             except pymysql.err.ProgrammingError:
-                c.execute("""
-                    SELECT id, message_id FROM inbound_events
-                    WHERE status='pending'
-                    ORDER BY received_at, id
-                    LIMIT 1
-                    FOR UPDATE
-                """)
-            row = c.fetchone()
-            if not row:
+                c.execute(query.format(""), (limit,))
+            rows = c.fetchall()
+            if not rows:
                 conn.rollback()
-                return None
-            c.execute("UPDATE inbound_events SET status='processing' WHERE id=%s AND status='pending'", (row["id"],))
+                return []
+            placeholders = ", ".join(["%s"] * len(rows))
+            c.execute(
+                f"UPDATE inbound_events SET status='processing', claimed_at=NOW() WHERE id IN ({placeholders}) AND status='pending'",
+                tuple(row["id"] for row in rows),
+            )
             conn.commit()
-            logging.info(f"Mensaje detectado: messageId={row['message_id']}, sub_id={row.get('subscription_id')}")
-            return row["message_id"] # Agregar subscription_id
+            for row in rows:
+                log.info(f"Mensaje detectado: messageId={row['message_id']}, sub_id={row.get('subscription_id')}")
+            return list(rows)
     except Exception as e:
-        logging.exception(f"Error en claim_one: {e}")
+        log.exception(f"Error en claim_batch: {e}")
         try: conn.rollback()
         except: pass
-        return None
+        return []
+
+def reclaim_stale(conn, timeout_sec=WORKER_CLAIM_TIMEOUT_SEC):
+    """Devuelve a 'pending' los eventos en 'processing' con un claim de más de `timeout_sec`. Devuelve cuántos."""
+    with conn.cursor() as c:
+        c.execute("""
+            UPDATE inbound_events SET status='pending', claimed_at=NULL
+            WHERE status='processing' AND claimed_at < NOW() - INTERVAL %s SECOND
+        """, (timeout_sec,))
+        reclaimed = c.rowcount
+    conn.commit()
+    if reclaimed:
+        log.warning(f"{reclaimed} eventos abandonados en 'processing' vuelven a la cola")
+    return reclaimed
+
+def release(rows):
+    """Devuelve a 'pending' los eventos de un grupo que no se llegaron a procesar."""
+    if not rows:
+        return
+    placeholders = ", ".join(["%s"] * len(rows))
+    with connections.connection() as conn:
+        with conn.cursor() as c:
+            c.execute(
+                f"UPDATE inbound_events SET status='pending', claimed_at=NULL WHERE id IN ({placeholders}) AND status='processing'",
+                tuple(row["id"] for row in rows),
+            )
+        conn.commit()
+
+def process_group(rows):
+    """Procesa en serie los eventos de un grupo (misma entidad) con la conexión del thread."""
+    pending = list(rows)
+    try:
+        with connections.connection() as conn:
+            while pending:
+                process_message(conn, pending[0]["message_id"])
+                pending.pop(0)
+    except Exception as e:
+        # Si falla la DB a mitad del grupo, los que faltan vuelven a la cola (en orden)
+        log.exception(f"💥 Error procesando grupo, se liberan {len(pending)} eventos: {e}")
+        try:
+            release(pending)
+        except Exception:
+            log.exception("No se pudieron liberar los eventos del grupo")
+
+def process_batch(rows, executor):
+    """Procesa un lote: grupos de entidad en paralelo, y espera a que terminen todos."""
+    groups = group_by_entity(rows)
+    if executor is None or len(groups) == 1:
+        for group in groups:
+            process_group(group)
+        return
+    log.info(f"Lote de {len(rows)} eventos en {len(groups)} grupos")
+    # list() espera a todos los grupos: el próximo lote no arranca hasta terminar este
+    list(executor.map(process_group, groups))
 
 # Esto solo simula el procesamiento real
 """ 
 def process_message(mid):
-    logging.info(f"Procesando mensaje messageId={mid}")
+    log.info(f"Procesando mensaje messageId={mid}")
     time.sleep(1)
-    logging.info(f"Procesamiento terminado messageId={mid}")"""
+    log.info(f"Procesamiento terminado messageId={mid}")"""
 
 def run():
-    logging.info(f"Worker iniciado id={WORKER_ID}")
+    configure_logging("worker")
+    log.info(f"Worker iniciado id={WORKER_ID} batch={WORKER_BATCH_SIZE} concurrency={WORKER_CONCURRENCY}")
+    bootstrap_schema()
+    start_metrics_server(WORKER_METRICS_PORT)
+    ack_batcher.start(connections)
+    wakeup = make_wakeup(WAKEUP_BACKEND, WAKEUP_ADDR)
+    idle_wait = POLL_MIN_SEC
+    next_reclaim = 0.0
+    executor = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="worker") if WORKER_CONCURRENCY > 1 else None
     while True:
         try:
-            # 🔁 Nueva conexión en cada ciclo
-            conn = db()
-            ensure_schema(conn)
-
-            msg_id = claim_one(conn)
-            if msg_id:
-                process_message(conn, msg_id)
-                # send_ack(msg_id, sub_id)
+            with connections.connection() as conn:
+                if time.monotonic() >= next_reclaim:
+                    reclaim_stale(conn)
+                    next_reclaim = time.monotonic() + WORKER_RECLAIM_INTERVAL_SEC
+                rows = claim_batch(conn, WORKER_BATCH_SIZE) if has_pending(conn) else []
+            if rows:
+                process_batch(rows, executor)
+                idle_wait = POLL_MIN_SEC
             else:
-                # 🔄 No hay mensajes nuevos, esperar un poco
-                logging.debug("Sin mensajes pendientes...")
-                time.sleep(POLL_INTERVAL_SEC)
+                # 🔄 No hay mensajes nuevos: esperar un aviso del webhook o el próximo poll
+                log.debug("Sin mensajes pendientes...")
+                if wakeup.wait(idle_wait):
+                    idle_wait = POLL_MIN_SEC
+                else:
+                    idle_wait = min(idle_wait * 2, POLL_INTERVAL_SEC)
 
         except pymysql.err.OperationalError as e:
-            logging.error(f"Error de conexión con la base de datos: {e}")
-            time.sleep(5)  # Reintentar más tarde
+            log.error(f"Error de conexión con la base de datos: {e}")
+            time.sleep(5)  # Reintentar más tarde (la conexión ya se descartó)
 
         except Exception as e:
-            logging.exception(f"💥 Error inesperado en el loop principal: {e}")
+            log.exception(f"💥 Error inesperado en el loop principal: {e}")
             time.sleep(5)
 
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass  # Evita crash si conn no estaba abierta
-
 if __name__ == "__main__":
     run()